@@ -0,0 +1,46 @@
+"""Benchmark of the Decimal and integer amortization engines
+
+Run with: python -m benchmarks.bench_amortization_engines
+"""
+import timeit
+from decimal import Decimal
+from services import CreateAmortizationScheduleService
+from services.create_amortization_schedule_service import DECIMAL_ARITHMETIC, INTEGER_ARITHMETIC
+
+
+LOANS = [
+    (Decimal('10000.00'), 12, Decimal('0.12')),
+    (Decimal('10000.00'), 60, Decimal('0.12')),
+    (Decimal('50000.00'), 120, Decimal('0.36')),
+    (Decimal('33333.33'), 120, Decimal('0.1234')),
+]
+
+
+def time_call(function, number: int = 200, repeat: int = 5):
+    """Time a function call
+
+    @:param function: Function to time
+    @:param number: Calls per measurement
+    @:param repeat: Number of measurements
+    @:returns: Best time per call in microseconds
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    print('{:<28} {:>14} {:>14} {:>8}'.format('loan / output', 'decimal (us)', 'integer (us)', 'speedup'))
+    for amount, term_months, interest_rate in LOANS:
+        for output, generate in [
+                ('dicts', CreateAmortizationScheduleService.generate_amortization_schedule),
+                ('cents', CreateAmortizationScheduleService.generate_amortization_schedule_cents)]:
+            decimal_time = time_call(lambda: generate(amount, term_months, interest_rate, DECIMAL_ARITHMETIC))
+            integer_time = time_call(lambda: generate(amount, term_months, interest_rate, INTEGER_ARITHMETIC))
+            print('{:<28} {:>14.1f} {:>14.1f} {:>7.2f}x'.format(
+                '${} {}mo @ {} / {}'.format(amount, term_months, interest_rate, output),
+                decimal_time,
+                integer_time,
+                decimal_time / integer_time))
+
+
+if __name__ == '__main__':
+    main()
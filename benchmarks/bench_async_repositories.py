@@ -0,0 +1,152 @@
+"""Benchmark of concurrent requests on the SQLite and aiosqlite repositories
+
+Run with: python -m benchmarks.bench_async_repositories [--loans 1000000] [--clients 16]
+
+Fills an SQLite database with --loans loans (and a user and an authorized
+user per 10 loans). Then --clients concurrent clients each list the loans of
+random users with AsyncGetUserLoansService while one more client keeps
+counting the loans (a query scanning the table), as a slow report would.
+Reports the listings per second, their latency and the longest the event
+loop went without running (checked every millisecond) for the SQLite
+repositories called directly (as through AsyncRepositoryAdapter) and the
+aiosqlite repositories.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+from repositories import AiosqliteAuthorizedUserRepository,\
+    AiosqliteConnectionPool,\
+    AiosqliteLoanRepository,\
+    AiosqliteUserRepository,\
+    AsyncRepositoryAdapter,\
+    SqliteAuthorizedUserRepository,\
+    SqliteConnectionPool,\
+    SqliteLoanRepository,\
+    SqliteUserRepository
+from services import AsyncGetUserLoansService
+
+
+LOANS_PER_USER = 10
+CHUNK_LOANS = 100000
+DURATION_SECONDS = 5
+
+
+def populate(path: str, loans: int):
+    """Create users, loans and authorized users in a database"""
+    pool = SqliteConnectionPool(path, size=1)
+    users = loans // LOANS_PER_USER
+    generator = random.Random(1)
+    SqliteUserRepository(pool).create_many(
+        [User(user_id=0, username='user{}'.format(user)) for user in range(users)])
+    for start in range(0, loans, CHUNK_LOANS):
+        SqliteLoanRepository(pool).create_many([
+            Loan(
+                loan_id=0,
+                user_id=loan // LOANS_PER_USER + 1,
+                amount=Decimal(generator.randint(1, 10000000)).scaleb(-2),
+                term_months=generator.randint(1, 120),
+                interest_rate=Decimal(generator.randint(600, 3600)).scaleb(-4),
+                authorized_user_ids=[])
+            for loan in range(start, min(start + CHUNK_LOANS, loans))
+        ])
+    SqliteAuthorizedUserRepository(pool).create_many([
+        AuthorizedUser(authorized_user_id=0, loan_id=generator.randint(1, loans), user_id=user + 1)
+        for user in range(users)
+    ])
+    pool.close()
+
+
+async def run_clients(user_repository, loan_repository, authorized_user_repository, users: int, clients: int):
+    """Run the clients for DURATION_SECONDS
+
+    @:returns: Tuple of listing latencies in seconds, counts made and
+    longest event loop stall in seconds
+    """
+    deadline = time.perf_counter() + DURATION_SECONDS
+    latencies = []
+    counts = 0
+    longest_stall = 0.0
+
+    async def list_loans(seed: int):
+        generator = random.Random(seed)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await AsyncGetUserLoansService.get_user_loans(
+                loan_repository, user_repository, authorized_user_repository, generator.randint(1, users))
+            latencies.append(time.perf_counter() - start)
+            # Each listing is a separate request, so others run in between
+            await asyncio.sleep(0)
+
+    async def count_loans():
+        nonlocal counts
+        while time.perf_counter() < deadline:
+            await loan_repository.count()
+            counts += 1
+            await asyncio.sleep(0)
+
+    async def watch_event_loop():
+        nonlocal longest_stall
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            longest_stall = max(longest_stall, time.perf_counter() - start - 0.001)
+
+    await asyncio.gather(watch_event_loop(), count_loans(), *(list_loans(seed) for seed in range(clients)))
+    return latencies, counts, longest_stall
+
+
+def report(name: str, latencies, counts: int, longest_stall: float):
+    latencies.sort()
+    print('{:<10} {:>12.0f} {:>10.2f} {:>10.2f} {:>8} {:>14.1f}'.format(
+        name,
+        len(latencies) / DURATION_SECONDS,
+        statistics.median(latencies) * 1e3,
+        latencies[int(len(latencies) * 0.99)] * 1e3,
+        counts,
+        longest_stall * 1e3))
+
+
+async def measure(path: str, users: int, clients: int):
+    print('{:<10} {:>12} {:>10} {:>10} {:>8} {:>14}'.format(
+        'backend', 'listings/s', 'p50 (ms)', 'p99 (ms)', 'counts', 'stall (ms)'))
+
+    pool = SqliteConnectionPool(path, size=clients + 1)
+    report('sqlite', *await run_clients(
+        AsyncRepositoryAdapter(SqliteUserRepository(pool)),
+        AsyncRepositoryAdapter(SqliteLoanRepository(pool)),
+        AsyncRepositoryAdapter(SqliteAuthorizedUserRepository(pool)),
+        users,
+        clients))
+    pool.close()
+
+    pool = AiosqliteConnectionPool(path, size=clients + 1)
+    await pool.open()
+    report('aiosqlite', *await run_clients(
+        AiosqliteUserRepository(pool),
+        AiosqliteLoanRepository(pool),
+        AiosqliteAuthorizedUserRepository(pool),
+        users,
+        clients))
+    await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--loans', type=int, default=1000000)
+    parser.add_argument('--clients', type=int, default=16)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        populate(path, arguments.loans)
+        asyncio.run(measure(path, arguments.loans // LOANS_PER_USER, arguments.clients))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark of the actual/365 schedule engine and its payment solver
+
+Run with: python -m benchmarks.bench_day_count_engine
+
+For loans over a grid of interest rates, terms and start dates, reports the
+Newton iterations (final balance evaluations) to solve the level payment
+against a search stepping a cent at a time from the monthly schedule's
+payment, how far the final payment is from the others with the solved
+payment and with the monthly schedule's payment, and the latency of solving
+and of generating a schedule next to CreateAmortizationScheduleService.
+"""
+import calendar
+import datetime
+import statistics
+from decimal import Decimal
+from services import CreateAmortizationScheduleService, DayCountAmortizationScheduleService
+from .bench_amortization_engines import time_call
+
+
+AMOUNT = Decimal('50000.00')
+INTEREST_RATES = [Decimal(basis_points).scaleb(-4) for basis_points in range(600, 3601, 300)]
+TERMS = [1, 12, 36, 60, 120]
+# First and last day of each month of a leap year
+START_DATES = [
+    datetime.date(2024, month, day)
+    for month in range(1, 13) for day in [1, calendar.monthrange(2024, month)[1]]
+]
+
+
+def search_iterations(amount: Decimal, term_months: int, interest_rate: Decimal, start_date: datetime.date):
+    """Count final balance evaluations of a cent-by-cent search from the monthly payment
+
+    @:returns: Tuple of evaluations and final payment difference (cents) with
+    the monthly schedule's payment
+    """
+    dates = DayCountAmortizationScheduleService._payment_dates(start_date, term_months)
+    period_days = [(date - previous).days for previous, date in zip(dates, dates[1:])]
+    rate_numerator, rate_denominator = interest_rate.as_integer_ratio()
+
+    def final_balance(payment_cents: int):
+        return DayCountAmortizationScheduleService._final_balance_cents(
+            int(amount.scaleb(2)), payment_cents, period_days, rate_numerator, rate_denominator * 365)
+
+    payment = CreateAmortizationScheduleService.generate_amortization_schedule(
+        amount, term_months, interest_rate)[1]['payment']
+    payment_cents = int(payment.scaleb(2))
+    monthly_payment_balance = balance = final_balance(payment_cents)
+    step = 1 if balance > 0 else -1
+    evaluations = 1
+    while True:
+        next_balance = final_balance(payment_cents + step)
+        evaluations += 1
+        if abs(next_balance) >= abs(balance):
+            return evaluations, abs(monthly_payment_balance)
+        payment_cents += step
+        balance = next_balance
+
+
+def main():
+    iterations = []
+    search_evaluations = []
+    solved_differences = []
+    monthly_differences = []
+    for interest_rate in INTEREST_RATES:
+        for term_months in TERMS:
+            for start_date in START_DATES:
+                payment, solver_iterations = DayCountAmortizationScheduleService.solve_level_payment(
+                    AMOUNT, term_months, interest_rate, start_date)
+                iterations.append(solver_iterations)
+                evaluations, monthly_difference = search_iterations(AMOUNT, term_months, interest_rate, start_date)
+                search_evaluations.append(evaluations)
+                monthly_differences.append(monthly_difference)
+                schedule = DayCountAmortizationScheduleService.generate_amortization_schedule(
+                    AMOUNT, term_months, interest_rate, start_date)
+                solved_differences.append(int(abs(schedule[-1]['payment'] - payment).scaleb(2)))
+
+    print('{} loans of {} (rates {} to {}, terms {}, {} start dates)'.format(
+        len(iterations), AMOUNT, INTEREST_RATES[0], INTEREST_RATES[-1], TERMS, len(START_DATES)))
+    print('{:<50} {:>8} {:>8} {:>8}'.format('', 'mean', 'p50', 'max'))
+    for name, values in [
+            ('Newton iterations', iterations),
+            ('Cent-by-cent search evaluations', search_evaluations),
+            ('Final payment difference, solved (cents)', solved_differences),
+            ('Final payment difference, monthly payment (cents)', monthly_differences)]:
+        print('{:<50} {:>8.1f} {:>8.0f} {:>8}'.format(
+            name, statistics.mean(values), statistics.median(values), max(values)))
+
+    start_date = datetime.date(2024, 1, 31)
+    for term_months in [12, 60, 120]:
+        interest_rate = Decimal('0.12')
+        for name, microseconds in [
+                ('solve_level_payment', time_call(lambda: DayCountAmortizationScheduleService.solve_level_payment(
+                    AMOUNT, term_months, interest_rate, start_date))),
+                ('DayCountAmortizationScheduleService', time_call(
+                    lambda: DayCountAmortizationScheduleService.generate_amortization_schedule(
+                        AMOUNT, term_months, interest_rate, start_date))),
+                ('CreateAmortizationScheduleService', time_call(
+                    lambda: CreateAmortizationScheduleService.generate_amortization_schedule(
+                        AMOUNT, term_months, interest_rate)))]:
+            print('{:<50} {:>10.1f} us'.format('{} {}mo'.format(name, term_months), microseconds))
+
+
+if __name__ == '__main__':
+    main()
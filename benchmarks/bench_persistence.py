@@ -0,0 +1,141 @@
+"""Benchmark of restarting persisted memory repositories
+
+Run with: python -m benchmarks.bench_persistence [--loans 10000000] [--backend columnar]
+    [--tail-loans 100000] [--directory DIR]
+
+Fills the repositories with --loans loans (and a user and an authorized user
+per 10 loans), saves a snapshot, then creates --tail-loans more loans through
+the operation log. Reports the snapshot time and size, then the time to
+restore fresh repositories from the snapshot and the log after it. Also
+reports commits per second and fsyncs from concurrent clients each creating
+users and waiting for their commit, against an fsync per commit.
+"""
+import argparse
+import asyncio
+import gc
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+from repositories import AuthorizedUserRepository, ColumnarLoanRepository, LoanRepository, RepositoryPersistence,\
+    UserRepository
+
+
+CHUNK_RECORDS = 100000
+BACKENDS = {'memory': LoanRepository, 'columnar': ColumnarLoanRepository}
+
+
+def new_loans(generator: random.Random, users: int, count: int):
+    return [
+        Loan(
+            loan_id=0,
+            user_id=generator.randint(1, users),
+            amount=Decimal(generator.randint(100000, 10000000)).scaleb(-2),
+            term_months=generator.randint(1, 120),
+            interest_rate=Decimal(generator.randint(600, 3600)).scaleb(-4),
+            authorized_user_ids=[])
+        for _ in range(count)
+    ]
+
+
+def fill(repositories, loans: int):
+    """Create loans with a user and an authorized user per 10 loans"""
+    user_repository, loan_repository, authorized_user_repository = repositories
+    generator = random.Random(1)
+    users = max(loans // 10, 1)
+    for start in range(0, users, CHUNK_RECORDS):
+        user_repository.create_many([
+            User(user_id=0, username='user{}'.format(user_id))
+            for user_id in range(start + 1, min(start + CHUNK_RECORDS, users) + 1)
+        ])
+    for start in range(0, loans, CHUNK_RECORDS):
+        loan_repository.create_many(new_loans(generator, users, min(CHUNK_RECORDS, loans - start)))
+    for start in range(0, users, CHUNK_RECORDS):
+        authorized_user_repository.create_many([
+            AuthorizedUser(authorized_user_id=0, loan_id=generator.randint(1, loans), user_id=user_id)
+            for user_id in range(start + 1, min(start + CHUNK_RECORDS, users) + 1)
+        ])
+
+
+async def commit_clients(persistence, clients: int, commits: int):
+    """Create users from concurrent clients, each waiting for its commit
+
+    @:returns: Commits per second
+    """
+    user_repository = persistence.user_repository
+
+    async def client():
+        for _ in range(commits):
+            user_repository.create(User(user_id=0, username='client'))
+            await persistence.commit()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return clients * commits / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--loans', type=int, default=10000000)
+    parser.add_argument('--backend', choices=BACKENDS, default='columnar')
+    parser.add_argument('--tail-loans', type=int, default=100000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--directory')
+    arguments = parser.parse_args()
+    temporary_directory = None
+    if arguments.directory is None:
+        temporary_directory = tempfile.TemporaryDirectory()
+        arguments.directory = temporary_directory.name
+    loan_repository_class = BACKENDS[arguments.backend]
+
+    repositories = (UserRepository(), loan_repository_class(), AuthorizedUserRepository())
+    start = time.perf_counter()
+    fill(repositories, arguments.loans)
+    print('{:<40} {:>10.2f} s'.format('Fill {} loans'.format(arguments.loans), time.perf_counter() - start))
+
+    persistence = RepositoryPersistence(arguments.directory, *repositories)
+    persistence.restore()
+    start = time.perf_counter()
+    segment = persistence.snapshot_now()
+    print('{:<40} {:>10.2f} s'.format('Save snapshot', time.perf_counter() - start))
+    print('{:<40} {:>10.0f} MB'.format('Snapshot size', os.path.getsize(
+        os.path.join(arguments.directory, 'snapshot-{:012d}.bin'.format(segment))) / 1e6))
+
+    generator = random.Random(2)
+    start = time.perf_counter()
+    for offset in range(0, arguments.tail_loans, 1000):
+        repositories[1].create_many(new_loans(generator, 1000, min(1000, arguments.tail_loans - offset)))
+    persistence.operation_log.flush()
+    print('{:<40} {:>10.2f} s'.format('Log {} loans'.format(arguments.tail_loans), time.perf_counter() - start))
+
+    commits = 50
+    grouped = asyncio.run(commit_clients(persistence, arguments.clients, commits))
+    flushes = persistence.operation_log.flushes
+    start = time.perf_counter()
+    for _ in range(arguments.clients * commits):
+        repositories[0].create(User(user_id=0, username='client'))
+        persistence.operation_log.flush()
+    single = arguments.clients * commits / (time.perf_counter() - start)
+    print('{:<40} {:>10.0f} /s ({} fsyncs for {} commits)'.format(
+        'Group commit, {} clients'.format(arguments.clients), grouped, flushes - 1, arguments.clients * commits))
+    print('{:<40} {:>10.0f} /s'.format('fsync per commit', single))
+    persistence.close()
+
+    del repositories, persistence
+    gc.collect()
+    restored = (UserRepository(), loan_repository_class(), AuthorizedUserRepository())
+    start = time.perf_counter()
+    statistics = RepositoryPersistence(arguments.directory, *restored).restore()
+    restart_seconds = time.perf_counter() - start
+    print('{:<40} {:>10.2f} s'.format('Restart: load snapshot', statistics['snapshot_seconds']))
+    print('{:<40} {:>10.2f} s ({} records)'.format(
+        'Restart: replay log', statistics['replay_seconds'], statistics['replayed_records']))
+    print('{:<40} {:>10.2f} s'.format('Restart', restart_seconds))
+    if temporary_directory is not None:
+        temporary_directory.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Benchmark of what-if schedules with extra payments
+
+Run with: python -m benchmarks.bench_prepayment_schedule [--term-months 120] [--checkpoint-interval 12]
+
+For an extra payment in each of several months, reports the time to build the
+schedule with it from scratch and to recompute it from the schedule without
+extra payments (from the last checkpoint before the month), and checks both
+give the same months.
+"""
+import argparse
+from decimal import Decimal
+from services import PrepaymentSchedule
+from .bench_amortization_engines import time_call
+
+
+AMOUNT = Decimal('20000.00')
+INTEREST_RATE = Decimal('0.06')
+EXTRA_PAYMENT = Decimal('500.00')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--term-months', type=int, default=120)
+    parser.add_argument('--checkpoint-interval', type=int, default=12)
+    arguments = parser.parse_args()
+
+    base_schedule = PrepaymentSchedule(
+        AMOUNT, arguments.term_months, INTEREST_RATE, checkpoint_interval=arguments.checkpoint_interval)
+    print('{:<10} {:>15} {:>15} {:>12}'.format('month', 'full (us)', 'incremental (us)', 'recomputed'))
+    for month in sorted({1, arguments.term_months // 8, arguments.term_months // 2,
+                         arguments.term_months * 5 // 6, arguments.term_months}):
+        extra_payments = {month: EXTRA_PAYMENT}
+        full_schedule = PrepaymentSchedule(
+            AMOUNT, arguments.term_months, INTEREST_RATE, extra_payments, arguments.checkpoint_interval)
+        what_if = base_schedule.with_extra_payments(extra_payments)
+        assert full_schedule.months == what_if.months
+        full_time = time_call(lambda: PrepaymentSchedule(
+            AMOUNT, arguments.term_months, INTEREST_RATE, extra_payments, arguments.checkpoint_interval))
+        incremental_time = time_call(lambda: base_schedule.with_extra_payments(extra_payments))
+        print('{:<10} {:>15.1f} {:>15.1f} {:>12}'.format(month, full_time, incremental_time, what_if.recomputed_months))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark of creating and storing user, loan and authorized user records
+
+Run with: python -m benchmarks.bench_records [--records 1000000]
+
+Reports the time to build each record, the time per create through the
+services (validation, record and memory repository), and the memory per
+record held in a memory repository of --records records (loans in both
+LoanRepository and ColumnarLoanRepository), measured with tracemalloc.
+"""
+import argparse
+import gc
+import tracemalloc
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+from repositories import AuthorizedUserRepository, ColumnarLoanRepository, LoanRepository, UserRepository
+from services import AddAuthorizedUserService, CreateLoanService, CreateUserService
+from .bench_amortization_engines import time_call
+
+
+def measure_memory(create_records, records: int):
+    """Measure the memory held per record
+
+    @:param create_records: Function creating and returning a repository of
+    the given number of records
+    @:returns: Bytes per record
+    """
+    gc.collect()
+    tracemalloc.start()
+    repository = create_records(records)
+    size_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del repository
+    return size_bytes / records
+
+
+def create_users(records: int):
+    user_repository = UserRepository()
+    user_repository.create_many([User(user_id=0, username='user{}'.format(index)) for index in range(records)])
+    return user_repository
+
+
+def create_loans(records: int, loan_repository_class=LoanRepository):
+    loan_repository = loan_repository_class()
+    loan_repository.create_many([
+        Loan(
+            loan_id=0,
+            user_id=index // 10 + 1,
+            amount=Decimal('10000.00'),
+            term_months=60,
+            interest_rate=Decimal('0.12'),
+            authorized_user_ids=[])
+        for index in range(records)
+    ])
+    return loan_repository
+
+
+def create_authorized_users(records: int):
+    authorized_user_repository = AuthorizedUserRepository()
+    authorized_user_repository.create_many([
+        AuthorizedUser(authorized_user_id=0, loan_id=index + 1, user_id=index // 10 + 1) for index in range(records)
+    ])
+    return authorized_user_repository
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=1000000)
+    arguments = parser.parse_args()
+
+    user_repository = UserRepository()
+    loan_repository = LoanRepository()
+    authorized_user_repository = AuthorizedUserRepository()
+    user_id = CreateUserService.create_user(user_repository, 'owner')
+    loan_id = CreateLoanService.create_loan(
+        loan_repository, user_repository, user_id, Decimal('10000.00'), 60, Decimal('0.12'))
+
+    results = [
+        ('build User', time_call(lambda: User(user_id=0, username='user'), number=100000)),
+        ('build Loan', time_call(lambda: Loan(
+            loan_id=0,
+            user_id=1,
+            amount=Decimal('10000.00'),
+            term_months=60,
+            interest_rate=Decimal('0.12'),
+            authorized_user_ids=[]), number=100000)),
+        ('build AuthorizedUser', time_call(
+            lambda: AuthorizedUser(authorized_user_id=0, loan_id=1, user_id=1), number=100000)),
+        ('CreateUserService.create_user', time_call(
+            lambda: CreateUserService.create_user(user_repository, 'user'), number=100000)),
+        ('CreateLoanService.create_loan', time_call(
+            lambda: CreateLoanService.create_loan(
+                loan_repository, user_repository, user_id, Decimal('10000.00'), 60, Decimal('0.12')),
+            number=100000)),
+        ('AddAuthorizedUserService.add_authorized_user', time_call(
+            lambda: AddAuthorizedUserService.add_authorized_user(
+                authorized_user_repository, user_repository, loan_repository, user_id, loan_id),
+            number=100000))
+    ]
+    for name, microseconds in results:
+        print('{:<50} {:>10.2f} us'.format(name, microseconds))
+    for name, create_records in [
+            ('User', create_users),
+            ('Loan', create_loans),
+            ('Loan (ColumnarLoanRepository)', lambda records: create_loans(records, ColumnarLoanRepository)),
+            ('AuthorizedUser', create_authorized_users)]:
+        print('{:<50} {:>10.0f} bytes/record'.format(
+            '{} memory at {} records'.format(name, arguments.records),
+            measure_memory(create_records, arguments.records)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark of the memory and SQLite repositories
+
+Run with: python -m benchmarks.bench_repositories [--loans 1000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+from repositories import AuthorizedUserRepository,\
+    ColumnarLoanRepository,\
+    LoanRepository,\
+    SqliteAuthorizedUserRepository,\
+    SqliteConnectionPool,\
+    SqliteLoanRepository,\
+    SqliteUserRepository,\
+    UserRepository
+from .bench_amortization_engines import time_call
+
+
+LOANS_PER_USER = 10
+AUTHORIZED_USERS_PER_LOAN = 0.1
+
+
+def populate(user_repository, loan_repository, authorized_user_repository, loans: int):
+    """Create users, loans and authorized users
+
+    @:returns: Time per created loan in microseconds
+    """
+    users = loans // LOANS_PER_USER
+    generator = random.Random(1)
+    start = time.perf_counter()
+    for user in range(users):
+        user_repository.create(User(user_id=0, username='user{}'.format(user)))
+    for loan in range(loans):
+        loan_repository.create(Loan(
+            loan_id=0,
+            user_id=loan // LOANS_PER_USER + 1,
+            amount=Decimal(generator.randint(1, 10000000)).scaleb(-2),
+            term_months=generator.randint(1, 120),
+            interest_rate=Decimal(generator.randint(600, 3600)).scaleb(-4),
+            authorized_user_ids=[]))
+    for _ in range(int(loans * AUTHORIZED_USERS_PER_LOAN)):
+        authorized_user_repository.create(AuthorizedUser(
+            authorized_user_id=0,
+            loan_id=generator.randint(1, loans),
+            user_id=generator.randint(1, users)))
+    return (time.perf_counter() - start) / loans * 1e6
+
+
+def measure(name: str, user_repository, loan_repository, authorized_user_repository, loans: int):
+    """Print timings of each repository method"""
+    create_time = populate(user_repository, loan_repository, authorized_user_repository, loans)
+    users = loans // LOANS_PER_USER
+    generator = random.Random(2)
+    print('{:<9} {:<50} {:>10.1f}'.format(name, 'create (per loan)', create_time))
+    for method, function in [
+            ('UserRepository.exists', lambda: user_repository.exists(generator.randint(1, users))),
+            ('LoanRepository.read', lambda: loan_repository.read(generator.randint(1, loans))),
+            ('LoanRepository.read_loans_for_user_id',
+             lambda: loan_repository.read_loans_for_user_id(generator.randint(1, users))),
+            ('AuthorizedUserRepository.read_authorized_user_ids',
+             lambda: authorized_user_repository.read_authorized_user_ids(generator.randint(1, loans))),
+            ('AuthorizedUserRepository.read_loan_ids_by_user_id',
+             lambda: authorized_user_repository.read_loan_ids_by_user_id(generator.randint(1, users)))]:
+        print('{:<9} {:<50} {:>10.1f}'.format(name, method, time_call(function, number=2000)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--loans', type=int, default=1000000)
+    arguments = parser.parse_args()
+
+    print('{:<9} {:<50} {:>10}'.format('backend', 'operation', 'time (us)'))
+    measure('memory', UserRepository(), LoanRepository(), AuthorizedUserRepository(), arguments.loans)
+    measure('columnar', UserRepository(), ColumnarLoanRepository(), AuthorizedUserRepository(), arguments.loans)
+    with tempfile.TemporaryDirectory() as directory:
+        pool = SqliteConnectionPool(os.path.join(directory, 'bench.db'))
+        measure(
+            'sqlite',
+            SqliteUserRepository(pool),
+            SqliteLoanRepository(pool),
+            SqliteAuthorizedUserRepository(pool),
+            arguments.loans)
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
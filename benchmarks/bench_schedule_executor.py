@@ -0,0 +1,105 @@
+"""Benchmark of cheap request latency during a burst of schedule requests
+
+Run with: python -m benchmarks.bench_schedule_executor [--loans 2000] [--concurrency 16]
+
+Creates loans with distinct terms so every schedule request misses the cache,
+then sends schedule requests from concurrent clients while another client
+keeps creating users. Reported for each executor: latency of the user
+requests (from when each was due), which only wait on schedule work that
+blocks the event loop, and schedule requests per second.
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from services import ScheduleExecutor
+from services.schedule_executor import INLINE_EXECUTOR, PROCESS_EXECUTOR, THREAD_EXECUTOR
+from .load_harness import percentile
+
+
+USER_REQUEST_PAUSE_SECONDS = 0.001
+
+
+async def run_burst(app, loan_ids, concurrency: int):
+    """Send schedule requests for every loan while creating users
+
+    @:returns: Tuple of sorted user request latencies (seconds) and schedule
+    requests per second
+    """
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        pending = list(loan_ids)
+        burst_done = False
+        user_latencies = []
+
+        async def schedule_client():
+            while pending:
+                response = await client.get('/user/1/loan/{}/schedule'.format(pending.pop()))
+                assert response.status_code == 200
+
+        async def user_client():
+            while not burst_done:
+                # Includes waiting for the event loop to wake up from the
+                # pause, which is when blocking schedule work shows
+                start = time.perf_counter()
+                await asyncio.sleep(USER_REQUEST_PAUSE_SECONDS)
+                await client.post('/users', json={'username': 'probe'})
+                user_latencies.append(time.perf_counter() - start - USER_REQUEST_PAUSE_SECONDS)
+
+        probe = asyncio.create_task(user_client())
+        start = time.perf_counter()
+        await asyncio.gather(*(schedule_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        burst_done = True
+        await probe
+    return sorted(user_latencies), len(loan_ids) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--loans', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=None)
+    arguments = parser.parse_args()
+
+    import main as api
+    # Every schedule request generates its schedule
+    api.schedule_cache.max_entries = 0
+    asyncio.run(_create_owner(api.app))
+    loan_ids = asyncio.run(_create_loans(api.app, arguments.loans))
+
+    print('{:<10} {:>14} {:>14} {:>14} {:>16}'.format(
+        'executor', 'users p50 (ms)', 'users p99 (ms)', 'users max (ms)', 'schedules/s'))
+    for kind in [INLINE_EXECUTOR, THREAD_EXECUTOR, PROCESS_EXECUTOR]:
+        api.schedule_executor = ScheduleExecutor(kind, max_workers=arguments.workers)
+        try:
+            latencies, schedules_per_second = asyncio.run(run_burst(api.app, loan_ids, arguments.concurrency))
+        finally:
+            api.schedule_executor.shutdown()
+        print('{:<10} {:>14.2f} {:>14.2f} {:>14.2f} {:>16.1f}'.format(
+            kind,
+            percentile(latencies, 50) * 1000,
+            percentile(latencies, 99) * 1000,
+            latencies[-1] * 1000,
+            schedules_per_second))
+
+
+async def _create_owner(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        await client.post('/users', json={'username': 'owner'})
+
+
+async def _create_loans(app, loans: int):
+    """Create 120-month loans with distinct amounts for user 1
+
+    @:returns: List of loan IDs
+    """
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+        response = await client.post('/loans/bulk', json=[
+            {'user_id': 1, 'amount': '{}.00'.format(10000 + loan), 'term_months': 120, 'interest_rate': '0.12'}
+            for loan in range(loans)
+        ])
+        return [result['loan_id'] for result in response.json()]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""HTTP load harness replaying the requests in test_main.http
+
+Run with: python -m benchmarks.load_harness [--concurrency 16] [--seconds 10]
+    [--url http://127.0.0.1:8000] [--weight "GET /user/{id}/loan/{id}/schedule=20"] [--json]
+
+The requests in test_main.http are first sent once in order, which creates
+the users and loans the later requests refer to. Then concurrent clients send
+randomly chosen requests from the file for a fixed time, each request weighted
+by its endpoint (1 unless given with --weight). Without --url, requests go
+straight to the FastAPI app in this process through httpx's ASGI transport.
+Latency percentiles and requests per second are reported per endpoint.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import httpx
+
+
+HTTP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_main.http')
+DEFAULT_BASE_URL = 'http://127.0.0.1:8000'
+PERCENTILES = [50, 95, 99]
+
+
+class HttpFileRequest:
+    """Request read from an .http file"""
+    __slots__ = ('name', 'method', 'path', 'headers', 'body')
+
+    def __init__(self, name: str, method: str, path: str, headers: dict, body: bytes):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    @property
+    def endpoint(self):
+        """Method and path with numeric path segments and query removed"""
+        path = re.sub(r'/-?\d+(?=/|$)', '/{id}', self.path.split('?')[0])
+        return '{} {}'.format(self.method, path)
+
+
+def parse_http_file(path: str):
+    """Parse requests from an .http file
+
+    Requests are separated by '### name' lines and consist of a request line,
+    headers, a blank line and an optional body.
+
+    @:param path: Path of .http file
+    @:returns: List of requests
+    """
+    with open(path) as file:
+        sections = re.split(r'^###[ \t]*(.*)$', file.read(), flags=re.MULTILINE)
+
+    requests = []
+    # re.split gives the text before the first separator, then name and text
+    # pairs
+    for name, text in zip(sections[1::2], sections[2::2]):
+        lines = text.strip('\n').split('\n')
+        while lines and not lines[0].strip():
+            lines.pop(0)
+        if not lines:
+            continue
+        method, url = lines[0].split()[:2]
+        headers = {}
+        index = 1
+        while index < len(lines) and lines[index].strip():
+            header, _, value = lines[index].partition(':')
+            headers[header.strip()] = value.strip()
+            index += 1
+        body = '\n'.join(lines[index + 1:]).strip()
+        requests.append(HttpFileRequest(
+            name.strip(), method, re.sub(r'^https?://[^/]+', '', url), headers, body.encode()))
+    return requests
+
+
+def percentile(sorted_values, percent: float):
+    """Nearest-rank percentile of already sorted values"""
+    index = max(int(len(sorted_values) * percent / 100 + 0.5) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+async def send(client: httpx.AsyncClient, request: HttpFileRequest):
+    """Send a request
+
+    @:returns: Response status code
+    """
+    response = await client.request(request.method, request.path, headers=request.headers, content=request.body)
+    await response.aread()
+    return response.status_code
+
+
+async def run_load(client: httpx.AsyncClient, requests, weights, concurrency: int, seconds: float):
+    """Send weighted random requests from concurrent clients for a fixed time
+
+    @:returns: Tuple of elapsed seconds and dictionary of endpoint to list of
+    (latency in seconds, status code)
+    """
+    samples = {}
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(generator: random.Random):
+        while time.perf_counter() < deadline:
+            request = generator.choices(requests, weights)[0]
+            start = time.perf_counter()
+            status_code = await send(client, request)
+            samples.setdefault(request.endpoint, []).append((time.perf_counter() - start, status_code))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(random.Random(index)) for index in range(concurrency)))
+    return time.perf_counter() - start, samples
+
+
+def summarize(elapsed: float, samples: dict):
+    """Summarize latency and throughput per endpoint
+
+    @:returns: Dictionary of endpoint to statistics (latencies in ms)
+    """
+    summary = {}
+    for endpoint, endpoint_samples in sorted(samples.items()):
+        latencies = sorted(latency for latency, _ in endpoint_samples)
+        statistics = {
+            'requests': len(endpoint_samples),
+            'rps': len(endpoint_samples) / elapsed,
+            'server_errors': sum(status_code >= 500 for _, status_code in endpoint_samples),
+            'client_errors': sum(400 <= status_code < 500 for _, status_code in endpoint_samples)
+        }
+        for percent in PERCENTILES:
+            statistics['p{}_ms'.format(percent)] = percentile(latencies, percent) * 1000
+        summary[endpoint] = statistics
+    return summary
+
+
+async def main_async(arguments):
+    requests = parse_http_file(arguments.file)
+    endpoint_weights = {}
+    for weight in arguments.weight:
+        endpoint, _, value = weight.rpartition('=')
+        endpoint_weights[endpoint.strip()] = float(value)
+    weights = [endpoint_weights.get(request.endpoint, 1) for request in requests]
+
+    if arguments.url:
+        client = httpx.AsyncClient(base_url=arguments.url, timeout=60,
+                                   limits=httpx.Limits(max_connections=arguments.concurrency))
+    else:
+        # Imported here so running against a separate server doesn't build
+        # the app's repositories in this process
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=DEFAULT_BASE_URL)
+
+    async with client:
+        for request in requests:
+            await send(client, request)
+        elapsed, samples = await run_load(client, requests, weights, arguments.concurrency, arguments.seconds)
+    return summarize(elapsed, samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file', default=HTTP_FILE, help='.http file of requests (default test_main.http)')
+    parser.add_argument('--url', help='base URL of a running server (default: in-process app)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--weight', action='append', default=[],
+                        help='endpoint weight such as "GET /user/{id}/loan/{id}/schedule=20"')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    arguments = parser.parse_args()
+
+    summary = asyncio.run(main_async(arguments))
+    if arguments.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print('{:<52} {:>8} {:>9} {:>9} {:>9} {:>9} {:>7}'.format(
+        'endpoint', 'requests', 'rps', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', '5xx'))
+    for endpoint, statistics in summary.items():
+        print('{:<52} {:>8} {:>9.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>7}'.format(
+            endpoint, statistics['requests'], statistics['rps'], statistics['p50_ms'], statistics['p95_ms'],
+            statistics['p99_ms'], statistics['server_errors']))
+    print('{:<52} {:>8} {:>9.1f}'.format(
+        'total',
+        sum(statistics['requests'] for statistics in summary.values()),
+        sum(statistics['rps'] for statistics in summary.values())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Load test of throughput with 1 to N uvicorn workers sharing a SQLite database
+
+Run with: python -m benchmarks.load_workers [--workers 1 2 4] [--seconds 10]
+
+Each run starts uvicorn with REPOSITORY_BACKEND=sqlite and the schedule cache
+disabled, so every request reads the shared database and generates a
+schedule, then reports the requests per second served by concurrent clients.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+import httpx
+
+
+PORT = 8765
+BASE_URL = 'http://127.0.0.1:{}'.format(PORT)
+
+
+def start_server(workers: int, database_path: str):
+    """Start uvicorn and wait until it accepts requests
+
+    @:returns: Server process
+    """
+    environment = dict(
+        os.environ,
+        REPOSITORY_BACKEND='sqlite',
+        SQLITE_DATABASE_PATH=database_path,
+        SCHEDULE_CACHE_MAX_ENTRIES='0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(PORT), '--workers', str(workers),
+         '--log-level', 'warning'],
+        env=environment)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(BASE_URL + '/docs')
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.terminate()
+    raise Exception('server did not start')
+
+
+def create_loans(count: int):
+    """Create a user with loans through the API
+
+    @:returns: List of (user ID, loan ID)
+    """
+    generator = random.Random(1)
+    with httpx.Client(base_url=BASE_URL) as client:
+        user_id = client.post('/users', json={'username': 'load'}).json()['user_id']
+        return [
+            (user_id, client.post('/user/{}/loans'.format(user_id), json={
+                'amount': str(generator.randint(1000, 100000)),
+                'term_months': 120,
+                'interest_rate': str(Decimal(generator.randint(600, 3600)).scaleb(-4))
+            }).json()['loan_id'])
+            for _ in range(count)
+        ]
+
+
+async def run_clients(loans, clients: int, seconds: float):
+    """Request loan schedules from concurrent clients for a fixed time
+
+    @:returns: Number of completed requests
+    """
+    deadline = time.monotonic() + seconds
+    completed = 0
+
+    async def client_loop(client, generator):
+        nonlocal completed
+        while time.monotonic() < deadline:
+            user_id, loan_id = generator.choice(loans)
+            response = await client.get('/user/{}/loan/{}/schedule'.format(user_id, loan_id))
+            response.raise_for_status()
+            completed += 1
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(client_loop(client, random.Random(index)) for index in range(clients)))
+    return completed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    arguments = parser.parse_args()
+
+    print('{:>8} {:>10} {:>10}'.format('workers', 'rps', 'scaling'))
+    baseline = None
+    for workers in arguments.workers:
+        with tempfile.TemporaryDirectory() as directory:
+            server = start_server(workers, os.path.join(directory, 'load.db'))
+            try:
+                loans = create_loans(100)
+                completed = asyncio.run(run_clients(loans, arguments.clients, arguments.seconds))
+            finally:
+                server.terminate()
+                server.wait()
+        rps = completed / arguments.seconds
+        baseline = baseline or rps
+        print('{:>8} {:>10.1f} {:>9.2f}x'.format(workers, rps, rps / baseline))
+
+
+if __name__ == '__main__':
+    main()
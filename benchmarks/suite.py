@@ -0,0 +1,192 @@
+"""Micro-benchmark suite with regression check against a stored baseline
+
+Run with: python -m benchmarks.suite [--output results.json]
+    [--baseline benchmarks/baseline.json] [--threshold 0.25]
+    [--sizes 10000 1000000] [--save-baseline benchmarks/baseline.json]
+
+Every benchmark reports the best time per call in microseconds. Results are
+written as JSON, and with --baseline the run fails (exit status 1) if any
+benchmark is slower than its baseline time by more than the threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+from repositories import AuthorizedUserRepository, LoanRepository, UserLoansView, UserRepository
+from services import AmortizationScheduleCache, CreateAmortizationScheduleService, CreateLoanService, GetUserLoansService
+from .bench_amortization_engines import time_call
+
+
+SCHEDULE_TERMS = [12, 60, 120]
+SCHEDULE_RATES = ['0.06', '0.12', '0.36']
+DEFAULT_SIZES = [10000, 1000000]
+DEFAULT_THRESHOLD = 0.25
+SHARED_LOANS = 100
+AUTHORIZED_USERS_PER_LOAN = 5
+
+
+def benchmark_schedules():
+    """Time schedule generation across the term and interest rate grid
+
+    @:returns: Dictionary of benchmark name to microseconds per call
+    """
+    results = {}
+    for term_months in SCHEDULE_TERMS:
+        for interest_rate in SCHEDULE_RATES:
+            arguments = (Decimal('50000.00'), term_months, Decimal(interest_rate))
+            results['generate_amortization_schedule/{}mo/{}'.format(term_months, interest_rate)] = time_call(
+                lambda: CreateAmortizationScheduleService.generate_amortization_schedule(*arguments),
+                number=max(2000 // term_months, 10))
+    return results
+
+
+def benchmark_schedule_cache():
+    """Time schedule endpoint responses missing an empty schedule cache
+
+    @:returns: Dictionary of benchmark name to microseconds per call
+    """
+    results = {}
+    arguments = (Decimal('10000.00'), 120, Decimal('0.1'))
+    for arithmetic in ['decimal', 'integer']:
+        results['get_schedule_json/cold/{}'.format(arithmetic)] = time_call(
+            lambda: AmortizationScheduleCache(arithmetic=arithmetic).get_schedule_json(*arguments),
+            number=200)
+    return results
+
+
+def populate(loans: int, user_loans_view=None):
+    """Create memory repositories holding users, loans and authorized users
+
+    Records are created in bulk so large sizes don't dominate the run time.
+
+    @:param loans: Number of loans (with one user per 10 loans)
+    @:param user_loans_view: UserLoansView for the repositories (optional)
+    @:returns: Tuple of user, loan and authorized user repositories
+    """
+    user_repository = UserRepository()
+    loan_repository = LoanRepository(user_loans_view)
+    authorized_user_repository = AuthorizedUserRepository(user_loans_view)
+    users = max(loans // 10, 1)
+    user_repository.create_many([User(user_id=0, username='user') for _ in range(users)])
+    loan_repository.create_many([
+        Loan(
+            loan_id=0,
+            user_id=loan % users + 1,
+            amount=Decimal('10000.00'),
+            term_months=60,
+            interest_rate=Decimal('0.12'),
+            authorized_user_ids=[])
+        for loan in range(loans)
+    ])
+    return user_repository, loan_repository, authorized_user_repository
+
+
+def benchmark_repositories(sizes):
+    """Time loan creation and reads in repositories of each size
+
+    @:param sizes: Numbers of loans already in the repositories
+    @:returns: Dictionary of benchmark name to microseconds per call
+    """
+    results = {}
+    for size in sizes:
+        user_repository, loan_repository, _ = populate(size)
+        users = len(user_repository.users)
+        results['create_loan/{}'.format(size)] = time_call(
+            lambda: CreateLoanService.create_loan(
+                loan_repository, user_repository, 1, Decimal('10000.00'), 60, Decimal('0.12')),
+            number=2000)
+        results['loan_read/{}'.format(size)] = time_call(
+            lambda: loan_repository.read(size // 2), number=20000)
+        results['read_loans_for_user_id/{}'.format(size)] = time_call(
+            lambda: loan_repository.read_loans_for_user_id(users // 2), number=20000)
+        del user_repository, loan_repository
+    return results
+
+
+def benchmark_user_loans():
+    """Time listing a user's loans when many loans are shared with the user
+
+    @:returns: Dictionary of benchmark name to microseconds per call
+    """
+    results = {}
+    user_loans_view = UserLoansView()
+    user_repository, loan_repository, authorized_user_repository = populate(10000, user_loans_view)
+    # Loans of other users shared with user 1, each with several authorized users
+    authorized_user_repository.create_many([
+        AuthorizedUser(authorized_user_id=0, loan_id=loan_id, user_id=user_id)
+        for loan_id in range(2, 2 + SHARED_LOANS * 10, 10)
+        for user_id in [1] + list(range(2, 1 + AUTHORIZED_USERS_PER_LOAN))
+    ])
+    for name, view in [('repositories', None), ('user_loans_view', user_loans_view)]:
+        results['get_user_loans/{}'.format(name)] = time_call(
+            lambda: GetUserLoansService.get_user_loans(
+                loan_repository, user_repository, authorized_user_repository, 1, view),
+            number=200)
+    results['get_user_loans_page/limit_20'] = time_call(
+        lambda: GetUserLoansService.get_user_loans_page(
+            loan_repository, user_repository, authorized_user_repository, 1, None, 20),
+        number=1000)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Find benchmarks slower than their baseline by more than the threshold
+
+    @:param results: Dictionary of benchmark name to microseconds per call
+    @:param baseline: Baseline results in the same form
+    @:param threshold: Allowed slowdown as a fraction (0.25 allows 25% slower)
+    @:returns: Dictionary of regressed benchmark name to ratio against baseline
+    """
+    return {
+        name: results[name] / baseline[name]
+        for name in results
+        if name in baseline and results[name] > baseline[name] * (1 + threshold)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', help='write results JSON to this file (default stdout)')
+    parser.add_argument('--baseline', help='baseline results JSON to check against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--save-baseline', help='also write results as a new baseline to this file')
+    arguments = parser.parse_args()
+
+    results = {}
+    results.update(benchmark_schedules())
+    results.update(benchmark_schedule_cache())
+    results.update(benchmark_repositories(arguments.sizes))
+    results.update(benchmark_user_loans())
+    document = {
+        'unit': 'us_per_call',
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+
+    encoded = json.dumps(document, indent=2, sort_keys=True) + '\n'
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(encoded)
+    else:
+        sys.stdout.write(encoded)
+    if arguments.save_baseline:
+        with open(arguments.save_baseline, 'w') as file:
+            file.write(encoded)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, arguments.threshold)
+        for name, ratio in sorted(regressions.items()):
+            print('REGRESSION {}: {:.2f}x baseline ({:.1f} us vs {:.1f} us)'.format(
+                name, ratio, results[name], baseline[name]), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
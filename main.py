@@ -1,23 +1,240 @@
 """API handler for loan service"""
 
-from fastapi import FastAPI, Request
+import asyncio
+import collections
+import datetime
+import json
+import os
+from fastapi import FastAPI, Request, Response
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from repositories import AuthorizedUserRepository, LoanRepository, UserRepository
+from metrics import MetricsMiddleware, MetricsRegistry, instrument, route_path
+from repositories import AiosqliteAuthorizedUserRepository,\
+    AiosqliteConnectionPool,\
+    AiosqliteLoanRepository,\
+    AiosqliteUserRepository,\
+    AsyncRepositoryAdapter,\
+    AuthorizedUserRepository,\
+    ColumnarLoanRepository,\
+    LoanRepository,\
+    RepositoryPersistence,\
+    SqliteAuthorizedUserRepository,\
+    SqliteConnectionPool,\
+    SqliteLoanRepository,\
+    SqliteUserRepository,\
+    UserLoansView,\
+    UserRepository
 from request_exception import RequestException
-from services import AddAuthorizedUserService,\
+from services import AmortizationScheduleCache,\
+    AnnuityFactorTable,\
+    AsyncAddAuthorizedUserService,\
+    AsyncCreateLoanService,\
+    AsyncCreateUserService,\
+    AsyncGetUserLoansService,\
+    AsyncRevokeAuthorizedUserService,\
     CreateAmortizationScheduleService,\
-    CreateUserService,\
-    CreateLoanService,\
-    GetUserLoansService
+    DayCountAmortizationScheduleService,\
+    PrepaymentSchedule,\
+    ScheduleETag,\
+    ScheduleExecutor
+from services.get_user_loans_service import DEFAULT_PAGE_LIMIT
+from services.schedule_executor import DEFAULT_INLINE_MAX_MONTHS, INLINE_EXECUTOR
 from decimal import Decimal, InvalidOperation
 
 app = FastAPI()
 
-user_repository = UserRepository()
-loan_repository = LoanRepository()
-authorized_user_repository = AuthorizedUserRepository()
+# Rows of bulk requests are validated and created this many at a time
+BULK_CHUNK_ROWS = 10000
+
+# REPOSITORY_BACKEND is 'memory' (default), 'columnar' to keep loans in typed
+# columns in memory, 'sqlite' to keep data in the SQLITE_DATABASE_PATH file or
+# 'aiosqlite' to keep it there without blocking the event loop
+aiosqlite_pool = None
+if os.environ.get('REPOSITORY_BACKEND', 'memory') == 'aiosqlite':
+    aiosqlite_pool = AiosqliteConnectionPool(
+        os.environ.get('SQLITE_DATABASE_PATH', 'loans.db'),
+        int(os.environ.get('SQLITE_POOL_SIZE', 4)))
+    user_loans_view = None
+    user_repository = AiosqliteUserRepository(aiosqlite_pool)
+    loan_repository = AiosqliteLoanRepository(aiosqlite_pool)
+    authorized_user_repository = AiosqliteAuthorizedUserRepository(aiosqlite_pool)
+elif os.environ.get('REPOSITORY_BACKEND') == 'sqlite':
+    sqlite_pool = SqliteConnectionPool(
+        os.environ.get('SQLITE_DATABASE_PATH', 'loans.db'),
+        int(os.environ.get('SQLITE_POOL_SIZE', 4)))
+    user_loans_view = None
+    user_repository = SqliteUserRepository(sqlite_pool)
+    loan_repository = SqliteLoanRepository(sqlite_pool)
+    authorized_user_repository = SqliteAuthorizedUserRepository(sqlite_pool)
+elif os.environ.get('REPOSITORY_BACKEND') == 'columnar':
+    # The loans' user index takes the place of the view, which would keep a
+    # Python list entry per loan
+    user_loans_view = None
+    user_repository = UserRepository()
+    loan_repository = ColumnarLoanRepository()
+    authorized_user_repository = AuthorizedUserRepository()
+else:
+    user_loans_view = UserLoansView()
+    user_repository = UserRepository()
+    loan_repository = LoanRepository(user_loans_view)
+    authorized_user_repository = AuthorizedUserRepository(user_loans_view)
+
+# Requests use the repositories through the async protocols; the others are
+# called directly by the adapters
+if aiosqlite_pool is not None:
+    async_user_repository = user_repository
+    async_loan_repository = loan_repository
+    async_authorized_user_repository = authorized_user_repository
+else:
+    async_user_repository = AsyncRepositoryAdapter(user_repository)
+    async_loan_repository = AsyncRepositoryAdapter(loan_repository)
+    async_authorized_user_repository = AsyncRepositoryAdapter(authorized_user_repository)
+
+# PERSISTENCE_DIRECTORY keeps the memory or columnar repositories in
+# snapshots and an operation log in that directory, restored at startup.
+# Snapshots are saved every SNAPSHOT_INTERVAL_SECONDS if anything was logged.
+repository_persistence = None
+restore_statistics = {}
+if os.environ.get('PERSISTENCE_DIRECTORY') and os.environ.get('REPOSITORY_BACKEND') not in ('sqlite', 'aiosqlite'):
+    repository_persistence = RepositoryPersistence(
+        os.environ['PERSISTENCE_DIRECTORY'], user_repository, loan_repository, authorized_user_repository)
+    restore_statistics = repository_persistence.restore()
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get('SNAPSHOT_INTERVAL_SECONDS', 300))
+
+schedule_cache = AmortizationScheduleCache(
+    max_entries=int(os.environ.get('SCHEDULE_CACHE_MAX_ENTRIES', 1024)),
+    max_bytes=int(os.environ.get('SCHEDULE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    arithmetic=os.environ.get('SCHEDULE_ARITHMETIC', 'integer'))
+
+# Annuity factors can be built ahead of time (see README) and loaded at startup
+if os.path.exists(os.environ.get('ANNUITY_FACTOR_TABLE_PATH', '')):
+    CreateAmortizationScheduleService.annuity_factor_table = AnnuityFactorTable.load(
+        os.environ['ANNUITY_FACTOR_TABLE_PATH'])
+
+# Schedules longer than SCHEDULE_INLINE_MAX_MONTHS are generated by
+# SCHEDULE_EXECUTOR ('inline' (default), 'thread' or 'process'); see the README
+# for the latency trade-off
+schedule_executor = ScheduleExecutor(
+    kind=os.environ.get('SCHEDULE_EXECUTOR', INLINE_EXECUTOR),
+    max_workers=int(os.environ.get('SCHEDULE_EXECUTOR_WORKERS', 0)) or None,
+    inline_max_months=int(os.environ.get('SCHEDULE_INLINE_MAX_MONTHS', DEFAULT_INLINE_MAX_MONTHS)),
+    annuity_factor_table_path=os.environ.get('ANNUITY_FACTOR_TABLE_PATH'))
+
+
+# Schedule and month responses never change for a loan, so where loan IDs are
+# never reused (SQLite or persisted repositories) clients may keep them for
+# SCHEDULE_MAX_AGE_SECONDS (a year by default) without revalidating. Memory
+# repositories without persistence start again from loan ID 1 after a
+# restart, so there clients revalidate every time by default (a 304 still
+# saves generating and sending the schedule).
+if repository_persistence is not None or os.environ.get('REPOSITORY_BACKEND') in ('sqlite', 'aiosqlite'):
+    DEFAULT_SCHEDULE_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+else:
+    DEFAULT_SCHEDULE_MAX_AGE_SECONDS = 0
+SCHEDULE_MAX_AGE_SECONDS = int(os.environ.get('SCHEDULE_MAX_AGE_SECONDS', DEFAULT_SCHEDULE_MAX_AGE_SECONDS))
+if SCHEDULE_MAX_AGE_SECONDS > 0:
+    SCHEDULE_CACHE_CONTROL = 'private, max-age={}, immutable'.format(SCHEDULE_MAX_AGE_SECONDS)
+else:
+    SCHEDULE_CACHE_CONTROL = 'private, no-cache'
+
+
+PREPAYMENT_CACHE_MAX_ENTRIES = int(os.environ.get('PREPAYMENT_CACHE_MAX_ENTRIES', 256))
+base_prepayment_schedules = collections.OrderedDict()
+
+
+async def read_base_prepayment_schedule(loan):
+    """Get the schedule without extra payments that what-if schedules start from
+
+    Schedules are keyed by the string form of the terms so loans only share a
+    schedule when their terms have the same representation, like the schedule
+    cache. Missing schedules are generated by the schedule executor; the
+    least recently used ones are dropped past PREPAYMENT_CACHE_MAX_ENTRIES.
+
+    @:param loan: Loan to get the schedule of
+    @:returns: PrepaymentSchedule with checkpoints
+    """
+    key = (str(loan.amount), loan.term_months, str(loan.interest_rate))
+    schedule = base_prepayment_schedules.get(key)
+    if schedule is not None:
+        base_prepayment_schedules.move_to_end(key)
+        return schedule
+    schedule = await schedule_executor.run(
+        loan.term_months, PrepaymentSchedule, loan.amount, loan.term_months, loan.interest_rate)
+    base_prepayment_schedules[key] = schedule
+    if len(base_prepayment_schedules) > PREPAYMENT_CACHE_MAX_ENTRIES:
+        base_prepayment_schedules.popitem(last=False)
+    return schedule
+
+# Metrics are served at /metrics in Prometheus text format (METRICS_ENABLED=0
+# turns off the request and service timings)
+metrics_registry = MetricsRegistry()
+request_duration = metrics_registry.histogram(
+    'loan_api_http_request_duration_seconds', 'HTTP request latency', ['method', 'path'])
+requests_total = metrics_registry.counter(
+    'loan_api_http_requests_total', 'HTTP requests', ['method', 'path', 'status'])
+errors_total = metrics_registry.counter(
+    'loan_api_errors_total', 'Requests rejected by type of error', ['type', 'path'])
+component_call_duration = metrics_registry.histogram(
+    'loan_api_component_call_duration_seconds', 'Service and repository call latency', ['component', 'method'])
+# Metrics are rendered without awaiting, so aiosqlite repositories aren't counted
+if aiosqlite_pool is None:
+    metrics_registry.gauge_function(
+        'loan_api_repository_records',
+        'Records in each repository',
+        lambda: {
+            ('users',): user_repository.count(),
+            ('loans',): loan_repository.count(),
+            ('authorized_users',): authorized_user_repository.count()
+        },
+        ['repository'])
+metrics_registry.gauge_function(
+    'loan_api_restore_seconds',
+    'Time restoring the repositories at startup',
+    lambda: {
+        ('snapshot',): restore_statistics['snapshot_seconds'],
+        ('replay',): restore_statistics['replay_seconds']
+    } if restore_statistics else {},
+    ['phase'])
+metrics_registry.gauge_function(
+    'loan_api_schedule_cache_entries',
+    'Schedules in the schedule cache',
+    lambda: {(): schedule_cache.statistics()['entries']})
+metrics_registry.gauge_function(
+    'loan_api_schedule_cache_size_bytes',
+    'Estimated size of schedules in the schedule cache',
+    lambda: {(): schedule_cache.statistics()['size_bytes']})
+metrics_registry.gauge_function(
+    'loan_api_schedule_cache_operations_total',
+    'Schedule cache hits, misses (schedules generated), missed peeks and evictions',
+    lambda: {
+        (result,): schedule_cache.statistics()[result] for result in ['hits', 'misses', 'peeks_missed', 'evictions']
+    },
+    ['result'],
+    metric_type='counter')
+
+if os.environ.get('METRICS_ENABLED', '1') != '0':
+    app.add_middleware(MetricsMiddleware, request_duration=request_duration, requests=requests_total)
+    # Services are replaced here by timed subclasses (the imported classes
+    # are left alone); repositories and the cache are timed on main's objects
+    AsyncAddAuthorizedUserService = instrument(
+        AsyncAddAuthorizedUserService, 'AsyncAddAuthorizedUserService', component_call_duration)
+    AsyncCreateLoanService = instrument(AsyncCreateLoanService, 'AsyncCreateLoanService', component_call_duration)
+    AsyncCreateUserService = instrument(AsyncCreateUserService, 'AsyncCreateUserService', component_call_duration)
+    AsyncGetUserLoansService = instrument(
+        AsyncGetUserLoansService, 'AsyncGetUserLoansService', component_call_duration)
+    AsyncRevokeAuthorizedUserService = instrument(
+        AsyncRevokeAuthorizedUserService, 'AsyncRevokeAuthorizedUserService', component_call_duration)
+    CreateAmortizationScheduleService = instrument(
+        CreateAmortizationScheduleService, 'CreateAmortizationScheduleService', component_call_duration)
+    DayCountAmortizationScheduleService = instrument(
+        DayCountAmortizationScheduleService, 'DayCountAmortizationScheduleService', component_call_duration)
+    for component, target in [
+            ('AmortizationScheduleCache', schedule_cache),
+            ('UserRepository', user_repository),
+            ('LoanRepository', loan_repository),
+            ('AuthorizedUserRepository', authorized_user_repository)]:
+        instrument(target, component, component_call_duration)
 
 
 class UserRequest(BaseModel):
@@ -37,6 +254,63 @@ class AuthorizedUserRequest(BaseModel):
     user_id: int
 
 
+class WhatIfRequest(BaseModel):
+    """Extra payments request object (month to extra payment)"""
+    extra_payments: dict[int, str]
+
+
+@app.on_event('shutdown')
+def shutdown_schedule_executor():
+    """Stops the schedule executor's workers"""
+    schedule_executor.shutdown()
+
+
+@app.on_event('startup')
+async def open_aiosqlite_pool():
+    """Opens the connections of the aiosqlite backend"""
+    if aiosqlite_pool is not None:
+        await aiosqlite_pool.open()
+
+
+@app.on_event('shutdown')
+async def close_aiosqlite_pool():
+    """Closes the connections of the aiosqlite backend"""
+    if aiosqlite_pool is not None:
+        await aiosqlite_pool.close()
+
+
+@app.on_event('startup')
+async def start_snapshots():
+    """Starts saving snapshots periodically if repositories are persisted"""
+    if repository_persistence is not None:
+        app.state.snapshot_task = asyncio.create_task(save_snapshots())
+
+
+@app.on_event('shutdown')
+async def stop_snapshots():
+    """Stops saving snapshots and flushes the operation log"""
+    if repository_persistence is not None:
+        app.state.snapshot_task.cancel()
+        repository_persistence.close()
+
+
+async def save_snapshots():
+    """Saves a snapshot every SNAPSHOT_INTERVAL_SECONDS if anything was logged"""
+    snapshot_records = 0
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        records = repository_persistence.operation_log.appended_records
+        if records != snapshot_records:
+            await repository_persistence.snapshot()
+            snapshot_records = records
+
+
+async def commit_operations():
+    """Waits until created records are on disk if repositories are persisted"""
+    if repository_persistence is not None:
+        await repository_persistence.commit()
+
+
 @app.post('/users')
 async def create_user(user: UserRequest):
     """Handles creating new user
@@ -44,20 +318,43 @@ async def create_user(user: UserRequest):
     @:param user: User creation request
     @:returns: JSON response with new user ID
     """
-    user_id = CreateUserService.create_user(user_repository, user.username)
+    user_id = await AsyncCreateUserService.create_user(async_user_repository, user.username)
+    await commit_operations()
     return {
         'user_id': user_id
     }
 
 
 @app.get('/user/{user_id}/loans')
-async def get_user_loans(user_id: int):
-    """Handles getting all loans belonging to user"""
-    loans = GetUserLoansService.get_user_loans(
-        loan_repository,
-        user_repository,
-        authorized_user_repository,
-        user_id)
+async def get_user_loans(user_id: int, response: Response, cursor: str | None = None, limit: int | None = None):
+    """Handles getting all loans belonging to user
+
+    Giving a cursor or limit returns a single page of loans, with the cursor
+    of the next page in the X-Next-Cursor header when there are more.
+
+    @:param user_id: User ID to get loans from
+    @:param response: Response (to set the next page cursor)
+    @:param cursor: Cursor of page to get (optional)
+    @:param limit: Maximum number of loans to get (optional)
+    @:returns: JSON array of loans
+    """
+    if cursor is None and limit is None:
+        loans = await AsyncGetUserLoansService.get_user_loans(
+            async_loan_repository,
+            async_user_repository,
+            async_authorized_user_repository,
+            user_id,
+            user_loans_view)
+    else:
+        loans, next_cursor = await AsyncGetUserLoansService.get_user_loans_page(
+            async_loan_repository,
+            async_user_repository,
+            async_authorized_user_repository,
+            user_id,
+            cursor=cursor,
+            limit=DEFAULT_PAGE_LIMIT if limit is None else limit)
+        if next_cursor is not None:
+            response.headers['X-Next-Cursor'] = next_cursor
     return [{
         'amount': str(loan.amount),
         'term_months': loan.term_months,
@@ -84,34 +381,106 @@ async def create_loan(user_id: int, loan: LoanRequest):
     except InvalidOperation as e:
         raise RequestException('Invalid interest rate')
 
-    loan_id = CreateLoanService.create_loan(
-        loan_repository,
-        user_repository,
+    loan_id = await AsyncCreateLoanService.create_loan(
+        async_loan_repository,
+        async_user_repository,
         user_id=user_id,
         amount=amount,
         term_months=loan.term_months,
         interest_rate=interest_rate)
+    await commit_operations()
     return {
         'loan_id': loan_id
     }
 
 
 @app.get('/user/{user_id}/loan/{loan_id}/schedule')
-async def get_loan_schedule(user_id: int, loan_id: int):
+async def get_loan_schedule(
+        user_id: int,
+        loan_id: int,
+        request: Request,
+        response: Response,
+        from_month: int | None = None,
+        to_month: int | None = None):
     """Handles getting loan schedule for given loan
 
+    Requesting application/x-ndjson streams one JSON object per line from
+    the cached schedule instead of encoding a single JSON array.
+
+    Responses have a strong ETag from the loan's terms and can be cached for
+    SCHEDULE_MAX_AGE_SECONDS. A matching If-None-Match is answered with 304
+    before the schedule is generated.
+
     @:param user_id: User ID of loan (currently not checked; only for URL)
     @:param loan_id: Loan ID of loan
+    @:param request: Request (to check the accepted response type)
+    @:param response: Response (to set the caching headers)
+    @:param from_month: First month to get (optional; 0 is beginning of loan)
+    @:param to_month: Last month to get (optional; inclusive)
     @:returns: JSON array of monthly balance schedules
     """
-    loan = loan_repository.read(loan_id)
+    loan = await async_loan_repository.read(loan_id)
     if loan is None:
         raise RequestException('missing loan {}'.format(loan_id))
 
-    schedule = CreateAmortizationScheduleService.generate_amortization_schedule(
-        amount=loan.amount,
-        term_months=loan.term_months,
-        interest_rate=loan.interest_rate)
+    media_type = 'application/json'
+    if 'application/x-ndjson' in request.headers.get('accept', ''):
+        media_type = 'application/x-ndjson'
+    representation = 'schedule {}'.format(media_type)
+    if from_month is not None or to_month is not None:
+        from_month = 0 if from_month is None else from_month
+        to_month = loan.term_months if to_month is None else to_month
+        if not 0 <= from_month <= to_month <= loan.term_months:
+            raise RequestException('invalid months {} to {}'.format(from_month, to_month))
+        representation = 'months {}-{} {}'.format(from_month, to_month, media_type)
+
+    # The response depends on the Accept header too
+    headers = schedule_cache_headers(loan, representation)
+    headers['Vary'] = 'Accept'
+    if ScheduleETag.matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    if from_month is not None:
+        # Only the requested months are generated unless the whole schedule
+        # is already cached
+        schedule = schedule_cache.peek_schedule(
+            amount=loan.amount,
+            term_months=loan.term_months,
+            interest_rate=loan.interest_rate)
+        if schedule is not None:
+            schedule = schedule[from_month:to_month + 1]
+        else:
+            schedule = await schedule_executor.run(
+                to_month - from_month + 1,
+                CreateAmortizationScheduleService.generate_amortization_window,
+                loan.amount,
+                loan.term_months,
+                loan.interest_rate,
+                from_month,
+                to_month)
+    elif media_type == 'application/x-ndjson':
+        from_month = 0
+        schedule = await schedule_cache.get_schedule_async(
+            amount=loan.amount,
+            term_months=loan.term_months,
+            interest_rate=loan.interest_rate,
+            executor=schedule_executor)
+    else:
+        # Whole schedules are encoded once from cents and reused for every
+        # loan with the same terms
+        return Response(
+            await schedule_cache.get_schedule_json_async(
+                amount=loan.amount,
+                term_months=loan.term_months,
+                interest_rate=loan.interest_rate,
+                executor=schedule_executor),
+            media_type='application/json',
+            headers=headers)
+
+    if media_type == 'application/x-ndjson':
+        return StreamingResponse(
+            stream_schedule_lines(schedule, from_month), media_type='application/x-ndjson', headers=headers)
 
     return [
         {
@@ -119,38 +488,155 @@ async def get_loan_schedule(user_id: int, loan_id: int):
             'remaining_balance': str(month_balances['balance']),
             'monthly_payment': str(month_balances['payment'])
         }
+        for month, month_balances in enumerate(schedule, from_month)
+    ]
+
+
+@app.get('/user/{user_id}/loan/{loan_id}/schedule/actual_365')
+async def get_loan_actual_365_schedule(user_id: int, loan_id: int, start_date: datetime.date):
+    """Handles getting loan schedule for given loan with actual/365 interest
+
+    @:param user_id: User ID of loan (currently not checked; only for URL)
+    @:param loan_id: Loan ID of loan
+    @:param start_date: Date the loan starts (YYYY-MM-DD)
+    @:returns: JSON array of monthly balance schedules with payment dates
+    """
+    loan = await async_loan_repository.read(loan_id)
+    if loan is None:
+        raise RequestException('missing loan {}'.format(loan_id))
+
+    schedule = await schedule_executor.run(
+        loan.term_months,
+        DayCountAmortizationScheduleService.generate_amortization_schedule,
+        loan.amount,
+        loan.term_months,
+        loan.interest_rate,
+        start_date)
+    return [
+        {
+            'month': month,
+            'payment_date': month_balances['date'].isoformat(),
+            'remaining_balance': str(month_balances['balance']),
+            'monthly_payment': str(month_balances['payment'])
+        }
         for month, month_balances in enumerate(schedule)
     ]
 
 
+def schedule_cache_headers(loan, representation: str):
+    """Gets the caching headers of a response from a loan's schedule
+
+    @:param loan: Loan of schedule
+    @:param representation: What the response contains and its media type
+    (see ScheduleETag.for_loan)
+    @:returns: Dictionary of ETag and Cache-Control headers
+    """
+    return {
+        'ETag': ScheduleETag.for_loan(loan.amount, loan.term_months, loan.interest_rate, representation),
+        'Cache-Control': SCHEDULE_CACHE_CONTROL
+    }
+
+
+async def stream_schedule_lines(schedule, first_month: int = 0):
+    """Generates newline-delimited JSON lines of a loan schedule
+
+    @:param schedule: Iterable of monthly balance schedules
+    @:param first_month: Month number of the first schedule
+    @:returns: Async iterator of one encoded line per month
+    """
+    for month, month_balances in enumerate(schedule, first_month):
+        yield json.dumps({
+            'month': month,
+            'remaining_balance': str(month_balances['balance']),
+            'monthly_payment': str(month_balances['payment'])
+        }) + '\n'
+
+
 @app.get('/user/{user_id}/loan/{loan_id}/month/{month}')
-async def get_loan_month(user_id: int, loan_id: int, month: int):
+async def get_loan_month(user_id: int, loan_id: int, month: int, request: Request, response: Response):
     """Handles getting loan balance and payment information for given month
 
+    Responses have a strong ETag and caching headers like schedules.
+
     @:param user_id: User ID of loan (currently not checked; only for URL)
     @:param loan_id: Loan ID of loan
     @:param month: Month number to retrieve balances for (0 is beginning of loan)
+    @:param request: Request (to check If-None-Match)
+    @:param response: Response (to set the caching headers)
     @:returns: JSON summary of loan balances at given month
     """
-    loan = loan_repository.read(loan_id)
+    loan = await async_loan_repository.read(loan_id)
     if loan is None:
         raise RequestException('missing loan {}'.format(loan_id))
 
     if month < 0 or month > loan.term_months:
         raise RequestException('invalid month {}'.format(month))
 
-    schedule = CreateAmortizationScheduleService.generate_amortization_schedule(
+    headers = schedule_cache_headers(loan, 'month {}'.format(month))
+    if ScheduleETag.matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    # Reuse a cached schedule when available; otherwise computing just the
+    # requested month is cheaper than generating and caching the schedule.
+    schedule = schedule_cache.peek_schedule(
         amount=loan.amount,
         term_months=loan.term_months,
         interest_rate=loan.interest_rate)
+    if schedule is not None:
+        schedule_month = schedule[month]
+    else:
+        schedule_month = CreateAmortizationScheduleService.generate_amortization_month(
+            amount=loan.amount,
+            term_months=loan.term_months,
+            interest_rate=loan.interest_rate,
+            month=month)
 
     return {
-        'principal_balance': str(schedule[month]['balance']),
-        'principal_paid': str(schedule[month]['total_principal_paid']),
-        'interest_paid': str(schedule[month]['total_interest_paid'])
+        'principal_balance': str(schedule_month['balance']),
+        'principal_paid': str(schedule_month['total_principal_paid']),
+        'interest_paid': str(schedule_month['total_interest_paid'])
     }
 
 
+@app.post('/user/{user_id}/loan/{loan_id}/schedule/what_if')
+async def get_loan_what_if_schedule(user_id: int, loan_id: int, what_if: WhatIfRequest):
+    """Handles getting loan schedule for given loan with extra payments
+
+    Only the months from the last checkpoint before the first extra payment
+    are recomputed; the months before it are reused from the loan's schedule
+    without extra payments.
+
+    @:param user_id: User ID of loan (currently not checked; only for URL)
+    @:param loan_id: Loan ID of loan
+    @:param what_if: Extra payments to make
+    @:returns: JSON array of monthly balance schedules, ending early if the
+    extra payments pay off the loan
+    """
+    loan = await async_loan_repository.read(loan_id)
+    if loan is None:
+        raise RequestException('missing loan {}'.format(loan_id))
+
+    extra_payments = {}
+    for month, extra_payment in what_if.extra_payments.items():
+        try:
+            extra_payments[month] = Decimal(extra_payment)
+        except InvalidOperation as e:
+            raise RequestException('invalid extra payment {} in month {}'.format(extra_payment, month))
+
+    base_schedule = await read_base_prepayment_schedule(loan)
+    schedule = await schedule_executor.run(loan.term_months, base_schedule.with_extra_payments, extra_payments)
+    return [
+        {
+            'month': month,
+            'remaining_balance': str(month_balances['balance']),
+            'monthly_payment': str(month_balances['payment']),
+            'extra_payment': str(month_balances['extra_payment'])
+        }
+        for month, month_balances in enumerate(schedule.months)
+    ]
+
+
 @app.post('/user/{user_id}/loan/{loan_id}/authorized_users')
 async def add_loan_authorized_user(user_id: int, loan_id: int, authorized_user: AuthorizedUserRequest):
     """Handles adding authorized (shared) user to a given loan
@@ -159,15 +645,162 @@ async def add_loan_authorized_user(user_id: int, loan_id: int, authorized_user:
     @:param loan_id: Loan ID to add authorized user to
     @:param authorized_user: Authorized user request to add
     """
-    AddAuthorizedUserService.add_authorized_user(
-        authorized_user_repository,
-        user_repository,
-        loan_repository,
+    await AsyncAddAuthorizedUserService.add_authorized_user(
+        async_authorized_user_repository,
+        async_user_repository,
+        async_loan_repository,
         authorized_user_id=authorized_user.user_id,
         loan_id=loan_id)
+    await commit_operations()
     return {}
 
 
+@app.delete('/user/{user_id}/loan/{loan_id}/authorized_users/{authorized_user_id}')
+async def revoke_loan_authorized_user(user_id: int, loan_id: int, authorized_user_id: int):
+    """Handles revoking authorized (shared) user from a given loan
+
+    @:param user_id: User ID of loan (currently not checked; only for URL)
+    @:param loan_id: Loan ID to revoke authorized user from
+    @:param authorized_user_id: User ID of authorized user to revoke
+    """
+    await AsyncRevokeAuthorizedUserService.revoke_authorized_user(
+        async_authorized_user_repository,
+        async_loan_repository,
+        authorized_user_id=authorized_user_id,
+        loan_id=loan_id)
+    await commit_operations()
+    return {}
+
+
+@app.post('/users/bulk')
+async def create_users(request: Request):
+    """Handles creating many users
+
+    @:param request: Request with a JSON array or NDJSON lines of user
+    creation requests
+    @:returns: Result for each user, either its user_id or an error
+    """
+    return await create_bulk_rows(
+        request,
+        lambda rows: AsyncCreateUserService.create_users(async_user_repository, rows),
+        'user_id')
+
+
+@app.post('/loans/bulk')
+async def create_loans(request: Request):
+    """Handles creating many loans
+
+    @:param request: Request with a JSON array or NDJSON lines of loan
+    creation requests, each including the user_id of the loan
+    @:returns: Result for each loan, either its loan_id or an error
+    """
+    return await create_bulk_rows(
+        request,
+        lambda rows: AsyncCreateLoanService.create_loans(async_loan_repository, async_user_repository, rows),
+        'loan_id')
+
+
+@app.post('/authorized_users/bulk')
+async def add_authorized_users(request: Request):
+    """Handles adding many authorized (shared) users to loans
+
+    @:param request: Request with a JSON array or NDJSON lines of objects with
+    loan_id and user_id
+    @:returns: Result for each authorized user, either its
+    authorized_user_id or an error
+    """
+    return await create_bulk_rows(
+        request,
+        lambda rows: AsyncAddAuthorizedUserService.add_authorized_users(
+            async_authorized_user_repository, async_user_repository, async_loan_repository, rows),
+        'authorized_user_id')
+
+
+async def create_bulk_rows(request: Request, create_rows, id_field: str):
+    """Creates the rows of a bulk request a chunk at a time
+
+    Invalid rows don't stop the other rows from being created; each gets an
+    error in its place in the results instead. Results are returned as NDJSON
+    lines if requested with an application/x-ndjson Accept header.
+
+    @:param request: Bulk request
+    @:param create_rows: Coroutine function creating a list of rows and
+    returning the new IDs and errors
+    @:param id_field: Name of the ID field in results
+    @:returns: Response with a result for each row
+    """
+    results = []
+    async for rows in read_bulk_rows(request):
+        ids, errors = await create_rows(rows)
+        results += [
+            {id_field: new_id} if new_id is not None else {'error': errors[index]}
+            for index, new_id in enumerate(ids)
+        ]
+    await commit_operations()
+
+    if 'application/x-ndjson' in request.headers.get('accept', ''):
+        return Response(''.join(json.dumps(result) + '\n' for result in results), media_type='application/x-ndjson')
+    return results
+
+
+async def read_bulk_rows(request: Request):
+    """Reads the rows of a bulk request in chunks
+
+    An application/x-ndjson body is parsed line by line as it arrives, so
+    the whole body is never held in memory; any other body must be a JSON
+    array. Lines that aren't valid JSON are given as None rows.
+
+    @:param request: Bulk request
+    @:returns: Async iterator of lists of up to BULK_CHUNK_ROWS rows
+    @:raises: RequestException if a JSON body isn't an array
+    """
+    if 'application/x-ndjson' in request.headers.get('content-type', ''):
+        rows = []
+        remainder = b''
+        async for data in request.stream():
+            lines = (remainder + data).split(b'\n')
+            remainder = lines.pop()
+            rows += [parse_bulk_line(line) for line in lines if line.strip()]
+            if len(rows) >= BULK_CHUNK_ROWS:
+                yield rows
+                rows = []
+        if remainder.strip():
+            rows.append(parse_bulk_line(remainder))
+        if rows:
+            yield rows
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise RequestException('request body must be a JSON array')
+    if not isinstance(rows, list):
+        raise RequestException('request body must be a JSON array')
+    for start in range(0, len(rows), BULK_CHUNK_ROWS):
+        yield rows[start:start + BULK_CHUNK_ROWS]
+
+
+def parse_bulk_line(line: bytes):
+    """Parses one NDJSON line of a bulk request
+
+    @:param line: Line of JSON
+    @:returns: Parsed row, or None if the line isn't valid JSON
+    """
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+@app.get('/metrics')
+async def get_metrics():
+    """Handles getting metrics
+
+    @:returns: Metrics in Prometheus text format
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type='text/plain; version=0.0.4')
+
+
 @app.exception_handler(RequestException)
 async def request_exception_handler(request: Request, e: RequestException):
     """Handles request exceptions
@@ -176,6 +809,7 @@ async def request_exception_handler(request: Request, e: RequestException):
     @:param e: Exception thrown
     @:returns: Error response
     """
+    errors_total.inc('request_exception', route_path(request.scope))
     return PlainTextResponse('Invalid request: {}'.format(e), status_code=422)
 
 
@@ -187,4 +821,5 @@ async def validation_exception_handler(request: Request, e: RequestValidationErr
     @:param e: Exception thrown
     @:returns: Error response
     """
+    errors_total.inc('validation', route_path(request.scope))
     return PlainTextResponse('Invalid request: {}'.format(e), status_code=400)
@@ -0,0 +1,260 @@
+"""Prometheus-style metrics"""
+import bisect
+import functools
+import inspect
+import threading
+import time
+
+
+# Latency buckets in seconds, from 50us (repository reads) to 10s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """Counter metric with labels"""
+    def __init__(self, name: str, description: str, label_names=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        """Increase the counter of a set of label values
+
+        @:param labels: Label values in the order of label_names
+        @:param amount: Amount to increase by
+        """
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        with self.lock:
+            values = list(self.values.items())
+        lines = ['# HELP {} {}'.format(self.name, self.description), '# TYPE {} counter'.format(self.name)]
+        lines += ['{}{} {}'.format(self.name, format_labels(self.label_names, labels), format_value(value))
+                  for labels, value in values]
+        return lines
+
+
+class Histogram:
+    """Histogram metric with labels and fixed buckets"""
+    def __init__(self, name: str, description: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Label values to [count per bucket (last is +Inf), sum]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        """Record an observation for a set of label values
+
+        @:param value: Observed value
+        @:param labels: Label values in the order of label_names
+        """
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    def render(self):
+        with self.lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self.series.items()]
+        lines = ['# HELP {} {}'.format(self.name, self.description), '# TYPE {} histogram'.format(self.name)]
+        label_names = self.label_names + ('le',)
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    self.name, format_labels(label_names, labels + (format_value(bound),)), cumulative))
+            lines.append('{}_sum{} {}'.format(self.name, format_labels(self.label_names, labels), repr(total)))
+            lines.append('{}_count{} {}'.format(self.name, format_labels(self.label_names, labels), cumulative))
+        return lines
+
+
+class GaugeFunction:
+    """Gauge (or counter) metric read from a function when rendered"""
+    def __init__(self, name: str, description: str, function, label_names=(), metric_type: str = 'gauge'):
+        """Create a metric read from a function
+
+        @:param function: Function returning a dictionary of label value
+        tuples to values
+        @:param metric_type: Prometheus type ('gauge', or 'counter' for values
+        only ever increasing)
+        """
+        self.name = name
+        self.description = description
+        self.function = function
+        self.label_names = tuple(label_names)
+        self.metric_type = metric_type
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self.name, self.description),
+                 '# TYPE {} {}'.format(self.name, self.metric_type)]
+        lines += ['{}{} {}'.format(self.name, format_labels(self.label_names, labels), format_value(value))
+                  for labels, value in self.function().items()]
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format"""
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name: str, description: str, label_names=()):
+        return self.register(Counter(name, description, label_names))
+
+    def histogram(self, name: str, description: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, description, label_names, buckets))
+
+    def gauge_function(self, name: str, description: str, function, label_names=(), metric_type: str = 'gauge'):
+        return self.register(GaugeFunction(name, description, function, label_names, metric_type))
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render every metric
+
+        @:returns: Prometheus text exposition format
+        """
+        return ''.join(line + '\n' for metric in self.metrics for line in metric.render())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency and status of every HTTP request
+
+    Requests are labelled with the route's path template (such as
+    /user/{user_id}/loans) rather than the requested path so the number of
+    series stays bounded.
+    """
+    def __init__(self, app, request_duration: Histogram, requests: Counter):
+        """Create the middleware
+
+        @:param app: ASGI application to wrap
+        @:param request_duration: Histogram labelled by method and path
+        @:param requests: Counter labelled by method, path and status
+        """
+        self.app = app
+        self.request_duration = request_duration
+        self.requests = requests
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            path = route_path(scope)
+            self.request_duration.observe(time.perf_counter() - start, scope['method'], path)
+            self.requests.inc(scope['method'], path, str(status_code))
+
+
+# Endpoint function to path template of its route
+_route_paths = {}
+
+
+def route_path(scope):
+    """Path template of the route that handled a request
+
+    @:param scope: ASGI scope of request (after routing)
+    @:returns: Path template, or 'unmatched' if no route matched
+    """
+    endpoint = scope.get('endpoint')
+    if endpoint is None:
+        return 'unmatched'
+    path = _route_paths.get(endpoint)
+    if path is None:
+        for route in scope['app'].routes:
+            if getattr(route, 'endpoint', None) is endpoint:
+                path = _route_paths[endpoint] = route.path
+                break
+        else:
+            path = 'unmatched'
+    return path
+
+
+def instrument(target, component: str, call_duration: Histogram):
+    """Time every public method of a service class or repository object
+
+    Methods are wrapped to record their duration, labelled by component and
+    method name. Coroutine methods are timed until they complete. Generator
+    methods are left alone since their work happens as they are iterated.
+
+    Classes aren't modified; a subclass with the timed static methods is
+    returned instead, so only callers using it are timed. Objects have the
+    timed methods set on the object itself.
+
+    @:param target: Class with static methods, or object
+    @:param component: Component label value
+    @:param call_duration: Histogram labelled by component and method
+    @:returns: Timed subclass of a class, or the object
+    """
+    timed_methods = {}
+    for name, method in inspect.getmembers(target, callable):
+        if name.startswith('_') or inspect.isclass(method) or inspect.isgeneratorfunction(method):
+            continue
+        timed_methods[name] = _timed(method, component, name, call_duration)
+    if inspect.isclass(target):
+        return type(target.__name__, (target,), {
+            name: staticmethod(wrapper) for name, wrapper in timed_methods.items()
+        })
+    for name, wrapper in timed_methods.items():
+        setattr(target, name, wrapper)
+    return target
+
+
+def _timed(function, component: str, name: str, call_duration: Histogram):
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                call_duration.observe(time.perf_counter() - start, component, name)
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            call_duration.observe(time.perf_counter() - start, component, name)
+    return wrapper
+
+
+def format_labels(label_names, labels):
+    """Format label names and values as {name="value",...}"""
+    if not label_names:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(label_names, labels)) + '}'
+
+
+def format_value(value):
+    """Format a sample value"""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
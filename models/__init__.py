@@ -1,4 +1,5 @@
 """Models"""
+from .amortization_schedule import AmortizationSchedule, AmortizationScheduleMonth
 from .authorized_user import AuthorizedUser
 from .loan import Loan
 from .user import User
@@ -0,0 +1,146 @@
+"""Amortization schedule model"""
+import decimal
+import sys
+from array import array
+from collections.abc import Mapping
+from decimal import Decimal
+
+
+SCHEDULE_FIELDS = (
+    'balance',
+    'payment',
+    'principal_paid',
+    'interest_paid',
+    'total_paid',
+    'total_principal_paid',
+    'total_interest_paid'
+)
+# Optional entry of schedule columns listing the (field, month) of values
+# which are negative zero ("-0.00"), which a column of cents can't hold
+NEGATIVE_ZEROS = 'negative_zeros'
+NEGATIVE_ZERO = Decimal('-0.00')
+NO_NEGATIVE_ZEROS = frozenset()
+
+
+class AmortizationSchedule:
+    """Amortization schedule model
+
+    Stores each schedule field as a column of 64-bit integer cents rather than
+    a dictionary of Decimals per month. Months are read-only mappings with the
+    same field names as the months generated by
+    CreateAmortizationScheduleService.
+
+    Values which are negative zero (a negative amount rounded to "-0.00" by
+    the Decimal engine) are kept aside so months read the same as generated.
+    """
+    __slots__ = ('amount', '_columns', 'negative_zeros')
+
+    def __init__(self, amount: Decimal, columns: dict):
+        """Create a schedule from columns of cents
+
+        @:param amount: Amount of loan (returned as the month 0 balance so it
+        keeps its original representation)
+        @:param columns: Dictionary of field name to sequence of cents, and
+        optionally NEGATIVE_ZEROS to a sequence of (field, month) of cents
+        which are negative zero
+        """
+        self.amount = amount
+        self._columns = tuple(array('q', columns[field]) for field in SCHEDULE_FIELDS)
+        self.negative_zeros = frozenset(columns.get(NEGATIVE_ZEROS, NO_NEGATIVE_ZEROS)) or NO_NEGATIVE_ZEROS
+        if any(len(column) != len(self._columns[0]) for column in self._columns):
+            raise Exception('schedule columns must be the same length')
+
+    @staticmethod
+    def from_months(months):
+        """Create a schedule from generated month schedules
+
+        @:param months: Iterable of month schedule dictionaries
+        @:returns: Amortization schedule
+        """
+        columns = {field: array('q') for field in SCHEDULE_FIELDS}
+        negative_zeros = []
+        amount = None
+        for index, month in enumerate(months):
+            if amount is None:
+                amount = month['balance']
+            for field in SCHEDULE_FIELDS:
+                value = month[field]
+                # Only the month 0 balance can have more than two decimal places
+                cents = AmortizationSchedule._to_cents(value) if not index else int(value.scaleb(2))
+                if not cents and value.is_signed():
+                    negative_zeros.append((field, index))
+                columns[field].append(cents)
+        columns[NEGATIVE_ZEROS] = negative_zeros
+        return AmortizationSchedule(amount, columns)
+
+    def column(self, field: str):
+        """Get a read-only view of a column of cents
+
+        @:param field: Schedule field name
+        @:returns: Read-only memoryview of 64-bit integer cents
+        """
+        return memoryview(self._columns[SCHEDULE_FIELDS.index(field)]).toreadonly()
+
+    def to_dicts(self):
+        """Convert to a list of month schedule dictionaries
+
+        @:returns: List of month dictionaries of Decimals
+        """
+        return [dict(month) for month in self]
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the schedule in bytes"""
+        return (sys.getsizeof(self._columns)
+                + sum(sys.getsizeof(column) for column in self._columns)
+                + (sys.getsizeof(self.negative_zeros) if self.negative_zeros else 0))
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def __getitem__(self, month: int):
+        if isinstance(month, slice):
+            return [self[index] for index in range(*month.indices(len(self)))]
+        if month < 0:
+            month += len(self)
+        if not 0 <= month < len(self):
+            raise IndexError('month out of range')
+        return AmortizationScheduleMonth(self, month)
+
+    def __iter__(self):
+        for month in range(len(self)):
+            yield AmortizationScheduleMonth(self, month)
+
+    @staticmethod
+    def _to_cents(value: Decimal):
+        return int(value.scaleb(2).to_integral_value(rounding=decimal.ROUND_HALF_UP))
+
+
+class AmortizationScheduleMonth(Mapping):
+    """Read-only view of a single month of an amortization schedule"""
+    __slots__ = ('_schedule', 'month')
+
+    def __init__(self, schedule: AmortizationSchedule, month: int):
+        self._schedule = schedule
+        self.month = month
+
+    def __getitem__(self, field: str):
+        if field == 'balance' and self.month == 0:
+            return self._schedule.amount
+        try:
+            column = self._schedule._columns[SCHEDULE_FIELDS.index(field)]
+        except ValueError:
+            raise KeyError(field)
+        cents = column[self.month]
+        if not cents and (field, self.month) in self._schedule.negative_zeros:
+            return NEGATIVE_ZERO
+        return Decimal(cents).scaleb(-2)
+
+    def __iter__(self):
+        return iter(SCHEDULE_FIELDS)
+
+    def __len__(self):
+        return len(SCHEDULE_FIELDS)
+
+    def __repr__(self):
+        return 'AmortizationScheduleMonth({}, {})'.format(self.month, dict(self))
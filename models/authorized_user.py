@@ -1,9 +1,10 @@
-"""Authorized user model"""
-from pydantic import BaseModel
+"""Authorized user record"""
+from dataclasses import dataclass
 
 
-class AuthorizedUser(BaseModel):
-    """Authorized user model"""
+@dataclass(slots=True)
+class AuthorizedUser:
+    """Authorized user record"""
     authorized_user_id: int
     loan_id: int
     user_id: int
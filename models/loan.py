@@ -1,10 +1,11 @@
-"""Loan model"""
-from pydantic import BaseModel
+"""Loan record"""
+from dataclasses import dataclass
 from decimal import Decimal
 
 
-class Loan(BaseModel):
-    """Loan model"""
+@dataclass(slots=True)
+class Loan:
+    """Loan record"""
     loan_id: int
     user_id: int
     amount: Decimal
@@ -0,0 +1 @@
+"""Model tests"""
@@ -0,0 +1,80 @@
+"""Tests for AmortizationSchedule"""
+import unittest
+from decimal import Decimal
+from models import AmortizationSchedule
+from services import CreateAmortizationScheduleService
+
+
+class TestAmortizationSchedule(unittest.TestCase):
+    def test_from_months(self):
+        months = CreateAmortizationScheduleService.generate_amortization_schedule(
+            Decimal('1000.20'), 12, Decimal('0.1'))
+        schedule = AmortizationSchedule.from_months(months)
+
+        self.assertEqual(13, len(schedule))
+        self.assertEqual(months, schedule.to_dicts())
+        self.assertEqual(months, [dict(month) for month in schedule])
+        self.assertEqual(months[6]['total_interest_paid'], schedule[6]['total_interest_paid'])
+        self.assertEqual(months[-1], schedule[-1])
+        self.assertEqual(months[2:4], [dict(month) for month in schedule[2:4]])
+
+    def test_month_0_balance_keeps_amount(self):
+        schedule = AmortizationSchedule.from_months(
+            CreateAmortizationScheduleService.iterate_amortization_schedule(Decimal('1000'), 12, Decimal('0.1')))
+        self.assertEqual('1000', str(schedule[0]['balance']))
+        self.assertEqual(100000, schedule.column('balance')[0])
+
+    def test_column(self):
+        schedule = AmortizationSchedule(Decimal('1.00'), {
+            'balance': [100, 50, 0],
+            'payment': [0, 51, 51],
+            'principal_paid': [0, 50, 50],
+            'interest_paid': [0, 1, 1],
+            'total_paid': [0, 51, 102],
+            'total_principal_paid': [0, 50, 100],
+            'total_interest_paid': [0, 1, 2]
+        })
+        self.assertEqual([0, 51, 102], schedule.column('total_paid').tolist())
+        self.assertEqual(Decimal('0.51'), schedule[1]['payment'])
+        with self.assertRaises(TypeError):
+            schedule.column('balance')[0] = 0
+
+    def test_read_only(self):
+        schedule = AmortizationSchedule.from_months(
+            CreateAmortizationScheduleService.iterate_amortization_schedule(Decimal('1000.00'), 12, Decimal('0.1')))
+        with self.assertRaises(TypeError):
+            schedule[1]['balance'] = Decimal('0.00')
+        with self.assertRaises(TypeError):
+            schedule[1] = {}
+        with self.assertRaises(IndexError):
+            schedule[13]
+        with self.assertRaises(KeyError):
+            schedule[1]['missing']
+
+    def test_mismatched_columns(self):
+        with self.assertRaises(Exception):
+            AmortizationSchedule(Decimal('1.00'), {
+                'balance': [100, 50],
+                'payment': [0],
+                'principal_paid': [0],
+                'interest_paid': [0],
+                'total_paid': [0],
+                'total_principal_paid': [0],
+                'total_interest_paid': [0]
+            })
+
+    def test_negative_zero(self):
+        # Principal paid rounds to "-0.00" while the payment is still zero
+        amount, term_months, interest_rate = Decimal('0.01'), 3, Decimal('0.06')
+        months = CreateAmortizationScheduleService.generate_amortization_schedule(amount, term_months, interest_rate)
+        for schedule in [
+                AmortizationSchedule.from_months(months),
+                AmortizationSchedule(amount, CreateAmortizationScheduleService.generate_amortization_schedule_cents(
+                    amount, term_months, interest_rate))]:
+            for month in range(term_months + 1):
+                generated_month = CreateAmortizationScheduleService.generate_amortization_month(
+                    amount, term_months, interest_rate, month)
+                self.assertEqual(
+                    {field: str(value) for field, value in generated_month.items()},
+                    {field: str(value) for field, value in schedule[month].items()})
+        self.assertEqual('-0.00', str(schedule[1]['principal_paid']))
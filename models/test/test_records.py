@@ -0,0 +1,26 @@
+"""Tests for user, loan and authorized user records"""
+import dataclasses
+import unittest
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+
+
+class TestRecords(unittest.TestCase):
+    def test_slots(self):
+        for record in [
+                User(user_id=1, username='alice'),
+                Loan(loan_id=1, user_id=1, amount=Decimal('1.00'), term_months=1, interest_rate=Decimal('0.1'),
+                     authorized_user_ids=[]),
+                AuthorizedUser(authorized_user_id=1, loan_id=1, user_id=2)]:
+            with self.subTest(record=record):
+                self.assertFalse(hasattr(record, '__dict__'))
+                with self.assertRaises(AttributeError):
+                    record.unknown_field = 1
+
+    def test_replace(self):
+        loan = Loan(loan_id=1, user_id=1, amount=Decimal('1.00'), term_months=1, interest_rate=Decimal('0.1'),
+                    authorized_user_ids=[])
+        copy = dataclasses.replace(loan, authorized_user_ids=[2])
+        self.assertEqual([], loan.authorized_user_ids)
+        self.assertEqual([2], copy.authorized_user_ids)
+        self.assertEqual(loan, dataclasses.replace(copy, authorized_user_ids=[]))
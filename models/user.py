@@ -1,8 +1,9 @@
-"""User model"""
-from pydantic import BaseModel
+"""User record"""
+from dataclasses import dataclass
 
 
-class User(BaseModel):
-    """User model"""
+@dataclass(slots=True)
+class User:
+    """User record"""
     user_id: int
     username: str
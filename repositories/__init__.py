@@ -1,4 +1,19 @@
 """Repositories"""
+from .aiosqlite_authorized_user_repository import AiosqliteAuthorizedUserRepository
+from .aiosqlite_connection_pool import AiosqliteConnectionPool
+from .aiosqlite_loan_repository import AiosqliteLoanRepository
+from .aiosqlite_user_repository import AiosqliteUserRepository
+from .async_repository import AsyncAuthorizedUserRepository, AsyncLoanRepository, AsyncUserRepository
+from .async_repository_adapter import AsyncRepositoryAdapter
 from .authorized_user_repository import AuthorizedUserRepository
+from .columnar_loan_repository import ColumnarLoanRepository
 from .loan_repository import LoanRepository
+from .operation_log import OperationLog
+from .repository_persistence import RepositoryPersistence
+from .repository_snapshot import RepositorySnapshot
+from .sqlite_authorized_user_repository import SqliteAuthorizedUserRepository
+from .sqlite_connection_pool import SqliteConnectionPool
+from .sqlite_loan_repository import SqliteLoanRepository
+from .sqlite_user_repository import SqliteUserRepository
+from .user_loans_view import UserLoansView
 from .user_repository import UserRepository
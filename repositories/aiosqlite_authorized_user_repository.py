@@ -0,0 +1,175 @@
+"""aiosqlite-based authorized user repository"""
+import json
+from models import AuthorizedUser
+from .aiosqlite_connection_pool import AiosqliteConnectionPool
+
+
+class AiosqliteAuthorizedUserRepository:
+    """aiosqlite-based authorized user repository
+
+    The same as SqliteAuthorizedUserRepository, but read and written with
+    await.
+    """
+    def __init__(self, pool: AiosqliteConnectionPool):
+        """Create an authorized user repository
+
+        @:param pool: Connection pool of database to use
+        """
+        self.pool = pool
+
+    async def create(self, authorized_user: AuthorizedUser):
+        """Create a new authorized
+
+        Autoincrement ID will be assigned to the authorized user object, or
+        the ID of the existing authorized user if the user is already
+        authorized on the loan.
+
+        @:param authorized_user: Authorized user object to create
+        """
+        await self.create_many([authorized_user])
+
+    async def create_many(self, authorized_users):
+        """Create new authorized users
+
+        A contiguous block of autoincrement IDs will be assigned to the new
+        authorized user objects in order. Users already authorized on the
+        loan (including earlier in the list) aren't created again; they are
+        assigned the ID of the existing authorized user.
+
+        @:param authorized_users: List of authorized user objects to create
+        """
+        async with self.pool.transaction() as connection:
+            async with connection.execute(
+                    'SELECT COALESCE(MAX(authorized_user_id), 0) + 1 FROM authorized_users') as cursor:
+                next_id = (await cursor.fetchone())[0]
+            authorized_user_ids = {}
+            rows = []
+            for authorized_user in authorized_users:
+                key = (authorized_user.loan_id, authorized_user.user_id)
+                authorized_user_id = authorized_user_ids.get(key)
+                if authorized_user_id is None:
+                    async with connection.execute(
+                            'SELECT MIN(authorized_user_id) FROM authorized_users WHERE user_id = ? AND loan_id = ?',
+                            (authorized_user.user_id, authorized_user.loan_id)) as cursor:
+                        authorized_user_id = (await cursor.fetchone())[0]
+                    if authorized_user_id is None:
+                        authorized_user_id = next_id
+                        next_id += 1
+                        rows.append((authorized_user_id, authorized_user.loan_id, authorized_user.user_id))
+                    authorized_user_ids[key] = authorized_user_id
+                authorized_user.authorized_user_id = authorized_user_id
+            await connection.executemany(
+                'INSERT INTO authorized_users (authorized_user_id, loan_id, user_id) VALUES (?, ?, ?)', rows)
+
+    async def read(self, authorized_user_id: int):
+        """Read authorized user from the repository.
+        @:param authorized_user_id: ID of authorized user to read
+        @:returns: Authorized user object
+        """
+        async with self.pool.connection() as connection:
+            async with connection.execute(
+                    'SELECT loan_id, user_id FROM authorized_users WHERE authorized_user_id = ?',
+                    (authorized_user_id,)) as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            return None
+        return AuthorizedUser(authorized_user_id=authorized_user_id, loan_id=row[0], user_id=row[1])
+
+    async def read_by_loan_id_and_user_id(self, loan_id: int, user_id: int):
+        """Read the authorized user of a user on a loan.
+        @:param loan_id: ID of loan
+        @:param user_id: ID of user
+        @:returns: Authorized user object, or None if the user isn't
+        authorized on the loan
+        """
+        async with self.pool.connection() as connection:
+            async with connection.execute(
+                    'SELECT MIN(authorized_user_id) FROM authorized_users WHERE user_id = ? AND loan_id = ?',
+                    (user_id, loan_id)) as cursor:
+                authorized_user_id = (await cursor.fetchone())[0]
+        if authorized_user_id is None:
+            return None
+        return AuthorizedUser(authorized_user_id=authorized_user_id, loan_id=loan_id, user_id=user_id)
+
+    async def read_authorized_user_ids(self, loan_id: int):
+        """Read authorized user IDs from the repository for a given loan.
+        @:param loan: ID of loan to read authorized user IDs from
+        @:returns: Array of authorized user IDs
+        """
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT user_id FROM authorized_users WHERE loan_id = ? ORDER BY authorized_user_id',
+                (loan_id,))
+        return [row[0] for row in rows]
+
+    async def read_authorized_user_ids_many(self, loan_ids):
+        """Read authorized user IDs from the repository for many loans at once.
+
+        The loan IDs are passed as one JSON array parameter so the same
+        prepared statement is used whatever the number of loans.
+
+        @:param loan_ids: Iterable of loan IDs to read authorized user IDs from
+        @:returns: Dictionary of loan ID to array of authorized user IDs
+        """
+        authorized_user_ids = {loan_id: [] for loan_id in loan_ids}
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT loan_id, user_id FROM authorized_users '
+                'WHERE loan_id IN (SELECT value FROM json_each(?)) ORDER BY authorized_user_id',
+                (json.dumps(list(authorized_user_ids)),))
+        for loan_id, user_id in rows:
+            authorized_user_ids[loan_id].append(user_id)
+        return authorized_user_ids
+
+    async def read_loan_ids_by_user_id(self, user_id: int):
+        """Read loan IDs from the repository for a authorized user ID.
+        @:param loan: ID of user to read authorized user IDs from
+        @:returns: Array of loan IDs
+        """
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT loan_id FROM authorized_users WHERE user_id = ? ORDER BY authorized_user_id',
+                (user_id,))
+        return [row[0] for row in rows]
+
+    async def read_loan_ids_after(self, user_id: int, after_loan_id: int, limit: int):
+        """Read loan IDs for a authorized user ID in ascending order, starting after a loan ID.
+
+        Each loan ID is only read once even if the user was authorized on it
+        more than once.
+
+        @:param user_id: ID of user to read loan IDs from
+        @:param after_loan_id: Only loan IDs greater than this are read (0 for all)
+        @:param limit: Maximum number of loan IDs to read
+        @:returns: List of loan IDs
+        """
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT DISTINCT loan_id FROM authorized_users WHERE user_id = ? AND loan_id > ? '
+                'ORDER BY loan_id LIMIT ?',
+                (user_id, after_loan_id, limit))
+        return [row[0] for row in rows]
+
+    async def delete(self, authorized_user_id: int):
+        """Delete an authorized user from the repository.
+
+        Any other rows of the same user on the same loan (created before
+        duplicates were merged) are deleted with it.
+
+        @:param authorized_user_id: ID of authorized user to delete
+        @:returns: True if the authorized user was deleted; False if it
+        doesn't exist
+        """
+        async with self.pool.transaction() as connection:
+            async with connection.execute(
+                    'DELETE FROM authorized_users WHERE (loan_id, user_id) IN '
+                    '(SELECT loan_id, user_id FROM authorized_users WHERE authorized_user_id = ?)',
+                    (authorized_user_id,)) as cursor:
+                return cursor.rowcount > 0
+
+    async def count(self):
+        """Count authorized users in the repository.
+        @:returns: Number of authorized users"""
+        async with self.pool.connection() as connection:
+            async with connection.execute('SELECT COUNT(*) FROM authorized_users') as cursor:
+                return (await cursor.fetchone())[0]
@@ -0,0 +1,92 @@
+"""Pool of aiosqlite connections shared by the aiosqlite repositories"""
+import asyncio
+import contextlib
+import aiosqlite
+from .sqlite_connection_pool import DEFAULT_BUSY_TIMEOUT_SECONDS, DEFAULT_POOL_SIZE, SCHEMA
+
+
+class AiosqliteConnectionPool:
+    """Pool of aiosqlite connections shared by the aiosqlite repositories
+
+    Each aiosqlite connection runs its queries in its own thread, so awaiting
+    a query leaves the event loop free and queries on different connections
+    run at the same time (SQLite releases the GIL while it works). Otherwise
+    connections are set up like SqliteConnectionPool's, with the same schema,
+    so either pool can open the same database.
+
+    Connections are opened by open(), which must be awaited in the event loop
+    that uses the pool.
+    """
+    def __init__(
+            self,
+            path: str,
+            size: int = DEFAULT_POOL_SIZE,
+            busy_timeout_seconds: float = DEFAULT_BUSY_TIMEOUT_SECONDS):
+        """Create a pool (opened by open)
+
+        @:param path: Path of database file
+        @:param size: Number of connections
+        @:param busy_timeout_seconds: Time to wait for another connection or
+        process to release a lock
+        """
+        self.path = path
+        self.size = size
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self.connections = None
+
+    async def open(self):
+        """Open the connections and create the schema if missing"""
+        self.connections = asyncio.Queue()
+        for _ in range(self.size):
+            self.connections.put_nowait(await AiosqliteConnectionPool._connect(self.path, self.busy_timeout_seconds))
+        async with self.connection() as connection:
+            await connection.executescript(SCHEMA)
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        """Borrow a connection, waiting for one if all are in use
+
+        @:returns: Async context manager giving an aiosqlite connection
+        """
+        connection = await self.connections.get()
+        try:
+            yield connection
+        finally:
+            self.connections.put_nowait(connection)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """Borrow a connection inside a write transaction
+
+        The transaction takes the database write lock immediately, so nothing
+        else can write until it is committed (or rolled back on an exception).
+
+        @:returns: Async context manager giving an aiosqlite connection
+        """
+        async with self.connection() as connection:
+            await connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                await connection.execute('ROLLBACK')
+                raise
+            await connection.execute('COMMIT')
+
+    async def close(self):
+        """Close all connections (waiting for borrowed connections)"""
+        for _ in range(self.size):
+            await (await self.connections.get()).close()
+
+    @staticmethod
+    async def _connect(path: str, busy_timeout_seconds: float):
+        connection = await aiosqlite.connect(
+            path,
+            timeout=busy_timeout_seconds,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=64)
+        await connection.execute('PRAGMA journal_mode = WAL')
+        # With WAL, NORMAL only syncs at checkpoints; a power loss can lose
+        # the last commits but never corrupts the database
+        await connection.execute('PRAGMA synchronous = NORMAL')
+        return connection
@@ -0,0 +1,124 @@
+"""aiosqlite-based loan repository"""
+import json
+from models import Loan
+from .aiosqlite_connection_pool import AiosqliteConnectionPool
+from .sqlite_loan_repository import SqliteLoanRepository
+
+
+class AiosqliteLoanRepository:
+    """aiosqlite-based loan repository
+
+    The same as SqliteLoanRepository, but read and written with await.
+    Amounts and interest rates are stored as text so they read back as the
+    same Decimals they were created with.
+    """
+    def __init__(self, pool: AiosqliteConnectionPool):
+        """Create a loan repository
+
+        @:param pool: Connection pool of database to use
+        """
+        self.pool = pool
+
+    async def create(self, loan: Loan):
+        """Create a new loan
+
+        Autoincrement ID will be assigned to the loan object.
+
+        @:param user: Loan object to create
+        """
+        async with self.pool.connection() as connection:
+            async with connection.execute(
+                    'INSERT INTO loans (user_id, amount, term_months, interest_rate) VALUES (?, ?, ?, ?)',
+                    (loan.user_id, str(loan.amount), loan.term_months, str(loan.interest_rate))) as cursor:
+                loan.loan_id = cursor.lastrowid
+
+    async def create_many(self, loans):
+        """Create new loans
+
+        A contiguous block of autoincrement IDs will be assigned to the loan
+        objects in order.
+
+        @:param loans: List of loan objects to create
+        """
+        async with self.pool.transaction() as connection:
+            async with connection.execute('SELECT COALESCE(MAX(loan_id), 0) + 1 FROM loans') as cursor:
+                first_id = (await cursor.fetchone())[0]
+            await connection.executemany(
+                'INSERT INTO loans (loan_id, user_id, amount, term_months, interest_rate) VALUES (?, ?, ?, ?, ?)',
+                [(loan_id, loan.user_id, str(loan.amount), loan.term_months, str(loan.interest_rate))
+                 for loan_id, loan in enumerate(loans, first_id)])
+        for loan_id, loan in enumerate(loans, first_id):
+            loan.loan_id = loan_id
+
+    async def read(self, loan_id: int):
+        """Read loan from the repository.
+        @:param loan_id: ID of loan to read
+        @:returns: Loan object
+        """
+        async with self.pool.connection() as connection:
+            async with connection.execute(
+                    'SELECT loan_id, user_id, amount, term_months, interest_rate FROM loans WHERE loan_id = ?',
+                    (loan_id,)) as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            return None
+        return SqliteLoanRepository._to_loan(row)
+
+    async def read_many(self, loan_ids):
+        """Read many loans from the repository at once.
+
+        The loan IDs are passed as one JSON array parameter so the same
+        prepared statement is used whatever the number of loans.
+
+        @:param loan_ids: Iterable of loan IDs to read
+        @:returns: List of the loans that exist, in the order of the loan IDs
+        """
+        loan_ids = list(loan_ids)
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT loan_id, user_id, amount, term_months, interest_rate FROM loans '
+                'WHERE loan_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(loan_ids),))
+        return SqliteLoanRepository._to_loans_in_order(rows, loan_ids)
+
+    async def exists_many(self, loan_ids):
+        """Check which loans exist in the repository.
+        @:param loan_ids: Iterable of loan IDs to check
+        @:returns: Set of the loan IDs that exist"""
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT loan_id FROM loans WHERE loan_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(loan_ids)),))
+        return {row[0] for row in rows}
+
+    async def read_loans_for_user_id(self, user_id: int):
+        """Read all loans from the repository of a given user ID.
+        @:param user_id: ID of user to read loans from
+        @:returns: New list of loan objects
+        """
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT loan_id, user_id, amount, term_months, interest_rate FROM loans WHERE user_id = ? '
+                'ORDER BY loan_id',
+                (user_id,))
+        return [SqliteLoanRepository._to_loan(row) for row in rows]
+
+    async def read_loan_ids_after(self, user_id: int, after_loan_id: int, limit: int):
+        """Read loan IDs of a given user ID in ascending order, starting after a loan ID.
+        @:param user_id: ID of user to read loan IDs from
+        @:param after_loan_id: Only loan IDs greater than this are read (0 for all)
+        @:param limit: Maximum number of loan IDs to read
+        @:returns: List of loan IDs
+        """
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT loan_id FROM loans WHERE user_id = ? AND loan_id > ? ORDER BY loan_id LIMIT ?',
+                (user_id, after_loan_id, limit))
+        return [row[0] for row in rows]
+
+    async def count(self):
+        """Count loans in the repository.
+        @:returns: Number of loans"""
+        async with self.pool.connection() as connection:
+            async with connection.execute('SELECT COUNT(*) FROM loans') as cursor:
+                return (await cursor.fetchone())[0]
@@ -0,0 +1,82 @@
+"""aiosqlite-based user repository"""
+import json
+from models.user import User
+from .aiosqlite_connection_pool import AiosqliteConnectionPool
+
+
+class AiosqliteUserRepository:
+    """aiosqlite-based user repository
+
+    The same as SqliteUserRepository, but read and written with await.
+    """
+    def __init__(self, pool: AiosqliteConnectionPool):
+        """Create a user repository
+
+        @:param pool: Connection pool of database to use
+        """
+        self.pool = pool
+
+    async def create(self, user: User):
+        """Create a new user
+
+        Autoincrement ID will be assigned to the user object.
+
+        @:param user: User object to create
+        """
+        async with self.pool.connection() as connection:
+            async with connection.execute('INSERT INTO users (username) VALUES (?)', (user.username,)) as cursor:
+                user.user_id = cursor.lastrowid
+
+    async def create_many(self, users):
+        """Create new users
+
+        A contiguous block of autoincrement IDs will be assigned to the user
+        objects in order.
+
+        @:param users: List of user objects to create
+        """
+        async with self.pool.transaction() as connection:
+            async with connection.execute('SELECT COALESCE(MAX(user_id), 0) + 1 FROM users') as cursor:
+                first_id = (await cursor.fetchone())[0]
+            await connection.executemany(
+                'INSERT INTO users (user_id, username) VALUES (?, ?)',
+                [(user_id, user.username) for user_id, user in enumerate(users, first_id)])
+        for user_id, user in enumerate(users, first_id):
+            user.user_id = user_id
+
+    async def read(self, user_id: int):
+        """Read user from the repository.
+        @:param user_id: ID of user to read
+        @:returns: User object
+        """
+        async with self.pool.connection() as connection:
+            async with connection.execute('SELECT username FROM users WHERE user_id = ?', (user_id,)) as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            return None
+        return User(user_id=user_id, username=row[0])
+
+    async def exists(self, user_id: int):
+        """Check if user exists in the repository.
+        @:param user_ud: ID of user to check
+        @:returns: True if user of that ID exists; false otherwise"""
+        async with self.pool.connection() as connection:
+            async with connection.execute('SELECT 1 FROM users WHERE user_id = ?', (user_id,)) as cursor:
+                return await cursor.fetchone() is not None
+
+    async def exists_many(self, user_ids):
+        """Check which users exist in the repository.
+        @:param user_ids: Iterable of user IDs to check
+        @:returns: Set of the user IDs that exist"""
+        async with self.pool.connection() as connection:
+            rows = await connection.execute_fetchall(
+                'SELECT user_id FROM users WHERE user_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(user_ids)),))
+        return {row[0] for row in rows}
+
+    async def count(self):
+        """Count users in the repository.
+        @:returns: Number of users"""
+        async with self.pool.connection() as connection:
+            async with connection.execute('SELECT COUNT(*) FROM users') as cursor:
+                return (await cursor.fetchone())[0]
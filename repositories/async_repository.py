@@ -0,0 +1,93 @@
+"""Protocols of repositories read and written with await"""
+from typing import Protocol
+from models import AuthorizedUser, Loan, User
+
+
+class AsyncUserRepository(Protocol):
+    """User repository read and written with await
+
+    Methods are those of UserRepository as coroutines.
+    """
+    async def create(self, user: User):
+        """Create a new user, assigning its autoincrement ID"""
+
+    async def create_many(self, users):
+        """Create new users, assigning a contiguous block of IDs in order"""
+
+    async def read(self, user_id: int):
+        """Read user (None if it doesn't exist)"""
+
+    async def exists(self, user_id: int):
+        """Check if a user exists"""
+
+    async def exists_many(self, user_ids):
+        """Get the set of the user IDs that exist"""
+
+    async def count(self):
+        """Count users"""
+
+
+class AsyncLoanRepository(Protocol):
+    """Loan repository read and written with await
+
+    Methods are those of LoanRepository as coroutines.
+    """
+    async def create(self, loan: Loan):
+        """Create a new loan, assigning its autoincrement ID"""
+
+    async def create_many(self, loans):
+        """Create new loans, assigning a contiguous block of IDs in order"""
+
+    async def read(self, loan_id: int):
+        """Read loan (None if it doesn't exist)"""
+
+    async def read_many(self, loan_ids):
+        """Read the loans that exist in the order of the loan IDs"""
+
+    async def exists_many(self, loan_ids):
+        """Get the set of the loan IDs that exist"""
+
+    async def read_loans_for_user_id(self, user_id: int):
+        """Read the loans of a user"""
+
+    async def read_loan_ids_after(self, user_id: int, after_loan_id: int, limit: int):
+        """Read loan IDs of a user in ascending order, starting after a loan ID"""
+
+    async def count(self):
+        """Count loans"""
+
+
+class AsyncAuthorizedUserRepository(Protocol):
+    """Authorized user repository read and written with await
+
+    Methods are those of AuthorizedUserRepository as coroutines.
+    """
+    async def create(self, authorized_user: AuthorizedUser):
+        """Create a new authorized user, or assign the ID of the existing one"""
+
+    async def create_many(self, authorized_users):
+        """Create new authorized users, assigning a contiguous block of IDs in order"""
+
+    async def read(self, authorized_user_id: int):
+        """Read authorized user (None if it doesn't exist)"""
+
+    async def read_by_loan_id_and_user_id(self, loan_id: int, user_id: int):
+        """Read the authorized user of a user on a loan (None if not authorized)"""
+
+    async def read_authorized_user_ids(self, loan_id: int):
+        """Read the user IDs authorized on a loan"""
+
+    async def read_authorized_user_ids_many(self, loan_ids):
+        """Read the user IDs authorized on each of many loans"""
+
+    async def read_loan_ids_by_user_id(self, user_id: int):
+        """Read the IDs of loans shared with a user"""
+
+    async def read_loan_ids_after(self, user_id: int, after_loan_id: int, limit: int):
+        """Read IDs of loans shared with a user in ascending order, starting after a loan ID"""
+
+    async def delete(self, authorized_user_id: int):
+        """Delete an authorized user, returning whether it existed"""
+
+    async def count(self):
+        """Count authorized users"""
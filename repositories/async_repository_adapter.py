@@ -0,0 +1,32 @@
+"""Adapter of a repository to the async repository protocols"""
+import functools
+
+
+class AsyncRepositoryAdapter:
+    """Adapter of a repository to the async repository protocols
+
+    Every method of the repository is given as a coroutine function that
+    calls it directly. Only suited to repositories that don't block, like the
+    memory repositories, whose methods return before awaiting would be worth
+    it; the async services can then run on them and the aiosqlite
+    repositories alike.
+    """
+    def __init__(self, repository):
+        """Create an adapter
+
+        @:param repository: Repository to adapt
+        """
+        self.repository = repository
+
+    def __getattr__(self, name: str):
+        method = getattr(self.repository, name)
+        if name.startswith('_') or not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def async_method(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        # Later calls find the coroutine function without __getattr__
+        setattr(self, name, async_method)
+        return async_method
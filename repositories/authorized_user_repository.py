@@ -1,28 +1,88 @@
 """Memory-based authorized user repository"""
+import bisect
 from models import AuthorizedUser
 
 
+# Returned for loans and users without authorized users, so lookups never
+# allocate or insert an empty index entry (never modified)
+EMPTY_INDEX = {}
+EMPTY_LOAN_IDS = []
+
+
 class AuthorizedUserRepository:
-    """Memory-based authorized user repository"""
-    def __init__(self):
+    """Memory-based authorized user repository
+
+    Authorized users are indexed by loan ID and by user ID, each as a
+    dictionary of the other ID to the authorized user (in the order they were
+    added), so checking, adding and removing a user on a loan are O(1). Each
+    user's loan IDs are also kept sorted for reading pages. A user is only
+    authorized once on each loan.
+    """
+    def __init__(self, user_loans_view=None, operation_log=None):
+        """Create an authorized user repository
+
+        @:param user_loans_view: UserLoansView to keep updated (optional)
+        @:param operation_log: OperationLog to append created and deleted
+        authorized users to (optional)
+        """
         self.authorized_users = {}
         self.authorized_users_by_loan_id = {}
         self.authorized_users_by_user_id = {}
+        self.sorted_loan_ids_by_user_id = {}
         self.next_id = 1
+        self.user_loans_view = user_loans_view
+        self.operation_log = operation_log
 
     def create(self, authorized_user: AuthorizedUser):
         """Create a new authorized
 
-        Autoincrement ID will be assigned to the authorized user object.
+        Autoincrement ID will be assigned to the authorized user object, or
+        the ID of the existing authorized user if the user is already
+        authorized on the loan.
 
         @:param authorized_user: Authorized user object to create
         """
-        next_id = self.next_id
-        self.next_id += 1
-        authorized_user.authorized_user_id = next_id
-        self.authorized_users[next_id] = authorized_user
-        self.authorized_users_by_loan_id.setdefault(authorized_user.loan_id, []).append(authorized_user)
-        self.authorized_users_by_user_id.setdefault(authorized_user.user_id, []).append(authorized_user)
+        self.create_many([authorized_user])
+
+    def create_many(self, authorized_users):
+        """Create new authorized users
+
+        A contiguous block of autoincrement IDs will be assigned to the new
+        authorized user objects in order. Users already authorized on the
+        loan (including earlier in the list) aren't created again; they are
+        assigned the ID of the existing authorized user.
+
+        @:param authorized_users: List of authorized user objects to create
+        """
+        first_id = self.next_id
+        created = []
+        for authorized_user in authorized_users:
+            existing = self.authorized_users_by_loan_id.get(authorized_user.loan_id, EMPTY_INDEX).get(
+                authorized_user.user_id)
+            if existing is not None:
+                authorized_user.authorized_user_id = existing.authorized_user_id
+                continue
+            authorized_user.authorized_user_id = self.next_id
+            self.next_id += 1
+            self._add(authorized_user)
+            created.append(authorized_user)
+        if self.operation_log is not None and created:
+            self.operation_log.append_authorized_users(first_id, created)
+
+    def load(self, authorized_users, next_id: int):
+        """Load authorized users with their IDs into an empty repository
+
+        Used to restore a snapshot, where IDs of deleted authorized users are
+        missing.
+
+        @:param authorized_users: List of authorized user objects in ID order
+        @:param next_id: Next autoincrement ID
+        """
+        if self.authorized_users:
+            raise Exception('authorized users can only be loaded into an empty repository')
+        for authorized_user in authorized_users:
+            self._add(authorized_user)
+        self.next_id = next_id
 
     def read(self, authorized_user_id: int):
         """Read authorized user from the repository.
@@ -31,17 +91,99 @@ class AuthorizedUserRepository:
         """
         return self.authorized_users.get(authorized_user_id)
 
+    def read_by_loan_id_and_user_id(self, loan_id: int, user_id: int):
+        """Read the authorized user of a user on a loan.
+        @:param loan_id: ID of loan
+        @:param user_id: ID of user
+        @:returns: Authorized user object, or None if the user isn't
+        authorized on the loan
+        """
+        return self.authorized_users_by_loan_id.get(loan_id, EMPTY_INDEX).get(user_id)
+
     def read_authorized_user_ids(self, loan_id: int):
         """Read authorized user IDs from the repository for a given loan.
         @:param loan: ID of loan to read authorized user IDs from
         @:returns: Array of authorized user IDs
         """
-        return [authorized_user.user_id
-                for authorized_user in self.authorized_users_by_loan_id.setdefault(loan_id, [])]
+        return list(self.authorized_users_by_loan_id.get(loan_id, EMPTY_INDEX))
+
+    def read_authorized_user_ids_many(self, loan_ids):
+        """Read authorized user IDs from the repository for many loans at once.
+        @:param loan_ids: Iterable of loan IDs to read authorized user IDs from
+        @:returns: Dictionary of loan ID to array of authorized user IDs
+        """
+        authorized_users_by_loan_id = self.authorized_users_by_loan_id
+        return {loan_id: list(authorized_users_by_loan_id.get(loan_id, EMPTY_INDEX)) for loan_id in loan_ids}
 
     def read_loan_ids_by_user_id(self, user_id: int):
         """Read loan IDs from the repository for a authorized user ID.
         @:param loan: ID of user to read authorized user IDs from
         @:returns: Array of loan IDs
         """
-        return [authorized_user.loan_id for authorized_user in self.authorized_users_by_user_id.setdefault(user_id, [])]
+        return list(self.authorized_users_by_user_id.get(user_id, EMPTY_INDEX))
+
+    def read_loan_ids_after(self, user_id: int, after_loan_id: int, limit: int):
+        """Read loan IDs for a authorized user ID in ascending order, starting after a loan ID.
+        @:param user_id: ID of user to read loan IDs from
+        @:param after_loan_id: Only loan IDs greater than this are read (0 for all)
+        @:param limit: Maximum number of loan IDs to read
+        @:returns: List of loan IDs
+        """
+        loan_ids = self.sorted_loan_ids_by_user_id.get(user_id, EMPTY_LOAN_IDS)
+        start = bisect.bisect_right(loan_ids, after_loan_id)
+        return loan_ids[start:start + limit]
+
+    def delete(self, authorized_user_id: int):
+        """Delete an authorized user from the repository.
+
+        The user is removed from the loan's and the user's indexes in O(1);
+        only the user's sorted loan IDs need a bisect.
+
+        @:param authorized_user_id: ID of authorized user to delete
+        @:returns: True if the authorized user was deleted; False if it
+        doesn't exist
+        """
+        authorized_user = self.authorized_users.pop(authorized_user_id, None)
+        if authorized_user is None:
+            return False
+        loan_id = authorized_user.loan_id
+        user_id = authorized_user.user_id
+        AuthorizedUserRepository._remove(self.authorized_users_by_loan_id, loan_id, user_id)
+        AuthorizedUserRepository._remove(self.authorized_users_by_user_id, user_id, loan_id)
+        sorted_loan_ids = self.sorted_loan_ids_by_user_id[user_id]
+        del sorted_loan_ids[bisect.bisect_left(sorted_loan_ids, loan_id)]
+        if not sorted_loan_ids:
+            del self.sorted_loan_ids_by_user_id[user_id]
+        if self.user_loans_view is not None:
+            self.user_loans_view.remove_shared_loan(user_id, loan_id)
+        if self.operation_log is not None:
+            self.operation_log.append_authorized_user_deletes([authorized_user_id])
+        return True
+
+    def count(self):
+        """Count authorized users in the repository.
+        @:returns: Number of authorized users"""
+        return len(self.authorized_users)
+
+    def _add(self, authorized_user: AuthorizedUser):
+        """Add an authorized user with its ID to the indexes"""
+        loan_id = authorized_user.loan_id
+        user_id = authorized_user.user_id
+        self.authorized_users[authorized_user.authorized_user_id] = authorized_user
+        self.authorized_users_by_loan_id.setdefault(loan_id, {})[user_id] = authorized_user
+        self.authorized_users_by_user_id.setdefault(user_id, {})[loan_id] = authorized_user
+        sorted_loan_ids = self.sorted_loan_ids_by_user_id.setdefault(user_id, [])
+        if not sorted_loan_ids or loan_id > sorted_loan_ids[-1]:
+            sorted_loan_ids.append(loan_id)
+        else:
+            sorted_loan_ids.insert(bisect.bisect_left(sorted_loan_ids, loan_id), loan_id)
+        if self.user_loans_view is not None:
+            self.user_loans_view.add_shared_loan(user_id, loan_id)
+
+    @staticmethod
+    def _remove(index: dict, key: int, member: int):
+        """Remove a member from an index, dropping the key once it is empty"""
+        members = index[key]
+        del members[member]
+        if not members:
+            del index[key]
@@ -0,0 +1,315 @@
+"""Memory-based loan repository storing loans as typed columns"""
+import decimal
+from decimal import Decimal
+import numpy as np
+from models import Loan
+
+
+INITIAL_CAPACITY = 1024
+# Loans added since the user index was last rebuilt, as a fraction of the
+# loans in it, before it is rebuilt
+INDEX_REBUILD_FRACTION = 0.25
+AMOUNT_DIGITS = 2
+INTEREST_RATE_DIGITS = 4
+COLUMNS = ('user_ids', 'amount_cents', 'amount_exponents', 'term_months', 'interest_rate_bp', 'interest_rate_exponents')
+
+
+class ColumnarLoanRepository:
+    """Memory-based loan repository storing loans as typed columns
+
+    Instead of an object per loan, each field is kept in a numpy array indexed
+    by loan ID - 1: user ID, amount in cents, term in months and interest rate
+    in basis points, plus the decimal exponent of the amount and rate so they
+    are read back with the same representation they were created with (1000
+    stays 1000 rather than becoming 1000.00). Loan objects are only built
+    when read.
+
+    Amounts with more than 2 decimal places and rates with more than 4 don't
+    fit the columns exactly. Their columns hold rounded values and the exact
+    values are kept separately (see inexact_loan_ids).
+
+    Loans of each user are found with a CSR (compressed sparse row) index:
+    loan IDs sorted by user and an array of offsets per user ID into them.
+    Loans created since the index was built are kept in small per-user lists
+    until there are enough of them to rebuild the index.
+
+    Loans don't keep authorized user IDs (they are read from the authorized
+    user repository); loans are always read with an empty list.
+    """
+    def __init__(self, user_loans_view=None, operation_log=None):
+        """Create a loan repository
+
+        @:param user_loans_view: UserLoansView to keep updated (optional)
+        @:param operation_log: OperationLog to append created loans to
+        (optional)
+        """
+        self.size = 0
+        self.user_ids = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.amount_cents = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.amount_exponents = np.zeros(INITIAL_CAPACITY, dtype=np.int8)
+        self.term_months = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.interest_rate_bp = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self.interest_rate_exponents = np.zeros(INITIAL_CAPACITY, dtype=np.int8)
+        # Loan ID to exact (amount, interest rate) for loans not fitting the
+        # columns exactly
+        self.inexact_terms = {}
+
+        # CSR index of the first index_size loans
+        self.index_size = 0
+        self.index_offsets = np.zeros(1, dtype=np.int64)
+        self.index_loan_ids = np.zeros(0, dtype=np.int64)
+        # User ID to list of loan IDs created since the index was built
+        self.unindexed_loan_ids_by_user_id = {}
+
+        self.user_loans_view = user_loans_view
+        self.operation_log = operation_log
+
+    def create(self, loan: Loan):
+        """Create a new loan
+
+        Autoincrement ID will be assigned to the loan object.
+
+        @:param user: Loan object to create
+        """
+        self.create_many([loan])
+
+    def create_many(self, loans):
+        """Create new loans
+
+        A contiguous block of autoincrement IDs will be assigned to the loan
+        objects in order.
+
+        @:param loans: List of loan objects to create
+        """
+        first_id = self.size + 1
+        self._reserve(self.size + len(loans))
+        columns = ([], [], [], [], [], [])
+        user_ids, amount_cents, amount_exponents, term_months, interest_rate_bp, interest_rate_exponents = columns
+        for loan_id, loan in enumerate(loans, first_id):
+            cents, amount_exponent, amount_exact = \
+                ColumnarLoanRepository._to_fixed_point(loan.amount, AMOUNT_DIGITS)
+            basis_points, interest_rate_exponent, interest_rate_exact = \
+                ColumnarLoanRepository._to_fixed_point(loan.interest_rate, INTEREST_RATE_DIGITS)
+            user_ids.append(loan.user_id)
+            amount_cents.append(cents)
+            amount_exponents.append(amount_exponent)
+            term_months.append(loan.term_months)
+            interest_rate_bp.append(basis_points)
+            interest_rate_exponents.append(interest_rate_exponent)
+            if not (amount_exact and interest_rate_exact):
+                self.inexact_terms[loan_id] = (loan.amount, loan.interest_rate)
+
+            loan.loan_id = loan_id
+            # IDs only increase, so appending keeps each list sorted
+            self.unindexed_loan_ids_by_user_id.setdefault(loan.user_id, []).append(loan_id)
+            if self.user_loans_view is not None:
+                self.user_loans_view.add_owned_loan(loan.user_id, loan_id)
+
+        end = self.size + len(loans)
+        for name, values in zip(COLUMNS, columns):
+            getattr(self, name)[self.size:end] = values
+        self.size = end
+        if self.operation_log is not None:
+            self.operation_log.append_loans(first_id, loans)
+
+        if self.size - self.index_size > max(self.index_size * INDEX_REBUILD_FRACTION, INITIAL_CAPACITY):
+            self._rebuild_index()
+
+    def read(self, loan_id: int):
+        """Read loan from the repository.
+        @:param loan_id: ID of loan to read
+        @:returns: Loan object
+        """
+        if not 1 <= loan_id <= self.size:
+            return None
+        index = loan_id - 1
+        return self._build_loan(
+            loan_id,
+            self.user_ids.item(index),
+            self.amount_cents.item(index),
+            self.amount_exponents.item(index),
+            self.term_months.item(index),
+            self.interest_rate_bp.item(index),
+            self.interest_rate_exponents.item(index))
+
+    def read_many(self, loan_ids):
+        """Read many loans from the repository at once.
+        @:param loan_ids: Iterable of loan IDs to read
+        @:returns: List of the loans that exist, in the order of the loan IDs
+        """
+        loan_ids = [loan_id for loan_id in loan_ids if 1 <= loan_id <= self.size]
+        indices = np.array(loan_ids, dtype=np.int64) - 1
+        return list(map(self._build_loan, loan_ids, *(getattr(self, name)[indices].tolist() for name in COLUMNS)))
+
+    def exists_many(self, loan_ids):
+        """Check which loans exist in the repository.
+        @:param loan_ids: Iterable of loan IDs to check
+        @:returns: Set of the loan IDs that exist"""
+        return {loan_id for loan_id in loan_ids if 1 <= loan_id <= self.size}
+
+    def read_loans_for_user_id(self, user_id: int):
+        """Read all loans from the repository of a given user ID.
+        @:param user_id: ID of user to read loans from
+        @:returns: New list of loan objects
+        """
+        loan_ids = self._loan_ids_for_user_id(user_id)
+        indices = np.array(loan_ids, dtype=np.int64) - 1
+        # One gather per column rather than reading each loan's fields
+        return list(map(self._build_loan, loan_ids, *(getattr(self, name)[indices].tolist() for name in COLUMNS)))
+
+    def read_loan_ids_after(self, user_id: int, after_loan_id: int, limit: int):
+        """Read loan IDs of a given user ID in ascending order, starting after a loan ID.
+        @:param user_id: ID of user to read loan IDs from
+        @:param after_loan_id: Only loan IDs greater than this are read (0 for all)
+        @:param limit: Maximum number of loan IDs to read
+        @:returns: List of loan IDs
+        """
+        indexed_loan_ids = self._indexed_loan_ids(user_id)
+        start = int(np.searchsorted(indexed_loan_ids, after_loan_id, side='right'))
+        loan_ids = indexed_loan_ids[start:start + limit].tolist()
+        if len(loan_ids) < limit:
+            loan_ids += [
+                loan_id for loan_id in self.unindexed_loan_ids_by_user_id.get(user_id, []) if loan_id > after_loan_id
+            ][:limit - len(loan_ids)]
+        return loan_ids
+
+    def count(self):
+        """Count loans in the repository.
+        @:returns: Number of loans"""
+        return self.size
+
+    def columns(self):
+        """Get read-only views of the loan columns for batch processing
+
+        Views are of the loans at the time of the call; loans created later
+        aren't included. Row i is the loan with ID i + 1.
+
+        @:returns: Dictionary of numpy arrays of user_id, amount_cents,
+        amount_exponent, term_months, interest_rate_bp and
+        interest_rate_exponent
+        """
+        columns = {
+            'user_id': self.user_ids[:self.size],
+            'amount_cents': self.amount_cents[:self.size],
+            'amount_exponent': self.amount_exponents[:self.size],
+            'term_months': self.term_months[:self.size],
+            'interest_rate_bp': self.interest_rate_bp[:self.size],
+            'interest_rate_exponent': self.interest_rate_exponents[:self.size]
+        }
+        for column in columns.values():
+            column.flags.writeable = False
+        return columns
+
+    def load_columns(self, columns, inexact_terms):
+        """Load loans from columns into an empty repository
+
+        Used to restore a snapshot without building a loan object per loan.
+        Loans get IDs from 1 in the order of the columns.
+
+        @:param columns: Dictionary of arrays as returned by columns()
+        @:param inexact_terms: Dictionary of loan ID to exact (amount,
+        interest rate) for loans not fitting the columns exactly
+        """
+        if self.size:
+            raise Exception('loans can only be loaded into an empty repository')
+        size = len(columns['user_id'])
+        self._reserve(size)
+        for name, column in zip(COLUMNS, ['user_id', 'amount_cents', 'amount_exponent', 'term_months',
+                                          'interest_rate_bp', 'interest_rate_exponent']):
+            getattr(self, name)[:size] = columns[column]
+        self.size = size
+        self.inexact_terms.update(inexact_terms)
+        self._rebuild_index()
+        if self.user_loans_view is not None:
+            for loan_id, user_id in enumerate(self.user_ids[:size].tolist(), 1):
+                self.user_loans_view.add_owned_loan(user_id, loan_id)
+
+    def inexact_loan_ids(self):
+        """Get IDs of loans whose amount or interest rate columns are rounded
+
+        @:returns: Set of loan IDs
+        """
+        return set(self.inexact_terms)
+
+    def _build_loan(
+            self,
+            loan_id: int,
+            user_id: int,
+            amount_cents: int,
+            amount_exponent: int,
+            term_months: int,
+            interest_rate_bp: int,
+            interest_rate_exponent: int):
+        """Build a loan from its column values"""
+        inexact_terms = self.inexact_terms.get(loan_id)
+        if inexact_terms is not None:
+            amount, interest_rate = inexact_terms
+        else:
+            amount = ColumnarLoanRepository._from_fixed_point(amount_cents, amount_exponent, AMOUNT_DIGITS)
+            interest_rate = ColumnarLoanRepository._from_fixed_point(
+                interest_rate_bp, interest_rate_exponent, INTEREST_RATE_DIGITS)
+        return Loan(
+            loan_id=loan_id,
+            user_id=user_id,
+            amount=amount,
+            term_months=term_months,
+            interest_rate=interest_rate,
+            authorized_user_ids=[])
+
+    def _loan_ids_for_user_id(self, user_id: int):
+        return self._indexed_loan_ids(user_id).tolist() + self.unindexed_loan_ids_by_user_id.get(user_id, [])
+
+    def _indexed_loan_ids(self, user_id: int):
+        """Sorted loan IDs of a user in the CSR index"""
+        if not 0 <= user_id < len(self.index_offsets) - 1:
+            return self.index_loan_ids[:0]
+        return self.index_loan_ids[self.index_offsets[user_id]:self.index_offsets[user_id + 1]]
+
+    def _rebuild_index(self):
+        """Rebuild the CSR index from the user ID column"""
+        user_ids = self.user_ids[:self.size]
+        # A stable sort keeps each user's loan IDs in ascending order
+        order = np.argsort(user_ids, kind='stable')
+        counts = np.bincount(user_ids, minlength=1) if self.size else np.zeros(1, dtype=np.int64)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        self.index_loan_ids = order + 1
+        self.index_offsets = offsets
+        self.index_size = self.size
+        self.unindexed_loan_ids_by_user_id = {}
+
+    def _reserve(self, capacity: int):
+        """Grow the columns to hold at least the given number of loans
+
+        Columns are replaced rather than resized in place so views returned by
+        columns() stay valid.
+        """
+        if capacity <= len(self.user_ids):
+            return
+        new_capacity = max(capacity, len(self.user_ids) * 2)
+        for name in COLUMNS:
+            column = getattr(self, name)
+            new_column = np.zeros(new_capacity, dtype=column.dtype)
+            new_column[:self.size] = column[:self.size]
+            setattr(self, name, new_column)
+
+    @staticmethod
+    def _to_fixed_point(value: Decimal, digits: int):
+        """Convert a decimal to an integer of 10^-digits units
+
+        @:returns: Tuple of integer value, exponent of the decimal and whether
+        the value is exact (otherwise it is rounded half up)
+        """
+        sign, _, exponent = value.as_tuple()
+        if sign == 0 and -digits <= exponent <= 127:
+            # No digits below the unit, so truncating is exact
+            fixed_point = int(value.scaleb(digits))
+            if fixed_point < 2 ** 63:
+                return fixed_point, exponent, True
+        fixed_point = int(value.scaleb(digits).to_integral_value(rounding=decimal.ROUND_HALF_UP))
+        return min(max(fixed_point, -2 ** 63), 2 ** 63 - 1), -digits, False
+
+    @staticmethod
+    def _from_fixed_point(fixed_point: int, exponent: int, digits: int):
+        """Convert an integer of 10^-digits units back to a decimal with the given exponent"""
+        return Decimal(fixed_point // 10 ** (exponent + digits)).scaleb(exponent)
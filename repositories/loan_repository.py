@@ -1,13 +1,23 @@
 """Memory-based loan repository"""
+import bisect
 from models import Loan
 
 
 class LoanRepository:
     """Memory-based loan repository"""
-    def __init__(self):
+    def __init__(self, user_loans_view=None, operation_log=None):
+        """Create a loan repository
+
+        @:param user_loans_view: UserLoansView to keep updated (optional)
+        @:param operation_log: OperationLog to append created loans to
+        (optional)
+        """
         self.loans = {}
         self.loans_by_user_id = {}
+        self.loan_ids_by_user_id = {}
         self.next_id = 1
+        self.user_loans_view = user_loans_view
+        self.operation_log = operation_log
 
     def create(self, loan: Loan):
         """Create a new loan
@@ -16,11 +26,28 @@ class LoanRepository:
 
         @:param user: Loan object to create
         """
-        next_id = self.next_id
-        self.next_id += 1
-        loan.loan_id = next_id
-        self.loans[next_id] = loan
-        self.loans_by_user_id.setdefault(loan.user_id, []).append(loan)
+        self.create_many([loan])
+
+    def create_many(self, loans):
+        """Create new loans
+
+        A contiguous block of autoincrement IDs will be assigned to the loan
+        objects in order.
+
+        @:param loans: List of loan objects to create
+        """
+        first_id = self.next_id
+        self.next_id += len(loans)
+        for loan_id, loan in enumerate(loans, first_id):
+            loan.loan_id = loan_id
+            self.loans[loan_id] = loan
+            self.loans_by_user_id.setdefault(loan.user_id, []).append(loan)
+            # IDs only increase, so appending keeps each list sorted
+            self.loan_ids_by_user_id.setdefault(loan.user_id, []).append(loan_id)
+            if self.user_loans_view is not None:
+                self.user_loans_view.add_owned_loan(loan.user_id, loan_id)
+        if self.operation_log is not None:
+            self.operation_log.append_loans(first_id, loans)
 
     def read(self, loan_id: int):
         """Read loan from the repository.
@@ -29,9 +56,39 @@ class LoanRepository:
         """
         return self.loans.get(loan_id)
 
+    def read_many(self, loan_ids):
+        """Read many loans from the repository at once.
+        @:param loan_ids: Iterable of loan IDs to read
+        @:returns: List of the loans that exist, in the order of the loan IDs
+        """
+        loans = self.loans
+        return [loans[loan_id] for loan_id in loan_ids if loan_id in loans]
+
+    def exists_many(self, loan_ids):
+        """Check which loans exist in the repository.
+        @:param loan_ids: Iterable of loan IDs to check
+        @:returns: Set of the loan IDs that exist"""
+        return {loan_id for loan_id in loan_ids if loan_id in self.loans}
+
     def read_loans_for_user_id(self, user_id: int):
         """Read all loans from the repository of a given user ID.
         @:param user_id: ID of user to read loans from
-        @:returns: List of loan objects
+        @:returns: New list of loan objects
         """
-        return self.loans_by_user_id.setdefault(user_id, [])
+        return list(self.loans_by_user_id.get(user_id, []))
+
+    def read_loan_ids_after(self, user_id: int, after_loan_id: int, limit: int):
+        """Read loan IDs of a given user ID in ascending order, starting after a loan ID.
+        @:param user_id: ID of user to read loan IDs from
+        @:param after_loan_id: Only loan IDs greater than this are read (0 for all)
+        @:param limit: Maximum number of loan IDs to read
+        @:returns: List of loan IDs
+        """
+        loan_ids = self.loan_ids_by_user_id.get(user_id, [])
+        start = bisect.bisect_right(loan_ids, after_loan_id)
+        return loan_ids[start:start + limit]
+
+    def count(self):
+        """Count loans in the repository.
+        @:returns: Number of loans"""
+        return len(self.loans)
@@ -0,0 +1,329 @@
+"""Append-only log of repository operations"""
+import asyncio
+import os
+import struct
+import threading
+import zlib
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+
+
+USERS_RECORD = 1
+LOANS_RECORD = 2
+AUTHORIZED_USERS_RECORD = 3
+AUTHORIZED_USER_DELETES_RECORD = 4
+
+# Record type and payload length, then the payload and a CRC-32 of both
+RECORD_HEADER = struct.Struct('<BI')
+RECORD_CRC = struct.Struct('<I')
+# First ID and number of records created
+BATCH_HEADER = struct.Struct('<qI')
+# Number of records deleted, then their IDs
+DELETE_HEADER = struct.Struct('<I')
+DELETED_ID = struct.Struct('<q')
+STRING_LENGTH = struct.Struct('<I')
+LOAN_FIELDS = struct.Struct('<qiHH')
+AUTHORIZED_USER_FIELDS = struct.Struct('<qq')
+
+
+class OperationLog:
+    """Append-only log of repository operations
+
+    Repositories given the log append a record for each create_many call (so
+    each create and each chunk of a bulk request): the first ID assigned and
+    the fields of each new user, loan or authorized user. Deleted authorized
+    users are appended as their IDs. Replaying the records in order onto the
+    repositories recreates them with the same IDs.
+
+    Records are buffered in memory and written with a single write and fsync
+    by flush. commit waits for everything appended so far to be flushed;
+    commits made while a flush is running share the next one (group commit),
+    so concurrent requests pay for one fsync between them.
+
+    If a write or fsync fails (such as when the disk is full) the file may
+    hold part of the data and the records taken from the buffer aren't on
+    disk, so the log is marked failed: every later flush and commit raises
+    instead of reporting records durable that aren't.
+
+    The log is split into numbered segment files (log-<segment>.bin). A
+    snapshot made after rotate() to a new segment contains everything in the
+    earlier segments, which can then be deleted.
+    """
+    def __init__(self, directory: str, segment: int):
+        """Open a log segment for appending
+
+        @:param directory: Directory of the log segment files
+        @:param segment: Number of the segment to append to (created if
+        missing)
+        """
+        self.directory = directory
+        self.segment = segment
+        self.file = open(OperationLog.segment_path(directory, segment), 'ab')
+        # Guards the buffer and counters, which requests append to while a
+        # flush runs in another thread
+        self.lock = threading.Lock()
+        # Serializes writing to and replacing the file
+        self.flush_lock = threading.Lock()
+        self.buffer = bytearray()
+        self.appended_records = 0
+        self.durable_records = 0
+        self.flushes = 0
+        self.flushing = None
+        self.failure = None
+
+    def append_users(self, first_id: int, users):
+        """Append a record of created users
+
+        @:param first_id: ID of the first user
+        @:param users: List of created users
+        """
+        payload = bytearray(BATCH_HEADER.pack(first_id, len(users)))
+        for user in users:
+            OperationLog._pack_string(payload, user.username)
+        self._append(USERS_RECORD, payload)
+
+    def append_loans(self, first_id: int, loans):
+        """Append a record of created loans
+
+        Amounts and interest rates are kept as strings so they are replayed
+        with the same representation.
+
+        @:param first_id: ID of the first loan
+        @:param loans: List of created loans
+        """
+        payload = bytearray(BATCH_HEADER.pack(first_id, len(loans)))
+        for loan in loans:
+            amount = str(loan.amount).encode()
+            interest_rate = str(loan.interest_rate).encode()
+            payload += LOAN_FIELDS.pack(loan.user_id, loan.term_months, len(amount), len(interest_rate))
+            payload += amount
+            payload += interest_rate
+        self._append(LOANS_RECORD, payload)
+
+    def append_authorized_users(self, first_id: int, authorized_users):
+        """Append a record of created authorized users
+
+        @:param first_id: ID of the first authorized user
+        @:param authorized_users: List of created authorized users
+        """
+        payload = bytearray(BATCH_HEADER.pack(first_id, len(authorized_users)))
+        for authorized_user in authorized_users:
+            payload += AUTHORIZED_USER_FIELDS.pack(authorized_user.loan_id, authorized_user.user_id)
+        self._append(AUTHORIZED_USERS_RECORD, payload)
+
+    def append_authorized_user_deletes(self, authorized_user_ids):
+        """Append a record of deleted authorized users
+
+        @:param authorized_user_ids: List of IDs of deleted authorized users
+        """
+        payload = bytearray(DELETE_HEADER.pack(len(authorized_user_ids)))
+        for authorized_user_id in authorized_user_ids:
+            payload += DELETED_ID.pack(authorized_user_id)
+        self._append(AUTHORIZED_USER_DELETES_RECORD, payload)
+
+    def flush(self):
+        """Write and fsync everything appended so far
+
+        @:raises: Exception if the log failed, or the write or fsync fails
+        """
+        with self.flush_lock:
+            self._check_failure()
+            with self.lock:
+                data = bytes(self.buffer)
+                self.buffer.clear()
+                records = self.appended_records
+            if records == self.durable_records:
+                return
+            self._write(data)
+            self.flushes += 1
+            with self.lock:
+                self.durable_records = max(self.durable_records, records)
+
+    async def commit(self):
+        """Wait until everything appended so far is flushed to disk
+
+        The flush runs in the default executor so the event loop keeps
+        serving requests, which append to the buffer for the next flush.
+
+        @:raises: Exception if the log failed
+        """
+        records = self.appended_records
+        while self.durable_records < records:
+            self._check_failure()
+            if self.flushing is None:
+                self.flushing = asyncio.get_running_loop().run_in_executor(None, self.flush)
+                self.flushing.add_done_callback(self._flush_done)
+            await asyncio.shield(self.flushing)
+
+    def rotate(self):
+        """Flush and continue in a new segment
+
+        @:returns: Number of the new segment
+        @:raises: Exception if the log failed, or the write or fsync fails
+        """
+        with self.flush_lock:
+            self._check_failure()
+            with self.lock:
+                data = bytes(self.buffer)
+                self.buffer.clear()
+                records = self.appended_records
+            self._write(data)
+            self.file.close()
+            self.segment += 1
+            self.file = open(OperationLog.segment_path(self.directory, self.segment), 'ab')
+            OperationLog.fsync_directory(self.directory)
+            with self.lock:
+                self.durable_records = max(self.durable_records, records)
+        return self.segment
+
+    def close(self):
+        """Flush and close the log"""
+        try:
+            self.flush()
+        finally:
+            self.file.close()
+
+    def _append(self, record_type: int, payload: bytearray):
+        header = RECORD_HEADER.pack(record_type, len(payload))
+        crc = zlib.crc32(payload, zlib.crc32(header))
+        with self.lock:
+            self.buffer += header
+            self.buffer += payload
+            self.buffer += RECORD_CRC.pack(crc)
+            self.appended_records += 1
+
+    def _write(self, data: bytes):
+        """Write and fsync data (flush lock must be held), failing the log on error"""
+        try:
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        except BaseException as e:
+            self.failure = e
+            raise
+
+    def _check_failure(self):
+        if self.failure is not None:
+            raise Exception('operation log failed: {}'.format(self.failure)) from self.failure
+
+    def _flush_done(self, future):
+        self.flushing = None
+
+    @staticmethod
+    def segment_path(directory: str, segment: int):
+        """Get the path of a log segment file"""
+        return os.path.join(directory, 'log-{:012d}.bin'.format(segment))
+
+    @staticmethod
+    def fsync_directory(directory: str):
+        """Fsync a directory so created, renamed and deleted files are durable"""
+        descriptor = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    @staticmethod
+    def read_records(path: str):
+        """Read the records of a log segment
+
+        Reading stops at the first incomplete or corrupt record, such as one
+        torn by a crash while it was written.
+
+        @:param path: Path of the segment file
+        @:returns: Tuple of list of (record type, payload) and length of the
+        valid records in bytes
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+        records = []
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            record_type, length = RECORD_HEADER.unpack_from(data, position)
+            end = position + RECORD_HEADER.size + length
+            if end + RECORD_CRC.size > len(data):
+                break
+            payload = memoryview(data)[position + RECORD_HEADER.size:end]
+            crc, = RECORD_CRC.unpack_from(data, end)
+            if crc != zlib.crc32(payload, zlib.crc32(data[position:position + RECORD_HEADER.size])):
+                break
+            records.append((record_type, payload))
+            position = end + RECORD_CRC.size
+        return records, position
+
+    @staticmethod
+    def decode_users(payload):
+        """Decode a record of created users
+
+        @:returns: Tuple of first ID and list of users (with IDs of 0)
+        """
+        first_id, count = BATCH_HEADER.unpack_from(payload)
+        position = BATCH_HEADER.size
+        users = []
+        for _ in range(count):
+            username, position = OperationLog._unpack_string(payload, position)
+            users.append(User(user_id=0, username=username))
+        return first_id, users
+
+    @staticmethod
+    def decode_loans(payload):
+        """Decode a record of created loans
+
+        @:returns: Tuple of first ID and list of loans (with IDs of 0)
+        """
+        first_id, count = BATCH_HEADER.unpack_from(payload)
+        position = BATCH_HEADER.size
+        loans = []
+        for _ in range(count):
+            user_id, term_months, amount_length, interest_rate_length = LOAN_FIELDS.unpack_from(payload, position)
+            position += LOAN_FIELDS.size
+            amount = Decimal(bytes(payload[position:position + amount_length]).decode())
+            position += amount_length
+            interest_rate = Decimal(bytes(payload[position:position + interest_rate_length]).decode())
+            position += interest_rate_length
+            loans.append(Loan(
+                loan_id=0,
+                user_id=user_id,
+                amount=amount,
+                term_months=term_months,
+                interest_rate=interest_rate,
+                authorized_user_ids=[]))
+        return first_id, loans
+
+    @staticmethod
+    def decode_authorized_users(payload):
+        """Decode a record of created authorized users
+
+        @:returns: Tuple of first ID and list of authorized users (with IDs
+        of 0)
+        """
+        first_id, count = BATCH_HEADER.unpack_from(payload)
+        return first_id, [
+            AuthorizedUser(authorized_user_id=0, loan_id=loan_id, user_id=user_id)
+            for loan_id, user_id in AUTHORIZED_USER_FIELDS.iter_unpack(
+                payload[BATCH_HEADER.size:BATCH_HEADER.size + count * AUTHORIZED_USER_FIELDS.size])
+        ]
+
+    @staticmethod
+    def decode_authorized_user_deletes(payload):
+        """Decode a record of deleted authorized users
+
+        @:returns: List of IDs of deleted authorized users
+        """
+        count, = DELETE_HEADER.unpack_from(payload)
+        return [
+            authorized_user_id for authorized_user_id, in DELETED_ID.iter_unpack(
+                payload[DELETE_HEADER.size:DELETE_HEADER.size + count * DELETED_ID.size])
+        ]
+
+    @staticmethod
+    def _pack_string(payload: bytearray, value: str):
+        encoded = value.encode()
+        payload += STRING_LENGTH.pack(len(encoded))
+        payload += encoded
+
+    @staticmethod
+    def _unpack_string(payload, position: int):
+        length, = STRING_LENGTH.unpack_from(payload, position)
+        position += STRING_LENGTH.size
+        return bytes(payload[position:position + length]).decode(), position + length
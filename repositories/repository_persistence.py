@@ -0,0 +1,193 @@
+"""Persistence of the memory repositories in snapshots and an operation log"""
+import asyncio
+import os
+import re
+import time
+from .operation_log import (
+    AUTHORIZED_USER_DELETES_RECORD, AUTHORIZED_USERS_RECORD, LOANS_RECORD, USERS_RECORD, OperationLog)
+from .repository_snapshot import RepositorySnapshot
+
+
+SEGMENT_FILE = re.compile(r'log-(\d{12})\.bin')
+SNAPSHOT_FILE = re.compile(r'snapshot-(\d{12})\.bin')
+
+
+class RepositoryPersistence:
+    """Persistence of the memory repositories in snapshots and an operation log
+
+    The directory holds snapshots (snapshot-<segment>.bin, with everything in
+    log segments before that segment) and the log segments after the latest
+    snapshot (log-<segment>.bin). Restoring loads the latest snapshot and
+    replays only the segments after it.
+    """
+    def __init__(self, directory: str, user_repository, loan_repository, authorized_user_repository):
+        """Create persistence of empty repositories
+
+        @:param directory: Directory of snapshots and log segments (created
+        if missing)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.user_repository = user_repository
+        self.loan_repository = loan_repository
+        self.authorized_user_repository = authorized_user_repository
+        self.operation_log = None
+        self.snapshotting = False
+
+    def restore(self):
+        """Restore the repositories and start logging their operations
+
+        Only the last segment may end with an incomplete record (from a crash
+        while it was written), which is truncated.
+
+        @:returns: Dictionary of the seconds loading the snapshot and
+        replaying the log, and the number of log records replayed
+        @:raises: Exception if a snapshot or log segment is corrupt
+        """
+        snapshot_segments = self._file_numbers(SNAPSHOT_FILE)
+        segments = self._file_numbers(SEGMENT_FILE)
+
+        start = time.perf_counter()
+        first_segment = 1
+        if snapshot_segments:
+            first_segment = snapshot_segments[-1]
+            RepositorySnapshot.load(
+                self._snapshot_path(first_segment),
+                self.user_repository,
+                self.loan_repository,
+                self.authorized_user_repository)
+        snapshot_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        segments = [segment for segment in segments if segment >= first_segment]
+        replayed_records = 0
+        for index, segment in enumerate(segments):
+            path = OperationLog.segment_path(self.directory, segment)
+            records, valid_length = OperationLog.read_records(path)
+            if valid_length < os.path.getsize(path):
+                if index < len(segments) - 1:
+                    raise Exception('log segment {} is corrupt'.format(segment))
+                os.truncate(path, valid_length)
+            for record_type, payload in records:
+                self._replay(record_type, payload)
+            replayed_records += len(records)
+        replay_seconds = time.perf_counter() - start
+
+        self.operation_log = OperationLog(self.directory, segments[-1] if segments else first_segment)
+        for repository in [self.user_repository, self.loan_repository, self.authorized_user_repository]:
+            repository.operation_log = self.operation_log
+        return {
+            'snapshot_seconds': snapshot_seconds,
+            'replay_seconds': replay_seconds,
+            'replayed_records': replayed_records
+        }
+
+    async def commit(self):
+        """Wait until every operation so far is on disk"""
+        await self.operation_log.commit()
+
+    async def snapshot(self):
+        """Save a snapshot and delete the log segments it replaces
+
+        The log moves to a new segment and the records are counted between
+        operations; the snapshot is then written in the default executor
+        while requests keep being served.
+
+        @:returns: Number of the log segment after the snapshot, or None if a
+        snapshot is already being saved
+        """
+        if self.snapshotting:
+            return None
+        self.snapshotting = True
+        try:
+            segment = self.operation_log.rotate()
+            counts = RepositorySnapshot.counts(
+                self.user_repository, self.loan_repository, self.authorized_user_repository)
+            await asyncio.get_running_loop().run_in_executor(None, self._save_snapshot, segment, counts)
+            return segment
+        finally:
+            self.snapshotting = False
+
+    def snapshot_now(self):
+        """Save a snapshot and delete the log segments it replaces
+
+        Repositories must not be written until it returns.
+
+        @:returns: Number of the log segment after the snapshot
+        """
+        segment = self.operation_log.rotate()
+        self._save_snapshot(segment, RepositorySnapshot.counts(
+            self.user_repository, self.loan_repository, self.authorized_user_repository))
+        return segment
+
+    def log_size(self):
+        """Get the size in bytes of the log segments not in a snapshot yet
+
+        @:returns: Number of bytes, including records not flushed yet
+        """
+        snapshot_segments = self._file_numbers(SNAPSHOT_FILE)
+        first_segment = snapshot_segments[-1] if snapshot_segments else 1
+        return len(self.operation_log.buffer) + sum(
+            os.path.getsize(OperationLog.segment_path(self.directory, segment))
+            for segment in self._file_numbers(SEGMENT_FILE) if segment >= first_segment)
+
+    def close(self):
+        """Flush and close the log"""
+        if self.operation_log is not None:
+            self.operation_log.close()
+
+    def _save_snapshot(self, segment: int, counts):
+        RepositorySnapshot.save(
+            self._snapshot_path(segment),
+            self.user_repository,
+            self.loan_repository,
+            self.authorized_user_repository,
+            counts)
+        OperationLog.fsync_directory(self.directory)
+        # Only once the snapshot is durable are the files it replaces deleted
+        for old_segment in self._file_numbers(SNAPSHOT_FILE):
+            if old_segment < segment:
+                os.remove(self._snapshot_path(old_segment))
+        for old_segment in self._file_numbers(SEGMENT_FILE):
+            if old_segment < segment:
+                os.remove(OperationLog.segment_path(self.directory, old_segment))
+        OperationLog.fsync_directory(self.directory)
+
+    def _replay(self, record_type: int, payload):
+        """Replay a log record onto the repositories
+
+        Authorized user IDs continue from the repository's next ID rather
+        than its count, since deleted authorized users leave gaps.
+
+        @:raises: Exception if the record doesn't continue from the
+        repository's records
+        """
+        if record_type == USERS_RECORD:
+            repository = self.user_repository
+            first_id, records = OperationLog.decode_users(payload)
+            next_id = repository.count() + 1
+        elif record_type == LOANS_RECORD:
+            repository = self.loan_repository
+            first_id, records = OperationLog.decode_loans(payload)
+            next_id = repository.count() + 1
+        elif record_type == AUTHORIZED_USERS_RECORD:
+            repository = self.authorized_user_repository
+            first_id, records = OperationLog.decode_authorized_users(payload)
+            next_id = repository.next_id
+        elif record_type == AUTHORIZED_USER_DELETES_RECORD:
+            for authorized_user_id in OperationLog.decode_authorized_user_deletes(payload):
+                self.authorized_user_repository.delete(authorized_user_id)
+            return
+        else:
+            raise Exception('unknown log record type {}'.format(record_type))
+        if first_id != next_id:
+            raise Exception('log record of ID {} does not follow ID {}'.format(first_id, next_id - 1))
+        repository.create_many(records)
+
+    def _snapshot_path(self, segment: int):
+        return os.path.join(self.directory, 'snapshot-{:012d}.bin'.format(segment))
+
+    def _file_numbers(self, pattern):
+        """Get the sorted segment numbers of files matching a pattern"""
+        return sorted(
+            int(match.group(1)) for match in map(pattern.fullmatch, os.listdir(self.directory)) if match)
@@ -0,0 +1,275 @@
+"""Compact binary snapshot of the memory repositories"""
+import mmap
+import os
+import struct
+import zlib
+from decimal import Decimal
+import numpy as np
+from models import AuthorizedUser, Loan, User
+from .columnar_loan_repository import AMOUNT_DIGITS, INTEREST_RATE_DIGITS, ColumnarLoanRepository
+
+
+SNAPSHOT_MAGIC = b'LOANSNAP'
+SNAPSHOT_VERSION = 1
+# Magic, version, CRC-32 of everything after the header, then the counts
+# sizing each section: users, username bytes, loans, inexact loans, inexact
+# terms bytes, authorized users and next authorized user ID
+SNAPSHOT_HEADER = struct.Struct('<8sII7q')
+SECTION_ALIGNMENT = 8
+
+
+class RepositorySnapshot:
+    """Compact binary snapshot of the memory repositories
+
+    Everything is stored as little-endian arrays, each aligned to 8 bytes, so
+    a snapshot is loaded through mmap with numpy views of the file instead of
+    parsing it record by record. Loans are stored as the columns of
+    ColumnarLoanRepository (amounts in cents and interest rates in basis
+    points, with the decimal exponents), which that repository takes as they
+    are; amounts and rates that don't fit exactly are stored as strings.
+
+    Users and loans are never removed, so their IDs are 1 to their count.
+    Authorized users are stored with their IDs, since deleted ones leave gaps.
+    """
+    @staticmethod
+    def counts(user_repository, loan_repository, authorized_user_repository):
+        """Count the records to save
+
+        Repositories can keep being written while save runs in another thread
+        as long as the counts are taken between operations, since records are
+        never changed once created. Authorized users can be deleted, though,
+        so the snapshot has those that exist when save reads them; deletes
+        after the counts are taken are also in the log replayed onto it.
+
+        @:returns: Tuple of numbers of users and loans and of the last
+        authorized user ID
+        """
+        # Deleted authorized users leave gaps, so save every ID assigned so far
+        return user_repository.count(), loan_repository.count(), authorized_user_repository.next_id - 1
+
+    @staticmethod
+    def save(path: str, user_repository, loan_repository, authorized_user_repository, counts):
+        """Save the repositories to a snapshot file
+
+        The file is written next to the path, fsynced and then renamed, so a
+        crash never leaves a partial snapshot at the path.
+
+        @:param path: Path of snapshot file
+        @:param counts: Numbers of records to save (see counts)
+        """
+        user_count, loan_count, authorized_user_count = counts
+        arrays = {}
+
+        usernames = [user_repository.read(user_id).username.encode() for user_id in range(1, user_count + 1)]
+        arrays['username_offsets'] = RepositorySnapshot._offsets(usernames)
+        arrays['usernames'] = np.frombuffer(b''.join(usernames), dtype=np.uint8)
+
+        inexact_terms = {}
+        if isinstance(loan_repository, ColumnarLoanRepository):
+            columns = loan_repository.columns()
+            for name in ['user_id', 'amount_cents', 'amount_exponent', 'term_months', 'interest_rate_bp',
+                         'interest_rate_exponent']:
+                arrays[name] = columns[name][:loan_count]
+            for loan_id in loan_repository.inexact_loan_ids():
+                if loan_id <= loan_count:
+                    inexact_terms[loan_id] = loan_repository.inexact_terms[loan_id]
+        else:
+            loans = [loan_repository.read(loan_id) for loan_id in range(1, loan_count + 1)]
+            amounts = [ColumnarLoanRepository._to_fixed_point(loan.amount, AMOUNT_DIGITS) for loan in loans]
+            interest_rates = [
+                ColumnarLoanRepository._to_fixed_point(loan.interest_rate, INTEREST_RATE_DIGITS) for loan in loans
+            ]
+            arrays['user_id'] = np.array([loan.user_id for loan in loans], dtype=np.int64)
+            arrays['amount_cents'] = np.array([cents for cents, _, _ in amounts], dtype=np.int64)
+            arrays['amount_exponent'] = np.array([exponent for _, exponent, _ in amounts], dtype=np.int8)
+            arrays['term_months'] = np.array([loan.term_months for loan in loans], dtype=np.int32)
+            arrays['interest_rate_bp'] = np.array([basis_points for basis_points, _, _ in interest_rates],
+                                                  dtype=np.int32)
+            arrays['interest_rate_exponent'] = np.array([exponent for _, exponent, _ in interest_rates],
+                                                        dtype=np.int8)
+            for loan, (_, _, amount_exact), (_, _, interest_rate_exact) in zip(loans, amounts, interest_rates):
+                if not (amount_exact and interest_rate_exact):
+                    inexact_terms[loan.loan_id] = (loan.amount, loan.interest_rate)
+
+        inexact_loan_ids = sorted(inexact_terms)
+        inexact_strings = ['{} {}'.format(*inexact_terms[loan_id]).encode() for loan_id in inexact_loan_ids]
+        arrays['inexact_loan_ids'] = np.array(inexact_loan_ids, dtype=np.int64)
+        arrays['inexact_offsets'] = RepositorySnapshot._offsets(inexact_strings)
+        arrays['inexact_terms'] = np.frombuffer(b''.join(inexact_strings), dtype=np.uint8)
+
+        authorized_users = [
+            authorized_user for authorized_user in (
+                authorized_user_repository.read(authorized_user_id)
+                for authorized_user_id in range(1, authorized_user_count + 1))
+            if authorized_user is not None
+        ]
+        arrays['authorized_user_id'] = np.array(
+            [authorized_user.authorized_user_id for authorized_user in authorized_users], dtype=np.int64)
+        arrays['authorized_user_loan_id'] = np.array(
+            [authorized_user.loan_id for authorized_user in authorized_users], dtype=np.int64)
+        arrays['authorized_user_user_id'] = np.array(
+            [authorized_user.user_id for authorized_user in authorized_users], dtype=np.int64)
+
+        sizes = (user_count, len(arrays['usernames']), loan_count, len(inexact_loan_ids),
+                 len(arrays['inexact_terms']), len(authorized_users), authorized_user_count + 1)
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            file.write(bytes(SNAPSHOT_HEADER.size))
+            crc = 0
+            for name, dtype, length in RepositorySnapshot._sections(sizes):
+                data = np.ascontiguousarray(arrays[name], dtype=dtype).tobytes() + bytes(
+                    RepositorySnapshot._padding(length * np.dtype(dtype).itemsize))
+                crc = zlib.crc32(data, crc)
+                file.write(data)
+            file.seek(0)
+            file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, crc, *sizes))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path: str, user_repository, loan_repository, authorized_user_repository):
+        """Load a snapshot file into empty repositories
+
+        @:param path: Path of snapshot file
+        @:raises: Exception if the file isn't a valid snapshot
+        """
+        with open(path, 'rb') as file:
+            snapshot = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            RepositorySnapshot._load(snapshot, user_repository, loan_repository, authorized_user_repository)
+        finally:
+            snapshot.close()
+
+    @staticmethod
+    def _load(snapshot: mmap.mmap, user_repository, loan_repository, authorized_user_repository):
+        if len(snapshot) < SNAPSHOT_HEADER.size:
+            raise Exception('snapshot is truncated')
+        magic, version, crc, *sizes = SNAPSHOT_HEADER.unpack_from(snapshot)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise Exception('unknown snapshot format')
+        with memoryview(snapshot) as data:
+            if zlib.crc32(data[SNAPSHOT_HEADER.size:]) != crc:
+                raise Exception('snapshot is corrupt')
+
+        arrays = RepositorySnapshot._map_arrays(snapshot, sizes)
+        try:
+            RepositorySnapshot._load_records(
+                arrays, sizes[-1], user_repository, loan_repository, authorized_user_repository)
+        finally:
+            # Views of the snapshot must be released before it is closed
+            arrays.clear()
+
+    @staticmethod
+    def _map_arrays(snapshot: mmap.mmap, sizes):
+        """Get numpy views of each array in a snapshot
+
+        @:returns: Dictionary of section name to array
+        @:raises: Exception if the snapshot isn't the size of its arrays
+        """
+        sections = []
+        position = SNAPSHOT_HEADER.size
+        for name, dtype, length in RepositorySnapshot._sections(sizes):
+            sections.append((name, dtype, length, position))
+            length *= np.dtype(dtype).itemsize
+            position += length + RepositorySnapshot._padding(length)
+        if position != len(snapshot):
+            raise Exception('snapshot is truncated')
+        return {
+            name: np.frombuffer(snapshot, dtype=dtype, count=length, offset=position)
+            for name, dtype, length, position in sections
+        }
+
+    @staticmethod
+    def _load_records(arrays, authorized_user_next_id: int, user_repository, loan_repository,
+                      authorized_user_repository):
+        """Create the records of a snapshot's arrays in the repositories"""
+        usernames = arrays['usernames'].tobytes()
+        username_offsets = arrays['username_offsets'].tolist()
+        user_repository.create_many([
+            User(user_id=0, username=usernames[start:end].decode())
+            for start, end in zip(username_offsets, username_offsets[1:])
+        ])
+
+        inexact_terms = {}
+        inexact_strings = arrays['inexact_terms'].tobytes()
+        inexact_offsets = arrays['inexact_offsets'].tolist()
+        for loan_id, start, end in zip(arrays['inexact_loan_ids'].tolist(), inexact_offsets, inexact_offsets[1:]):
+            amount, interest_rate = inexact_strings[start:end].decode().split(' ')
+            inexact_terms[loan_id] = (Decimal(amount), Decimal(interest_rate))
+        if isinstance(loan_repository, ColumnarLoanRepository):
+            loan_repository.load_columns({
+                name: arrays[name] for name in ['user_id', 'amount_cents', 'amount_exponent', 'term_months',
+                                                'interest_rate_bp', 'interest_rate_exponent']
+            }, inexact_terms)
+        else:
+            loan_repository.create_many(RepositorySnapshot._build_loans(arrays, inexact_terms))
+
+        authorized_user_repository.load([
+            AuthorizedUser(authorized_user_id=authorized_user_id, loan_id=loan_id, user_id=user_id)
+            for authorized_user_id, loan_id, user_id in zip(arrays['authorized_user_id'].tolist(),
+                                                            arrays['authorized_user_loan_id'].tolist(),
+                                                            arrays['authorized_user_user_id'].tolist())
+        ], authorized_user_next_id)
+
+    @staticmethod
+    def _build_loans(arrays, inexact_terms):
+        """Build loan objects from the loan columns"""
+        # Few distinct interest rates, so each is only converted once
+        interest_rates = {}
+        loans = []
+        for loan_id, (user_id, amount_cents, amount_exponent, term_months, interest_rate_bp,
+                      interest_rate_exponent) in enumerate(zip(
+                arrays['user_id'].tolist(), arrays['amount_cents'].tolist(), arrays['amount_exponent'].tolist(),
+                arrays['term_months'].tolist(), arrays['interest_rate_bp'].tolist(),
+                arrays['interest_rate_exponent'].tolist()), 1):
+            if loan_id in inexact_terms:
+                amount, interest_rate = inexact_terms[loan_id]
+            else:
+                amount = ColumnarLoanRepository._from_fixed_point(amount_cents, amount_exponent, AMOUNT_DIGITS)
+                interest_rate = interest_rates.get((interest_rate_bp, interest_rate_exponent))
+                if interest_rate is None:
+                    interest_rate = ColumnarLoanRepository._from_fixed_point(
+                        interest_rate_bp, interest_rate_exponent, INTEREST_RATE_DIGITS)
+                    interest_rates[interest_rate_bp, interest_rate_exponent] = interest_rate
+            loans.append(Loan(
+                loan_id=0,
+                user_id=user_id,
+                amount=amount,
+                term_months=term_months,
+                interest_rate=interest_rate,
+                authorized_user_ids=[]))
+        return loans
+
+    @staticmethod
+    def _sections(sizes):
+        """Get the name, numpy type and length of each array in a snapshot"""
+        (user_count, username_bytes, loan_count, inexact_count, inexact_bytes, authorized_user_count,
+         _) = sizes
+        return [
+            ('username_offsets', '<i8', user_count + 1),
+            ('usernames', 'u1', username_bytes),
+            ('user_id', '<i8', loan_count),
+            ('amount_cents', '<i8', loan_count),
+            ('amount_exponent', 'i1', loan_count),
+            ('term_months', '<i4', loan_count),
+            ('interest_rate_bp', '<i4', loan_count),
+            ('interest_rate_exponent', 'i1', loan_count),
+            ('inexact_loan_ids', '<i8', inexact_count),
+            ('inexact_offsets', '<i8', inexact_count + 1),
+            ('inexact_terms', 'u1', inexact_bytes),
+            ('authorized_user_id', '<i8', authorized_user_count),
+            ('authorized_user_loan_id', '<i8', authorized_user_count),
+            ('authorized_user_user_id', '<i8', authorized_user_count)
+        ]
+
+    @staticmethod
+    def _offsets(strings):
+        """Get the offsets of each string in the strings joined together"""
+        offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+        np.cumsum(np.array([len(string) for string in strings], dtype=np.int64), out=offsets[1:])
+        return offsets
+
+    @staticmethod
+    def _padding(length: int):
+        return -length % SECTION_ALIGNMENT
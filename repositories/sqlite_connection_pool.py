@@ -0,0 +1,118 @@
+"""Pool of SQLite connections shared by the SQLite repositories"""
+import contextlib
+import queue
+import sqlite3
+
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_BUSY_TIMEOUT_SECONDS = 30
+
+SCHEMA = '''
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS loans (
+    loan_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    amount TEXT NOT NULL,
+    term_months INTEGER NOT NULL,
+    interest_rate TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS loans_user_id ON loans (user_id);
+CREATE TABLE IF NOT EXISTS authorized_users (
+    authorized_user_id INTEGER PRIMARY KEY,
+    loan_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS authorized_users_loan_id ON authorized_users (loan_id);
+CREATE INDEX IF NOT EXISTS authorized_users_user_id_loan_id ON authorized_users (user_id, loan_id);
+COMMIT;
+'''
+
+
+class SqliteConnectionPool:
+    """Pool of SQLite connections shared by the SQLite repositories
+
+    Connections are opened in autocommit mode with write-ahead logging so
+    readers don't block the writer, and each keeps a cache of prepared
+    statements (the repositories only use fixed SQL with parameters, so every
+    query after the first reuses its compiled statement).
+
+    The database must be a file: every connection to ':memory:' would get its
+    own empty database.
+
+    Several processes (such as uvicorn workers) can each open a pool on the
+    same file. SQLite serializes their writes, waiting up to the busy timeout
+    for the write lock, and IDs are allocated by SQLite as rows are inserted
+    so they are unique across processes.
+    """
+    def __init__(
+            self,
+            path: str,
+            size: int = DEFAULT_POOL_SIZE,
+            busy_timeout_seconds: float = DEFAULT_BUSY_TIMEOUT_SECONDS):
+        """Open the connections and create the schema if missing
+
+        @:param path: Path of database file
+        @:param size: Number of connections
+        @:param busy_timeout_seconds: Time to wait for another connection or
+        process to release a lock
+        """
+        self.path = path
+        self.size = size
+        self.connections = queue.Queue()
+        for _ in range(size):
+            self.connections.put(SqliteConnectionPool._connect(path, busy_timeout_seconds))
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection, waiting for one if all are in use
+
+        @:returns: Context manager giving a sqlite3 connection
+        """
+        connection = self.connections.get()
+        try:
+            yield connection
+        finally:
+            self.connections.put(connection)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Borrow a connection inside a write transaction
+
+        The transaction takes the database write lock immediately, so nothing
+        else can write until it is committed (or rolled back on an exception).
+
+        @:returns: Context manager giving a sqlite3 connection
+        """
+        with self.connection() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def close(self):
+        """Close all connections (waiting for borrowed connections)"""
+        for _ in range(self.size):
+            self.connections.get().close()
+
+    @staticmethod
+    def _connect(path: str, busy_timeout_seconds: float):
+        connection = sqlite3.connect(
+            path,
+            timeout=busy_timeout_seconds,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=64)
+        connection.execute('PRAGMA journal_mode = WAL')
+        # With WAL, NORMAL only syncs at checkpoints; a power loss can lose
+        # the last commits but never corrupts the database
+        connection.execute('PRAGMA synchronous = NORMAL')
+        return connection
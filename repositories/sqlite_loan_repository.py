@@ -0,0 +1,136 @@
+"""SQLite-based loan repository"""
+import json
+from decimal import Decimal
+from models import Loan
+from .sqlite_connection_pool import SqliteConnectionPool
+
+
+class SqliteLoanRepository:
+    """SQLite-based loan repository
+
+    Amounts and interest rates are stored as text so they read back as the
+    same Decimals they were created with.
+    """
+    def __init__(self, pool: SqliteConnectionPool):
+        """Create a loan repository
+
+        @:param pool: Connection pool of database to use
+        """
+        self.pool = pool
+
+    def create(self, loan: Loan):
+        """Create a new loan
+
+        Autoincrement ID will be assigned to the loan object.
+
+        @:param user: Loan object to create
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.execute(
+                'INSERT INTO loans (user_id, amount, term_months, interest_rate) VALUES (?, ?, ?, ?)',
+                (loan.user_id, str(loan.amount), loan.term_months, str(loan.interest_rate)))
+        loan.loan_id = cursor.lastrowid
+
+    def create_many(self, loans):
+        """Create new loans
+
+        A contiguous block of autoincrement IDs will be assigned to the loan
+        objects in order.
+
+        @:param loans: List of loan objects to create
+        """
+        with self.pool.transaction() as connection:
+            first_id = connection.execute('SELECT COALESCE(MAX(loan_id), 0) + 1 FROM loans').fetchone()[0]
+            connection.executemany(
+                'INSERT INTO loans (loan_id, user_id, amount, term_months, interest_rate) VALUES (?, ?, ?, ?, ?)',
+                [(loan_id, loan.user_id, str(loan.amount), loan.term_months, str(loan.interest_rate))
+                 for loan_id, loan in enumerate(loans, first_id)])
+        for loan_id, loan in enumerate(loans, first_id):
+            loan.loan_id = loan_id
+
+    def read(self, loan_id: int):
+        """Read loan from the repository.
+        @:param loan_id: ID of loan to read
+        @:returns: Loan object
+        """
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                'SELECT loan_id, user_id, amount, term_months, interest_rate FROM loans WHERE loan_id = ?',
+                (loan_id,)).fetchone()
+        if row is None:
+            return None
+        return SqliteLoanRepository._to_loan(row)
+
+    def read_many(self, loan_ids):
+        """Read many loans from the repository at once.
+
+        The loan IDs are passed as one JSON array parameter so the same
+        prepared statement is used whatever the number of loans.
+
+        @:param loan_ids: Iterable of loan IDs to read
+        @:returns: List of the loans that exist, in the order of the loan IDs
+        """
+        loan_ids = list(loan_ids)
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT loan_id, user_id, amount, term_months, interest_rate FROM loans '
+                'WHERE loan_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(loan_ids),)).fetchall()
+        return SqliteLoanRepository._to_loans_in_order(rows, loan_ids)
+
+    def exists_many(self, loan_ids):
+        """Check which loans exist in the repository.
+        @:param loan_ids: Iterable of loan IDs to check
+        @:returns: Set of the loan IDs that exist"""
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT loan_id FROM loans WHERE loan_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(loan_ids)),)).fetchall()
+        return {row[0] for row in rows}
+
+    def read_loans_for_user_id(self, user_id: int):
+        """Read all loans from the repository of a given user ID.
+        @:param user_id: ID of user to read loans from
+        @:returns: New list of loan objects
+        """
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT loan_id, user_id, amount, term_months, interest_rate FROM loans WHERE user_id = ? '
+                'ORDER BY loan_id',
+                (user_id,)).fetchall()
+        return [SqliteLoanRepository._to_loan(row) for row in rows]
+
+    def read_loan_ids_after(self, user_id: int, after_loan_id: int, limit: int):
+        """Read loan IDs of a given user ID in ascending order, starting after a loan ID.
+        @:param user_id: ID of user to read loan IDs from
+        @:param after_loan_id: Only loan IDs greater than this are read (0 for all)
+        @:param limit: Maximum number of loan IDs to read
+        @:returns: List of loan IDs
+        """
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT loan_id FROM loans WHERE user_id = ? AND loan_id > ? ORDER BY loan_id LIMIT ?',
+                (user_id, after_loan_id, limit)).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self):
+        """Count loans in the repository.
+        @:returns: Number of loans"""
+        with self.pool.connection() as connection:
+            return connection.execute('SELECT COUNT(*) FROM loans').fetchone()[0]
+
+    @staticmethod
+    def _to_loans_in_order(rows, loan_ids):
+        loans = {row[0]: row for row in rows}
+        return [SqliteLoanRepository._to_loan(loans[loan_id]) for loan_id in loan_ids if loan_id in loans]
+
+    @staticmethod
+    def _to_loan(row):
+        loan_id, user_id, amount, term_months, interest_rate = row
+        return Loan(
+            loan_id=loan_id,
+            user_id=user_id,
+            amount=Decimal(amount),
+            term_months=term_months,
+            interest_rate=Decimal(interest_rate),
+            authorized_user_ids=[])
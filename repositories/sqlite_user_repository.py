@@ -0,0 +1,75 @@
+"""SQLite-based user repository"""
+import json
+from models.user import User
+from .sqlite_connection_pool import SqliteConnectionPool
+
+
+class SqliteUserRepository:
+    """SQLite-based user repository"""
+    def __init__(self, pool: SqliteConnectionPool):
+        """Create a user repository
+
+        @:param pool: Connection pool of database to use
+        """
+        self.pool = pool
+
+    def create(self, user: User):
+        """Create a new user
+
+        Autoincrement ID will be assigned to the user object.
+
+        @:param user: User object to create
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.execute('INSERT INTO users (username) VALUES (?)', (user.username,))
+        user.user_id = cursor.lastrowid
+
+    def create_many(self, users):
+        """Create new users
+
+        A contiguous block of autoincrement IDs will be assigned to the user
+        objects in order.
+
+        @:param users: List of user objects to create
+        """
+        with self.pool.transaction() as connection:
+            first_id = connection.execute('SELECT COALESCE(MAX(user_id), 0) + 1 FROM users').fetchone()[0]
+            connection.executemany(
+                'INSERT INTO users (user_id, username) VALUES (?, ?)',
+                [(user_id, user.username) for user_id, user in enumerate(users, first_id)])
+        for user_id, user in enumerate(users, first_id):
+            user.user_id = user_id
+
+    def read(self, user_id: int):
+        """Read user from the repository.
+        @:param user_id: ID of user to read
+        @:returns: User object
+        """
+        with self.pool.connection() as connection:
+            row = connection.execute('SELECT username FROM users WHERE user_id = ?', (user_id,)).fetchone()
+        if row is None:
+            return None
+        return User(user_id=user_id, username=row[0])
+
+    def exists(self, user_id: int):
+        """Check if user exists in the repository.
+        @:param user_ud: ID of user to check
+        @:returns: True if user of that ID exists; false otherwise"""
+        with self.pool.connection() as connection:
+            return connection.execute('SELECT 1 FROM users WHERE user_id = ?', (user_id,)).fetchone() is not None
+
+    def exists_many(self, user_ids):
+        """Check which users exist in the repository.
+        @:param user_ids: Iterable of user IDs to check
+        @:returns: Set of the user IDs that exist"""
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                'SELECT user_id FROM users WHERE user_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(user_ids)),)).fetchall()
+        return {row[0] for row in rows}
+
+    def count(self):
+        """Count users in the repository.
+        @:returns: Number of users"""
+        with self.pool.connection() as connection:
+            return connection.execute('SELECT COUNT(*) FROM users').fetchone()[0]
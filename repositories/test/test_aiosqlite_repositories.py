@@ -0,0 +1,148 @@
+"""Tests for the aiosqlite repositories"""
+import asyncio
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+from repositories import AiosqliteAuthorizedUserRepository,\
+    AiosqliteConnectionPool,\
+    AiosqliteLoanRepository,\
+    AiosqliteUserRepository,\
+    SqliteConnectionPool,\
+    SqliteUserRepository
+
+
+def new_loan(user_id: int, amount: str = '1000.00'):
+    return Loan(
+        loan_id=0,
+        user_id=user_id,
+        amount=Decimal(amount),
+        term_months=12,
+        interest_rate=Decimal('0.1000'),
+        authorized_user_ids=[])
+
+
+class TestAiosqliteRepositories(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'loans.db')
+        self.pool = AiosqliteConnectionPool(self.path)
+        await self.pool.open()
+        self.user_repository = AiosqliteUserRepository(self.pool)
+        self.loan_repository = AiosqliteLoanRepository(self.pool)
+        self.authorized_user_repository = AiosqliteAuthorizedUserRepository(self.pool)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        self.directory.cleanup()
+
+    async def create_user(self, username: str):
+        user = User(user_id=0, username=username)
+        await self.user_repository.create(user)
+        return user.user_id
+
+    async def create_loan(self, user_id: int, amount: str = '1000.00'):
+        loan = new_loan(user_id, amount)
+        await self.loan_repository.create(loan)
+        return loan.loan_id
+
+    async def create_authorized_user(self, user_id: int, loan_id: int):
+        authorized_user = AuthorizedUser(authorized_user_id=0, loan_id=loan_id, user_id=user_id)
+        await self.authorized_user_repository.create(authorized_user)
+        return authorized_user.authorized_user_id
+
+    async def test_users(self):
+        self.assertEqual(1, await self.create_user('alice'))
+        users = [User(user_id=0, username='user{}'.format(index)) for index in range(3)]
+        await self.user_repository.create_many(users)
+        self.assertEqual([2, 3, 4], [user.user_id for user in users])
+        self.assertEqual(User(user_id=1, username='alice'), await self.user_repository.read(1))
+        self.assertIsNone(await self.user_repository.read(5))
+        self.assertTrue(await self.user_repository.exists(1))
+        self.assertFalse(await self.user_repository.exists(5))
+        self.assertEqual({2, 4}, await self.user_repository.exists_many([2, 4, 5]))
+        self.assertEqual(4, await self.user_repository.count())
+
+    async def test_loans(self):
+        user_id = await self.create_user('alice')
+        loan_ids = [await self.create_loan(user_id, '1000'), await self.create_loan(user_id, '2000.50')]
+        loans = [new_loan(user_id) for _ in range(2)]
+        await self.loan_repository.create_many(loans)
+        self.assertEqual([1, 2, 3, 4], loan_ids + [loan.loan_id for loan in loans])
+
+        loan = await self.loan_repository.read(2)
+        self.assertEqual('2000.50', str(loan.amount))
+        self.assertEqual('0.1000', str(loan.interest_rate))
+        self.assertIsNone(await self.loan_repository.read(5))
+        self.assertEqual({1, 3}, await self.loan_repository.exists_many([1, 3, 5]))
+        self.assertEqual(
+            [await self.loan_repository.read(loan_id) for loan_id in [3, 1, 2]],
+            await self.loan_repository.read_many([3, 5, 1, 2]))
+        self.assertEqual(
+            [1, 2, 3, 4], [loan.loan_id for loan in await self.loan_repository.read_loans_for_user_id(user_id)])
+        self.assertEqual([3, 4], await self.loan_repository.read_loan_ids_after(user_id, 2, 10))
+        self.assertEqual(4, await self.loan_repository.count())
+
+    async def test_authorized_users(self):
+        owner_id = await self.create_user('alice')
+        user_ids = [await self.create_user('bob'), await self.create_user('carol')]
+        loan_ids = [await self.create_loan(owner_id), await self.create_loan(owner_id)]
+        for user_id in user_ids:
+            await self.create_authorized_user(user_id, loan_ids[0])
+        await self.create_authorized_user(user_ids[0], loan_ids[1])
+        # Duplicates are merged into the existing authorized user
+        self.assertEqual(1, await self.create_authorized_user(user_ids[0], loan_ids[0]))
+
+        repository = self.authorized_user_repository
+        self.assertEqual(3, await repository.count())
+        self.assertEqual(
+            AuthorizedUser(authorized_user_id=1, loan_id=loan_ids[0], user_id=user_ids[0]),
+            await repository.read(1))
+        self.assertEqual(
+            AuthorizedUser(authorized_user_id=3, loan_id=loan_ids[1], user_id=user_ids[0]),
+            await repository.read_by_loan_id_and_user_id(loan_ids[1], user_ids[0]))
+        self.assertEqual(user_ids, await repository.read_authorized_user_ids(loan_ids[0]))
+        self.assertEqual(loan_ids, await repository.read_loan_ids_by_user_id(user_ids[0]))
+        self.assertEqual(loan_ids[1:], await repository.read_loan_ids_after(user_ids[0], loan_ids[0], 10))
+        self.assertEqual(
+            {loan_ids[0]: user_ids, loan_ids[1]: [user_ids[0]], 100: []},
+            await repository.read_authorized_user_ids_many(loan_ids + [100]))
+
+        self.assertTrue(await repository.delete(1))
+        self.assertFalse(await repository.delete(1))
+        self.assertEqual([user_ids[1]], await repository.read_authorized_user_ids(loan_ids[0]))
+        self.assertEqual(loan_ids[1:], await repository.read_loan_ids_by_user_id(user_ids[0]))
+
+    async def test_shared_with_sqlite_pool(self):
+        await self.create_user('alice')
+        pool = SqliteConnectionPool(self.path, size=1)
+        try:
+            self.assertEqual(User(user_id=1, username='alice'), SqliteUserRepository(pool).read(1))
+            SqliteUserRepository(pool).create(User(user_id=0, username='bob'))
+        finally:
+            pool.close()
+        self.assertEqual(User(user_id=2, username='bob'), await self.user_repository.read(2))
+
+    async def test_queries_overlap(self):
+        await self.create_user('alice')
+        finished = []
+
+        async def slow_query():
+            async with self.pool.connection() as connection:
+                # Counting to 3 million takes about half a second in SQLite
+                await connection.execute_fetchall(
+                    'WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < 3000000) '
+                    'SELECT COUNT(*) FROM numbers')
+            finished.append('slow')
+
+        async def fast_queries():
+            # The event loop stays free while the slow query runs, and the
+            # other connections answer in the meantime
+            await asyncio.sleep(0.01)
+            for _ in range(10):
+                await self.user_repository.read(1)
+            finished.append('fast')
+
+        await asyncio.gather(slow_query(), fast_queries())
+        self.assertEqual(['fast', 'slow'], finished)
@@ -0,0 +1,94 @@
+"""Tests for ColumnarLoanRepository"""
+import random
+import unittest
+from decimal import Decimal
+from models import Loan
+from repositories import ColumnarLoanRepository, LoanRepository, UserLoansView
+
+
+def new_loan(user_id: int, amount: str = '1000.00', term_months: int = 12, interest_rate: str = '0.1'):
+    return Loan(
+        loan_id=0,
+        user_id=user_id,
+        amount=Decimal(amount),
+        term_months=term_months,
+        interest_rate=Decimal(interest_rate),
+        authorized_user_ids=[])
+
+
+class TestColumnarLoanRepository(unittest.TestCase):
+    def test_same_as_loan_repository(self):
+        generator = random.Random(1)
+        repositories = [LoanRepository(UserLoansView()), ColumnarLoanRepository(UserLoansView())]
+        # Enough loans to rebuild the user index several times, with loans
+        # created both before and after the last rebuild
+        for _ in range(30):
+            loans = [
+                new_loan(
+                    generator.randint(1, 50),
+                    str(Decimal(generator.randint(0, 10000000)).scaleb(-2)),
+                    generator.randint(1, 120),
+                    str(Decimal(generator.randint(600, 3600)).scaleb(-4)))
+                for _ in range(generator.randint(1, 200))
+            ]
+            for repository in repositories:
+                repository.create_many([new_loan(loan.user_id, str(loan.amount), loan.term_months,
+                                                 str(loan.interest_rate)) for loan in loans])
+
+        memory_repository, columnar_repository = repositories
+        self.assertEqual(memory_repository.count(), columnar_repository.count())
+        for loan_id in range(0, memory_repository.count() + 2):
+            self.assertEqual(memory_repository.read(loan_id), columnar_repository.read(loan_id))
+        for user_id in range(0, 52):
+            self.assertEqual(
+                memory_repository.read_loans_for_user_id(user_id),
+                columnar_repository.read_loans_for_user_id(user_id))
+            for after_loan_id, limit in [(0, 5), (1000, 3), (2000, 1000)]:
+                self.assertEqual(
+                    memory_repository.read_loan_ids_after(user_id, after_loan_id, limit),
+                    columnar_repository.read_loan_ids_after(user_id, after_loan_id, limit))
+            self.assertEqual(
+                memory_repository.user_loans_view.read_loan_ids(user_id),
+                columnar_repository.user_loans_view.read_loan_ids(user_id))
+        self.assertEqual({1, 5}, columnar_repository.exists_many([0, 1, 5, memory_repository.count() + 1]))
+        loan_ids = [5, 0, 1, memory_repository.count(), memory_repository.count() + 1]
+        self.assertEqual(memory_repository.read_many(loan_ids), columnar_repository.read_many(loan_ids))
+        self.assertEqual(3, len(columnar_repository.read_many(loan_ids)))
+
+    def test_representation(self):
+        repository = ColumnarLoanRepository()
+        values = [('1000', '0.1'), ('1000.00', '0.1000'), ('1E+3', '0.10'), ('0', '0.06'), ('0.00', '1E-1')]
+        for amount, interest_rate in values:
+            repository.create(new_loan(1, amount, interest_rate=interest_rate))
+        for loan_id, (amount, interest_rate) in enumerate(values, 1):
+            loan = repository.read(loan_id)
+            self.assertEqual(
+                (str(Decimal(amount)), str(Decimal(interest_rate))), (str(loan.amount), str(loan.interest_rate)))
+        self.assertEqual(set(), repository.inexact_loan_ids())
+
+    def test_inexact_terms(self):
+        repository = ColumnarLoanRepository()
+        repository.create(new_loan(1, '1000.005', interest_rate='0.12345'))
+        repository.create(new_loan(1, '-0', interest_rate='0.1'))
+        self.assertEqual({1, 2}, repository.inexact_loan_ids())
+        self.assertEqual('1000.005', str(repository.read(1).amount))
+        self.assertEqual('0.12345', str(repository.read(1).interest_rate))
+        self.assertEqual('-0', str(repository.read(2).amount))
+        self.assertEqual([100001, 0], repository.columns()['amount_cents'].tolist())
+        self.assertEqual([1235, 1000], repository.columns()['interest_rate_bp'].tolist())
+
+    def test_columns(self):
+        repository = ColumnarLoanRepository()
+        repository.create_many([new_loan(user_id, '12.34', 60, '0.0725') for user_id in [3, 1]])
+        columns = repository.columns()
+        self.assertEqual([3, 1], columns['user_id'].tolist())
+        self.assertEqual([1234, 1234], columns['amount_cents'].tolist())
+        self.assertEqual([60, 60], columns['term_months'].tolist())
+        self.assertEqual([725, 725], columns['interest_rate_bp'].tolist())
+        with self.assertRaises(ValueError):
+            columns['amount_cents'][0] = 0
+
+        # Views keep the loans at the time of the call as the columns grow
+        repository.create_many([new_loan(2) for _ in range(5000)])
+        self.assertEqual([3, 1], columns['user_id'].tolist())
+        self.assertEqual(5002, len(repository.columns()['user_id']))
@@ -0,0 +1,210 @@
+"""Tests for RepositoryPersistence"""
+import asyncio
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+from repositories import AuthorizedUserRepository,\
+    ColumnarLoanRepository,\
+    LoanRepository,\
+    OperationLog,\
+    RepositoryPersistence,\
+    UserLoansView,\
+    UserRepository
+
+
+def new_loan(user_id: int, amount: str, interest_rate: str = '0.1'):
+    return Loan(
+        loan_id=0,
+        user_id=user_id,
+        amount=Decimal(amount),
+        term_months=12,
+        interest_rate=Decimal(interest_rate),
+        authorized_user_ids=[])
+
+
+def new_repositories(loan_repository_class=LoanRepository):
+    user_loans_view = UserLoansView()
+    return (UserRepository(),
+            loan_repository_class(user_loans_view),
+            AuthorizedUserRepository(user_loans_view),
+            user_loans_view)
+
+
+def create_records(repositories, offset: int = 0):
+    user_repository, loan_repository, authorized_user_repository, _ = repositories
+    user_repository.create_many([User(user_id=0, username='user{}'.format(offset + index)) for index in range(3)])
+    user_repository.create(User(user_id=0, username='üñíçødé'))
+    # Representations are kept, including terms not fitting the columns
+    for amount, interest_rate in [('1000', '0.1'), ('1000.00', '0.1000'), ('1E+3', '0.06'), ('1000.005', '0.12345')]:
+        loan_repository.create(new_loan(offset % 3 + 1, amount, interest_rate))
+    loan_repository.create_many([new_loan(2, '{}.50'.format(index)) for index in range(5)])
+    authorized_user = AuthorizedUser(authorized_user_id=0, loan_id=1, user_id=2)
+    authorized_user_repository.create(authorized_user)
+    authorized_user_repository.create_many(
+        [AuthorizedUser(authorized_user_id=0, loan_id=loan_id, user_id=3) for loan_id in [2, 2, 4]])
+    # Deleted authorized users leave a gap in the IDs
+    authorized_user_repository.delete(authorized_user.authorized_user_id)
+
+
+class TestRepositoryPersistence(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def persist(self, repositories):
+        persistence = RepositoryPersistence(self.directory.name, *repositories[:3])
+        statistics = persistence.restore()
+        return persistence, statistics
+
+    def assert_same(self, expected, actual):
+        self.assertEqual(expected[2].next_id, actual[2].next_id)
+        for expected_repository, actual_repository in zip(expected[:3], actual[:3]):
+            self.assertEqual(expected_repository.count(), actual_repository.count())
+            for record_id in range(1, getattr(expected_repository, 'next_id', expected_repository.count() + 1)):
+                self.assertEqual(expected_repository.read(record_id), actual_repository.read(record_id))
+                self.assertEqual(str(expected_repository.read(record_id)), str(actual_repository.read(record_id)))
+        for user_id in range(1, expected[0].count() + 1):
+            self.assertEqual(expected[3].read_loan_ids(user_id), actual[3].read_loan_ids(user_id))
+            self.assertEqual(expected[2].read_loan_ids_after(user_id, 0, 100),
+                             actual[2].read_loan_ids_after(user_id, 0, 100))
+
+    def test_restore(self):
+        for loan_repository_class in [LoanRepository, ColumnarLoanRepository]:
+            with self.subTest(loan_repository_class=loan_repository_class.__name__):
+                expected = new_repositories(loan_repository_class)
+                create_records(expected)
+                create_records(expected, 10)
+
+                repositories = new_repositories(loan_repository_class)
+                persistence, statistics = self.persist(repositories)
+                self.assertEqual(0, statistics['replayed_records'])
+                create_records(repositories)
+                persistence.snapshot_now()
+                # Only these are replayed from the log after the snapshot (the
+                # authorized users already on their loans aren't logged again)
+                create_records(repositories, 10)
+                persistence.close()
+
+                restored = new_repositories(loan_repository_class)
+                persistence, statistics = self.persist(restored)
+                self.assertEqual(9, statistics['replayed_records'])
+                self.assert_same(expected, restored)
+
+                # The restored repositories keep logging
+                create_records(expected, 20)
+                create_records(restored, 20)
+                persistence.close()
+                restored = new_repositories(loan_repository_class)
+                self.persist(restored)[0].close()
+                self.assert_same(expected, restored)
+                for file_name in os.listdir(self.directory.name):
+                    os.remove(os.path.join(self.directory.name, file_name))
+
+    def test_snapshot_between_backends(self):
+        repositories = new_repositories(LoanRepository)
+        persistence, _ = self.persist(repositories)
+        create_records(repositories)
+        persistence.snapshot_now()
+        persistence.close()
+
+        restored = new_repositories(ColumnarLoanRepository)
+        self.persist(restored)[0].close()
+        self.assert_same(repositories, restored)
+        self.assertEqual({4}, restored[1].inexact_loan_ids())
+
+    def test_snapshot_replaces_log(self):
+        repositories = new_repositories()
+        persistence, _ = self.persist(repositories)
+        create_records(repositories)
+        asyncio.run(persistence.commit())
+        segment = asyncio.run(persistence.snapshot())
+        persistence.close()
+        self.assertEqual(
+            ['log-{:012d}.bin'.format(segment), 'snapshot-{:012d}.bin'.format(segment)],
+            sorted(os.listdir(self.directory.name)))
+
+    def test_incomplete_record(self):
+        repositories = new_repositories()
+        persistence, _ = self.persist(repositories)
+        create_records(repositories)
+        persistence.close()
+        path = OperationLog.segment_path(self.directory.name, 1)
+        size = os.path.getsize(path)
+        # Crash while writing a record
+        with open(path, 'ab') as file:
+            file.write(b'\x02\xff\x00')
+
+        restored = new_repositories()
+        persistence, statistics = self.persist(restored)
+        self.assertEqual(size, os.path.getsize(path))
+        self.assertEqual(10, statistics['replayed_records'])
+        self.assert_same(repositories, restored)
+        persistence.close()
+
+    def test_corrupt_snapshot(self):
+        repositories = new_repositories()
+        persistence, _ = self.persist(repositories)
+        create_records(repositories)
+        segment = persistence.snapshot_now()
+        persistence.close()
+        path = os.path.join(self.directory.name, 'snapshot-{:012d}.bin'.format(segment))
+        with open(path, 'r+b') as file:
+            file.seek(100)
+            file.write(b'\xff')
+        with self.assertRaises(Exception):
+            self.persist(new_repositories())
+
+    def test_group_commit(self):
+        repositories = new_repositories()
+        persistence, _ = self.persist(repositories)
+        user_repository = repositories[0]
+
+        async def create_users():
+            for index in range(20):
+                user_repository.create(User(user_id=0, username='user'))
+                await persistence.commit()
+
+        async def run():
+            await asyncio.gather(*(create_users() for _ in range(10)))
+
+        asyncio.run(run())
+        operation_log = persistence.operation_log
+        self.assertEqual(200, operation_log.durable_records)
+        # Commits waiting on the same flush share its fsync
+        self.assertLess(operation_log.flushes, 200)
+        persistence.close()
+
+        restored = new_repositories()
+        self.persist(restored)[0].close()
+        self.assertEqual(200, restored[0].count())
+
+    def test_failed_flush(self):
+        repositories = new_repositories()
+        persistence, _ = self.persist(repositories)
+        operation_log = persistence.operation_log
+        file = operation_log.file
+
+        class FullFile:
+            def write(self, data):
+                raise OSError(28, 'No space left on device')
+
+            def __getattr__(self, name):
+                return getattr(file, name)
+
+        operation_log.file = FullFile()
+        repositories[0].create(User(user_id=0, username='user'))
+        with self.assertRaises(OSError):
+            asyncio.run(persistence.commit())
+        operation_log.file = file
+
+        # Records lost with the failed write are never reported durable
+        repositories[0].create(User(user_id=0, username='user'))
+        with self.assertRaises(Exception):
+            asyncio.run(persistence.commit())
+        with self.assertRaises(Exception):
+            operation_log.rotate()
+        self.assertEqual(0, operation_log.durable_records)
+        with self.assertRaises(Exception):
+            persistence.close()
@@ -0,0 +1,202 @@
+"""Tests for the SQLite repositories"""
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from models import AuthorizedUser, Loan, User
+from repositories import SqliteAuthorizedUserRepository,\
+    SqliteConnectionPool,\
+    SqliteLoanRepository,\
+    SqliteUserRepository
+from services import GetUserLoansService
+
+
+def create_loans_in_process(path: str, user_id: int, count: int):
+    """Create loans through a separate pool, as another worker process would"""
+    pool = SqliteConnectionPool(path, size=1)
+    loan_repository = SqliteLoanRepository(pool)
+    loan_ids = []
+    for _ in range(count):
+        loan = Loan(
+            loan_id=0,
+            user_id=user_id,
+            amount=Decimal('1000.00'),
+            term_months=12,
+            interest_rate=Decimal('0.1'),
+            authorized_user_ids=[])
+        loan_repository.create(loan)
+        loan_ids.append(loan.loan_id)
+    pool.close()
+    return loan_ids
+
+
+class TestSqliteRepositories(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'loans.db')
+        self.pool = SqliteConnectionPool(self.path)
+        self.user_repository = SqliteUserRepository(self.pool)
+        self.loan_repository = SqliteLoanRepository(self.pool)
+        self.authorized_user_repository = SqliteAuthorizedUserRepository(self.pool)
+
+    def tearDown(self):
+        self.pool.close()
+        self.directory.cleanup()
+
+    def create_user(self, username: str):
+        user = User(user_id=0, username=username)
+        self.user_repository.create(user)
+        return user.user_id
+
+    def create_loan(self, user_id: int, amount: str = '1000.00'):
+        loan = Loan(
+            loan_id=0,
+            user_id=user_id,
+            amount=Decimal(amount),
+            term_months=12,
+            interest_rate=Decimal('0.1000'),
+            authorized_user_ids=[])
+        self.loan_repository.create(loan)
+        return loan.loan_id
+
+    def create_authorized_user(self, user_id: int, loan_id: int):
+        authorized_user = AuthorizedUser(authorized_user_id=0, loan_id=loan_id, user_id=user_id)
+        self.authorized_user_repository.create(authorized_user)
+        return authorized_user.authorized_user_id
+
+    def test_users(self):
+        user_id = self.create_user('alice')
+        self.assertEqual(1, user_id)
+        self.assertEqual(User(user_id=1, username='alice'), self.user_repository.read(user_id))
+        self.assertTrue(self.user_repository.exists(user_id))
+        self.assertFalse(self.user_repository.exists(2))
+        self.assertIsNone(self.user_repository.read(2))
+
+    def test_loans(self):
+        user_id = self.create_user('alice')
+        loan_ids = [self.create_loan(user_id, '1000'), self.create_loan(user_id, '2000.50')]
+        self.assertEqual([1, 2], loan_ids)
+
+        loan = self.loan_repository.read(2)
+        self.assertEqual('2000.50', str(loan.amount))
+        self.assertEqual('0.1000', str(loan.interest_rate))
+        self.assertEqual(12, loan.term_months)
+        self.assertIsNone(self.loan_repository.read(3))
+        self.assertEqual(loan_ids, [loan.loan_id for loan in self.loan_repository.read_loans_for_user_id(user_id)])
+        self.assertEqual([], self.loan_repository.read_loans_for_user_id(100))
+        self.assertEqual([2], self.loan_repository.read_loan_ids_after(user_id, 1, 10))
+        self.assertEqual([1], self.loan_repository.read_loan_ids_after(user_id, 0, 1))
+
+    def test_authorized_users(self):
+        owner_id = self.create_user('alice')
+        user_ids = [self.create_user('bob'), self.create_user('carol')]
+        loan_ids = [self.create_loan(owner_id), self.create_loan(owner_id)]
+        for user_id in user_ids:
+            self.create_authorized_user(user_id, loan_ids[0])
+        self.create_authorized_user(user_ids[0], loan_ids[1])
+
+        self.assertEqual(
+            AuthorizedUser(authorized_user_id=1, loan_id=loan_ids[0], user_id=user_ids[0]),
+            self.authorized_user_repository.read(1))
+        self.assertEqual(user_ids, self.authorized_user_repository.read_authorized_user_ids(loan_ids[0]))
+        self.assertEqual(loan_ids, self.authorized_user_repository.read_loan_ids_by_user_id(user_ids[0]))
+        self.assertEqual(loan_ids[1:], self.authorized_user_repository.read_loan_ids_after(user_ids[0], loan_ids[0], 10))
+        self.assertEqual(
+            {loan_ids[0]: user_ids, loan_ids[1]: [user_ids[0]], 100: []},
+            self.authorized_user_repository.read_authorized_user_ids_many(loan_ids + [100]))
+
+    def test_delete_authorized_users(self):
+        owner_id = self.create_user('alice')
+        user_id = self.create_user('bob')
+        loan_ids = [self.create_loan(owner_id), self.create_loan(owner_id)]
+        authorized_user_ids = [self.create_authorized_user(user_id, loan_id) for loan_id in loan_ids]
+        # Duplicates are merged into the existing authorized user
+        self.assertEqual(authorized_user_ids[0], self.create_authorized_user(user_id, loan_ids[0]))
+        authorized_users = [AuthorizedUser(authorized_user_id=0, loan_id=loan_ids[1], user_id=owner_id)
+                            for _ in range(2)]
+        self.authorized_user_repository.create_many(authorized_users)
+        self.assertEqual([3, 3], [authorized_user.authorized_user_id for authorized_user in authorized_users])
+        self.assertEqual(3, self.authorized_user_repository.count())
+        self.assertEqual(
+            AuthorizedUser(authorized_user_id=authorized_user_ids[1], loan_id=loan_ids[1], user_id=user_id),
+            self.authorized_user_repository.read_by_loan_id_and_user_id(loan_ids[1], user_id))
+
+        self.assertTrue(self.authorized_user_repository.delete(authorized_user_ids[0]))
+        self.assertFalse(self.authorized_user_repository.delete(authorized_user_ids[0]))
+        self.assertIsNone(self.authorized_user_repository.read_by_loan_id_and_user_id(loan_ids[0], user_id))
+        self.assertEqual([], self.authorized_user_repository.read_authorized_user_ids(loan_ids[0]))
+        self.assertEqual(loan_ids[1:], self.authorized_user_repository.read_loan_ids_by_user_id(user_id))
+        self.assertEqual(loan_ids[1:], self.authorized_user_repository.read_loan_ids_after(user_id, 0, 10))
+
+    def test_create_many(self):
+        self.create_user('alice')
+        users = [User(user_id=0, username='user{}'.format(index)) for index in range(3)]
+        self.user_repository.create_many(users)
+        self.assertEqual([2, 3, 4], [user.user_id for user in users])
+        self.assertEqual({2, 4}, self.user_repository.exists_many([2, 4, 5]))
+
+        loans = [
+            Loan(loan_id=0, user_id=user.user_id, amount=Decimal('1.00'), term_months=1,
+                 interest_rate=Decimal('0.1'), authorized_user_ids=[])
+            for user in users
+        ]
+        self.loan_repository.create_many(loans)
+        self.assertEqual([1, 2, 3], [loan.loan_id for loan in loans])
+        self.assertEqual({1, 3}, self.loan_repository.exists_many([1, 3, 4]))
+        self.assertEqual([3, 1], [loan.loan_id for loan in self.loan_repository.read_many([3, 4, 1])])
+        self.assertEqual(4, self.loan_repository.read(3).user_id)
+
+        authorized_users = [AuthorizedUser(authorized_user_id=0, loan_id=1, user_id=user.user_id) for user in users]
+        self.authorized_user_repository.create_many(authorized_users)
+        self.assertEqual([1, 2, 3], [authorized_user.authorized_user_id for authorized_user in authorized_users])
+        self.assertEqual([2, 3, 4], self.authorized_user_repository.read_authorized_user_ids(1))
+
+    def test_get_user_loans(self):
+        owner_id = self.create_user('alice')
+        other_id = self.create_user('bob')
+        owned_loan_id = self.create_loan(owner_id)
+        shared_loan_id = self.create_loan(other_id)
+        self.create_authorized_user(owner_id, shared_loan_id)
+
+        loans = GetUserLoansService.get_user_loans(
+            self.loan_repository,
+            self.user_repository,
+            self.authorized_user_repository,
+            owner_id)
+        self.assertEqual([owned_loan_id, shared_loan_id], [loan.loan_id for loan in loans])
+        self.assertEqual([[], [owner_id]], [loan.authorized_user_ids for loan in loans])
+
+    def test_data_persists(self):
+        user_id = self.create_user('alice')
+        self.create_loan(user_id)
+        self.pool.close()
+
+        self.pool = SqliteConnectionPool(self.path)
+        self.assertTrue(SqliteUserRepository(self.pool).exists(user_id))
+        self.assertEqual(1, len(SqliteLoanRepository(self.pool).read_loans_for_user_id(user_id)))
+
+    def test_concurrent_creates(self):
+        user_id = self.create_user('alice')
+        loan_ids = []
+
+        def create_loans():
+            for _ in range(50):
+                loan_ids.append(self.create_loan(user_id))
+
+        threads = [threading.Thread(target=create_loans) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(range(1, 401)), sorted(loan_ids))
+
+    def test_concurrent_processes(self):
+        user_id = self.create_user('alice')
+        with multiprocessing.get_context('spawn').Pool(4) as processes:
+            results = processes.starmap(create_loans_in_process, [(self.path, user_id, 50)] * 4)
+
+        loan_ids = sorted(loan_id for result in results for loan_id in result)
+        self.assertEqual(list(range(1, 201)), loan_ids)
+        self.assertEqual(loan_ids, [loan.loan_id for loan in self.loan_repository.read_loans_for_user_id(user_id)])
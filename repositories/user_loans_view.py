@@ -0,0 +1,49 @@
+"""Memory-based view of loans owned by and shared with each user"""
+
+
+class UserLoansView:
+    """Memory-based view of loans owned by and shared with each user
+
+    Maintained incrementally by LoanRepository.create and
+    AuthorizedUserRepository.create and delete when they are given the view,
+    so reading a user's loan IDs doesn't need to consult either repository.
+    Shared loans are kept as dictionary keys (in the order they were shared)
+    so removing one is O(1).
+    """
+    def __init__(self):
+        self.owned_loan_ids_by_user_id = {}
+        self.shared_loan_ids_by_user_id = {}
+
+    def add_owned_loan(self, user_id: int, loan_id: int):
+        """Record a loan belonging to a user
+        @:param user_id: ID of user owning the loan
+        @:param loan_id: ID of loan
+        """
+        self.owned_loan_ids_by_user_id.setdefault(user_id, []).append(loan_id)
+
+    def add_shared_loan(self, user_id: int, loan_id: int):
+        """Record a loan shared with a user as an authorized user
+        @:param user_id: ID of authorized user
+        @:param loan_id: ID of loan
+        """
+        self.shared_loan_ids_by_user_id.setdefault(user_id, {})[loan_id] = None
+
+    def remove_shared_loan(self, user_id: int, loan_id: int):
+        """Remove a loan no longer shared with a user
+        @:param user_id: ID of authorized user
+        @:param loan_id: ID of loan
+        """
+        shared_loan_ids = self.shared_loan_ids_by_user_id.get(user_id)
+        if shared_loan_ids is not None:
+            shared_loan_ids.pop(loan_id, None)
+            if not shared_loan_ids:
+                del self.shared_loan_ids_by_user_id[user_id]
+
+    def read_loan_ids(self, user_id: int):
+        """Read IDs of loans owned by and then shared with a user
+        @:param user_id: ID of user
+        @:returns: New list of loan IDs
+        """
+        loan_ids = list(self.owned_loan_ids_by_user_id.get(user_id, ()))
+        loan_ids += self.shared_loan_ids_by_user_id.get(user_id, ())
+        return loan_ids
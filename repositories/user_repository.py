@@ -4,9 +4,15 @@ from models.user import User
 
 class UserRepository:
     """Memory-based user repository"""
-    def __init__(self):
+    def __init__(self, operation_log=None):
+        """Create a user repository
+
+        @:param operation_log: OperationLog to append created users to
+        (optional)
+        """
         self.users = {}
         self.next_id = 1
+        self.operation_log = operation_log
 
     def create(self, user: User):
         """Create a new user
@@ -15,10 +21,23 @@ class UserRepository:
 
         @:param user: User object to create
         """
-        next_id = self.next_id
-        self.next_id += 1
-        user.user_id = next_id
-        self.users[next_id] = user
+        self.create_many([user])
+
+    def create_many(self, users):
+        """Create new users
+
+        A contiguous block of autoincrement IDs will be assigned to the user
+        objects in order.
+
+        @:param users: List of user objects to create
+        """
+        first_id = self.next_id
+        self.next_id += len(users)
+        for user_id, user in enumerate(users, first_id):
+            user.user_id = user_id
+            self.users[user_id] = user
+        if self.operation_log is not None:
+            self.operation_log.append_users(first_id, users)
 
     def read(self, user_id: int):
         """Read user from the repository.
@@ -32,3 +51,14 @@ class UserRepository:
         @:param user_ud: ID of user to check
         @:returns: True if user of that ID exists; false otherwise"""
         return user_id in self.users.keys()
+
+    def exists_many(self, user_ids):
+        """Check which users exist in the repository.
+        @:param user_ids: Iterable of user IDs to check
+        @:returns: Set of the user IDs that exist"""
+        return {user_id for user_id in user_ids if user_id in self.users}
+
+    def count(self):
+        """Count users in the repository.
+        @:returns: Number of users"""
+        return len(self.users)
@@ -1,6 +1,20 @@
 """Services"""
 from .add_authorized_user_service import AddAuthorizedUserService
+from .amortization_schedule_cache import AmortizationScheduleCache
+from .annuity_factor_table import AnnuityFactorTable
+from .async_add_authorized_user_service import AsyncAddAuthorizedUserService
+from .async_create_loan_service import AsyncCreateLoanService
+from .async_create_user_service import AsyncCreateUserService
+from .async_get_user_loans_service import AsyncGetUserLoansService
+from .async_revoke_authorized_user_service import AsyncRevokeAuthorizedUserService
+from .batch_amortization_schedule_service import BatchAmortizationScheduleService
 from .create_amortization_schedule_service import CreateAmortizationScheduleService
 from .create_loan_service import CreateLoanService
 from .create_user_service import CreateUserService
+from .day_count_amortization_schedule_service import DayCountAmortizationScheduleService
 from .get_user_loans_service import GetUserLoansService
+from .prepayment_schedule import PrepaymentSchedule
+from .revoke_authorized_user_service import RevokeAuthorizedUserService
+from .schedule_etag import ScheduleETag
+from .schedule_executor import ScheduleExecutor
+from .schedule_json_encoder import ScheduleJsonEncoder
@@ -12,12 +12,113 @@ class AddAuthorizedUserService:
             loan_repository,
             authorized_user_id: int,
             loan_id: int):
-        loan = loan_repository.read(loan_id)
+        AddAuthorizedUserService._check_loan(loan_repository.read(loan_id), loan_id)
+        authorized_user = AddAuthorizedUserService._build_authorized_user(
+            user_repository.exists(authorized_user_id), authorized_user_id, loan_id)
+        authorized_user_repository.create(authorized_user)
+
+    @staticmethod
+    def add_authorized_users(
+            authorized_user_repository,
+            user_repository,
+            loan_repository,
+            rows):
+        """Add many authorized users to loans
+
+        Every row is validated first, with the loans and users of all rows
+        checked in one repository call each, and then the valid rows are
+        created together.
+
+        @:param authorized_user_repository: Repository to create authorized users in
+        @:param user_repository: Repository to check users from
+        @:param loan_repository: Repository to check loans from
+        @:param rows: List of dictionaries with loan_id and user_id
+        @:returns: Tuple of list of new authorized user IDs (None for invalid
+        rows) and dictionary of invalid row index to error message
+        """
+        authorized_users, errors = AddAuthorizedUserService._build_authorized_users(rows)
+        AddAuthorizedUserService._remove_missing(
+            authorized_users,
+            errors,
+            loan_repository.exists_many({authorized_user.loan_id for authorized_user in authorized_users.values()}),
+            user_repository.exists_many({authorized_user.user_id for authorized_user in authorized_users.values()}))
+        authorized_user_repository.create_many(list(authorized_users.values()))
+        return AddAuthorizedUserService._authorized_user_ids(authorized_users, len(rows)), errors
+
+    @staticmethod
+    def _check_loan(loan, loan_id: int):
+        """Check the loan to add an authorized user to exists
+
+        @:param loan: Loan read (None if it doesn't exist)
+        @:raises: RequestException if the loan doesn't exist
+        """
         if loan is None:
             raise RequestException("loan {} does not exist".format(loan_id))
 
-        if not user_repository.exists(authorized_user_id):
+    @staticmethod
+    def _build_authorized_user(user_exists: bool, authorized_user_id: int, loan_id: int):
+        """Validate the user to authorize and build the authorized user
+
+        @:param user_exists: Whether the user exists
+        @:returns: Authorized user to create
+        @:raises: RequestException if the user doesn't exist
+        """
+        if not user_exists:
             raise RequestException("user {} does not exist".format(authorized_user_id))
+        return AuthorizedUser(authorized_user_id=0, loan_id=loan_id, user_id=authorized_user_id)
 
-        authorized_user = AuthorizedUser(authorized_user_id=0, loan_id=loan_id, user_id=authorized_user_id)
-        authorized_user_repository.create(authorized_user)
+    @staticmethod
+    def _build_authorized_users(rows):
+        """Validate the fields of the rows of a bulk request and build their authorized users
+
+        Loans and users are checked separately.
+
+        @:returns: Tuple of dictionary of valid row index to authorized user
+        and dictionary of invalid row index to error message
+        """
+        errors = {}
+        authorized_users = {}
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                errors[index] = 'row must be an object'
+                continue
+            loan_id = row.get('loan_id')
+            user_id = row.get('user_id')
+            if type(loan_id) is not int:
+                errors[index] = 'Invalid loan ID {}'.format(loan_id)
+            elif type(user_id) is not int:
+                errors[index] = 'Invalid user ID {}'.format(user_id)
+            else:
+                authorized_users[index] = AuthorizedUser(
+                    authorized_user_id=0, loan_id=loan_id, user_id=user_id)
+        return authorized_users, errors
+
+    @staticmethod
+    def _remove_missing(authorized_users, errors, existing_loan_ids, existing_user_ids):
+        """Move the authorized users of loans or users that don't exist to the errors
+
+        @:param authorized_users: Dictionary of valid row index to authorized
+        user (updated)
+        @:param errors: Dictionary of invalid row index to error message
+        (updated)
+        @:param existing_loan_ids: Set of the authorized users' loan IDs that
+        exist
+        @:param existing_user_ids: Set of the authorized users' user IDs that
+        exist
+        """
+        for index, authorized_user in list(authorized_users.items()):
+            if authorized_user.loan_id not in existing_loan_ids:
+                errors[index] = "loan {} does not exist".format(authorized_user.loan_id)
+            elif authorized_user.user_id not in existing_user_ids:
+                errors[index] = "user {} does not exist".format(authorized_user.user_id)
+            else:
+                continue
+            del authorized_users[index]
+
+    @staticmethod
+    def _authorized_user_ids(authorized_users, row_count: int):
+        """Get the IDs of created authorized users in row order (None for invalid rows)"""
+        return [
+            authorized_users[index].authorized_user_id if index in authorized_users else None
+            for index in range(row_count)
+        ]
@@ -0,0 +1,228 @@
+"""Bounded cache of amortization schedules"""
+import sys
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from models import AmortizationSchedule
+from .create_amortization_schedule_service import CreateAmortizationScheduleService, INTEGER_ARITHMETIC
+from .schedule_json_encoder import ScheduleJsonEncoder
+
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class AmortizationScheduleCache:
+    """Bounded cache of amortization schedules
+
+    Schedules only depend on the amount, term, and interest rate of a loan so
+    loans sharing the same terms share a single cached schedule. Entries are
+    evicted least recently used first once either the entry count or the
+    approximate byte size limit is exceeded.
+
+    Cached schedules are returned as compact, read-only AmortizationSchedule
+    objects so a caller can't modify the schedule seen by other callers.
+
+    Misses count schedules generated for the cache; lookups only peeking at
+    the cache count their misses separately as peeks_missed.
+    """
+    def __init__(
+            self,
+            max_entries: int = DEFAULT_MAX_ENTRIES,
+            max_bytes: int = DEFAULT_MAX_BYTES,
+            arithmetic: str = INTEGER_ARITHMETIC):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.arithmetic = arithmetic
+        self.schedules = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.peeks_missed = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get_schedule(self, amount: Decimal, term_months: int, interest_rate: Decimal):
+        """Get an amortization schedule, generating and caching it if missing
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:returns: Read-only amortization schedule
+        @:raises: Exception if any loan parameter is invalid
+        """
+        schedule = self._lookup(amount, term_months, interest_rate, peek=False)
+        if schedule is not None:
+            return schedule
+
+        # Generate outside of the lock; two callers missing on the same key
+        # will both generate, but only one copy ends up in the cache.
+        return self._add_schedule(
+            amount,
+            term_months,
+            interest_rate,
+            CreateAmortizationScheduleService.generate_amortization_schedule_cents(
+                amount, term_months, interest_rate, self.arithmetic))
+
+    async def get_schedule_async(self, amount: Decimal, term_months: int, interest_rate: Decimal, executor):
+        """Get an amortization schedule, generating it with an executor if missing
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param executor: ScheduleExecutor to generate the schedule with
+        @:returns: Read-only amortization schedule
+        @:raises: Exception if any loan parameter is invalid
+        """
+        schedule = self._lookup(amount, term_months, interest_rate, peek=False)
+        if schedule is not None:
+            return schedule
+        return self._add_schedule(
+            amount,
+            term_months,
+            interest_rate,
+            await executor.run(
+                term_months,
+                CreateAmortizationScheduleService.generate_amortization_schedule_cents,
+                amount,
+                term_months,
+                interest_rate,
+                self.arithmetic))
+
+    def get_schedule_json(self, amount: Decimal, term_months: int, interest_rate: Decimal):
+        """Get the encoded schedule endpoint response, encoding and caching it if missing
+
+        The encoded bytes are kept with the cached schedule (counting toward
+        the byte limit) so every loan with the same terms reuses them.
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:returns: UTF-8 JSON (see ScheduleJsonEncoder.encode_schedule)
+        @:raises: Exception if any loan parameter is invalid
+        """
+        return self._encode_schedule(
+            AmortizationScheduleCache._key(amount, term_months, interest_rate),
+            self.get_schedule(amount, term_months, interest_rate))
+
+    async def get_schedule_json_async(self, amount: Decimal, term_months: int, interest_rate: Decimal, executor):
+        """Get the encoded schedule endpoint response, generating the schedule with an executor if missing
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param executor: ScheduleExecutor to generate the schedule with
+        @:returns: UTF-8 JSON (see ScheduleJsonEncoder.encode_schedule)
+        @:raises: Exception if any loan parameter is invalid
+        """
+        return self._encode_schedule(
+            AmortizationScheduleCache._key(amount, term_months, interest_rate),
+            await self.get_schedule_async(amount, term_months, interest_rate, executor))
+
+    def _encode_schedule(self, key, schedule: AmortizationSchedule):
+        """Get the encoded JSON of a schedule, keeping it with its cache entry"""
+        with self.lock:
+            cached_schedule = self.schedules.get(key)
+            if cached_schedule is not None and cached_schedule[2] is not None:
+                return cached_schedule[2]
+
+        encoded = ScheduleJsonEncoder.encode_schedule(schedule)
+        with self.lock:
+            cached_schedule = self.schedules.get(key)
+            if cached_schedule is not None and cached_schedule[0] is schedule and cached_schedule[2] is None:
+                cached_schedule[2] = encoded
+                cached_schedule[1] += sys.getsizeof(encoded)
+                self.size_bytes += sys.getsizeof(encoded)
+                self._evict()
+        return encoded
+
+    def peek_schedule(self, amount: Decimal, term_months: int, interest_rate: Decimal):
+        """Get an amortization schedule only if it is already cached
+
+        @:param amount: Amount of loan
+        @:param term_months: Loan term in months
+        @:param interest_rate: Interest rate
+        @:returns: Read-only amortization schedule or None if not cached
+        """
+        return self._lookup(amount, term_months, interest_rate, peek=True)
+
+    def _lookup(self, amount: Decimal, term_months: int, interest_rate: Decimal, peek: bool):
+        """Get a cached schedule, counting a hit or a miss
+
+        @:param peek: Whether a miss is only a peek (nothing is generated)
+        @:returns: Read-only amortization schedule or None if not cached
+        """
+        key = AmortizationScheduleCache._key(amount, term_months, interest_rate)
+        with self.lock:
+            cached_schedule = self.schedules.get(key)
+            if cached_schedule is None:
+                if peek:
+                    self.peeks_missed += 1
+                else:
+                    self.misses += 1
+                return None
+            self.schedules.move_to_end(key)
+            self.hits += 1
+            return cached_schedule[0]
+
+    def statistics(self):
+        """Get cache statistics
+
+        @:returns: Dictionary of cache counters and sizes
+        """
+        with self.lock:
+            return {
+                'entries': len(self.schedules),
+                'size_bytes': self.size_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'peeks_missed': self.peeks_missed,
+                'evictions': self.evictions
+            }
+
+    def clear(self):
+        """Remove all cached schedules (counters are kept)"""
+        with self.lock:
+            self.schedules.clear()
+            self.size_bytes = 0
+
+    def _add_schedule(self, amount: Decimal, term_months: int, interest_rate: Decimal, columns: dict):
+        """Cache a generated schedule unless already cached or too large
+
+        @:param columns: Generated columns of cents
+        @:returns: Read-only amortization schedule (the cached copy if there
+        already is one)
+        """
+        schedule = AmortizationSchedule(amount, columns)
+        size_bytes = AmortizationScheduleCache._estimate_size_bytes(schedule)
+        if size_bytes > self.max_bytes or self.max_entries <= 0:
+            return schedule
+
+        key = AmortizationScheduleCache._key(amount, term_months, interest_rate)
+        with self.lock:
+            cached_schedule = self.schedules.get(key)
+            if cached_schedule is not None:
+                return cached_schedule[0]
+            # Entries are [schedule, size in bytes, encoded JSON or None]
+            self.schedules[key] = [schedule, size_bytes, None]
+            self.size_bytes += size_bytes
+            self._evict()
+        return schedule
+
+    def _evict(self):
+        """Evict least recently used entries until within limits (lock must be held)"""
+        while len(self.schedules) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, (_, evicted_size_bytes, _) = self.schedules.popitem(last=False)
+            self.size_bytes -= evicted_size_bytes
+            self.evictions += 1
+
+    @staticmethod
+    def _key(amount: Decimal, term_months: int, interest_rate: Decimal):
+        # Decimals which compare equal (1000 and 1000.00) hash equally but the
+        # month 0 balance keeps the amount as given, so key on the exact
+        # representation to never hand back a differently formatted schedule.
+        return str(amount), term_months, str(interest_rate)
+
+    @staticmethod
+    def _estimate_size_bytes(schedule: AmortizationSchedule):
+        return sys.getsizeof(schedule) + sys.getsizeof(schedule.amount) + schedule.nbytes
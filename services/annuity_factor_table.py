@@ -0,0 +1,139 @@
+"""Table of annuity factors for calculating loan payments"""
+import decimal
+import json
+import threading
+from decimal import Decimal
+
+
+DEFAULT_MAX_ENTRIES = 500000
+# Decimal context of all schedule arithmetic. Schedule code enters a copy of
+# it rather than relying on (or changing) the caller's context, so results
+# don't depend on which thread, task or process runs it.
+SCHEDULE_CONTEXT = decimal.Context(prec=28, rounding=decimal.ROUND_HALF_UP)
+
+
+class AnnuityFactors:
+    """Annuity factors for an interest rate and term"""
+    __slots__ = ('monthly_interest_rate', 'compounding_factor', 'numerator', 'denominator', 'annuity_factor')
+
+    def __init__(
+            self,
+            monthly_interest_rate: Decimal,
+            compounding_factor: Decimal,
+            numerator: Decimal,
+            denominator: Decimal,
+            annuity_factor):
+        """Create annuity factors
+
+        @:param monthly_interest_rate: Interest rate divided by 12
+        @:param compounding_factor: (1 + monthly interest rate) ^ term
+        @:param numerator: Monthly interest rate * compounding factor
+        @:param denominator: Compounding factor - 1
+        @:param annuity_factor: Numerator / denominator (payment per dollar
+        borrowed) or None for a 0% interest rate
+        """
+        self.monthly_interest_rate = monthly_interest_rate
+        self.compounding_factor = compounding_factor
+        self.numerator = numerator
+        self.denominator = denominator
+        self.annuity_factor = annuity_factor
+
+
+class AnnuityFactorTable:
+    """Table of annuity factors for calculating loan payments
+
+    The payment formula only depends on the interest rate and term, with the
+    amount as a multiplier, so the expensive Decimal exponentiation is done
+    once per (interest rate, term) and kept. Factors are calculated lazily but
+    the table can also be precomputed and saved to disk so new processes start
+    with a full table.
+
+    Factors are calculated in SCHEDULE_CONTEXT.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.factors = {}
+        self.lock = threading.Lock()
+
+    def get_factors(self, interest_rate: Decimal, term_months: int):
+        """Get annuity factors, calculating them if missing
+
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param term_months: Loan term in months (positive)
+        @:returns: Annuity factors
+        """
+        key = (interest_rate, term_months)
+        factors = self.factors.get(key)
+        if factors is None:
+            factors = AnnuityFactorTable._calculate_factors(interest_rate, term_months)
+            if len(self.factors) < self.max_entries:
+                with self.lock:
+                    self.factors.setdefault(key, factors)
+        return factors
+
+    def precompute(self, interest_rates, term_months):
+        """Calculate factors for every combination of rates and terms
+
+        @:param interest_rates: Iterable of interest rates
+        @:param term_months: Iterable of terms in months
+        """
+        term_months = list(term_months)
+        for interest_rate in interest_rates:
+            for term in term_months:
+                self.get_factors(interest_rate, term)
+
+    def save(self, path: str):
+        """Save the table to a JSON file
+
+        @:param path: Path of file to write
+        """
+        with self.lock:
+            entries = [
+                [str(interest_rate), term_months, str(factors.monthly_interest_rate),
+                 str(factors.compounding_factor), str(factors.numerator), str(factors.denominator)]
+                for (interest_rate, term_months), factors in self.factors.items()
+            ]
+        with open(path, 'w') as file:
+            json.dump(entries, file)
+
+    @staticmethod
+    def load(path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Load a table saved with save()
+
+        @:param path: Path of file to read
+        @:param max_entries: Maximum number of entries to keep
+        @:returns: Annuity factor table
+        """
+        with open(path) as file:
+            entries = json.load(file)
+
+        table = AnnuityFactorTable(max_entries)
+        with decimal.localcontext(SCHEDULE_CONTEXT):
+            for interest_rate, term_months, monthly_interest_rate, compounding_factor, numerator, denominator \
+                    in entries[:max_entries]:
+                numerator = Decimal(numerator)
+                denominator = Decimal(denominator)
+                table.factors[(Decimal(interest_rate), term_months)] = AnnuityFactors(
+                    Decimal(monthly_interest_rate),
+                    Decimal(compounding_factor),
+                    numerator,
+                    denominator,
+                    numerator / denominator if denominator else None)
+        return table
+
+    def __len__(self):
+        return len(self.factors)
+
+    @staticmethod
+    def _calculate_factors(interest_rate: Decimal, term_months: int):
+        with decimal.localcontext(SCHEDULE_CONTEXT):
+            monthly_interest_rate = interest_rate / Decimal('12')
+            compounding_factor = (1 + monthly_interest_rate) ** term_months
+            numerator = monthly_interest_rate * compounding_factor
+            denominator = compounding_factor - 1
+            return AnnuityFactors(
+                monthly_interest_rate,
+                compounding_factor,
+                numerator,
+                denominator,
+                numerator / denominator if denominator else None)
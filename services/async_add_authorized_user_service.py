@@ -0,0 +1,57 @@
+"""Service for adding an authorized user to a loan in an async repository"""
+from .add_authorized_user_service import AddAuthorizedUserService
+
+
+class AsyncAddAuthorizedUserService:
+    """Service for adding an authorized user to a loan in an async repository
+
+    The same as AddAuthorizedUserService, for repositories read and written
+    with await (see repositories.AsyncAuthorizedUserRepository). Validation
+    and results are AddAuthorizedUserService's; only the repository calls are
+    made here.
+    """
+    @staticmethod
+    async def add_authorized_user(
+            authorized_user_repository,
+            user_repository,
+            loan_repository,
+            authorized_user_id: int,
+            loan_id: int):
+        """Add an authorized user to a loan
+        @:param authorized_user_repository: Async repository to create authorized user in
+        @:param user_repository: Async repository to check user from
+        @:param loan_repository: Async repository to check loan from
+        @:param authorized_user_id: User ID of authorized user to add
+        @:param loan_id: Loan ID to add authorized user to
+        @:raises: RequestException if the loan or user doesn't exist
+        """
+        AddAuthorizedUserService._check_loan(await loan_repository.read(loan_id), loan_id)
+        authorized_user = AddAuthorizedUserService._build_authorized_user(
+            await user_repository.exists(authorized_user_id), authorized_user_id, loan_id)
+        await authorized_user_repository.create(authorized_user)
+
+    @staticmethod
+    async def add_authorized_users(
+            authorized_user_repository,
+            user_repository,
+            loan_repository,
+            rows):
+        """Add many authorized users to loans
+
+        @:param authorized_user_repository: Async repository to create authorized users in
+        @:param user_repository: Async repository to check users from
+        @:param loan_repository: Async repository to check loans from
+        @:param rows: List of dictionaries with loan_id and user_id
+        @:returns: Tuple of list of new authorized user IDs (None for invalid
+        rows) and dictionary of invalid row index to error message
+        """
+        authorized_users, errors = AddAuthorizedUserService._build_authorized_users(rows)
+        AddAuthorizedUserService._remove_missing(
+            authorized_users,
+            errors,
+            await loan_repository.exists_many(
+                {authorized_user.loan_id for authorized_user in authorized_users.values()}),
+            await user_repository.exists_many(
+                {authorized_user.user_id for authorized_user in authorized_users.values()}))
+        await authorized_user_repository.create_many(list(authorized_users.values()))
+        return AddAuthorizedUserService._authorized_user_ids(authorized_users, len(rows)), errors
@@ -0,0 +1,51 @@
+"""Service for creating a loan in an async repository"""
+from decimal import Decimal
+from .create_loan_service import CreateLoanService
+
+
+class AsyncCreateLoanService:
+    """Service for creating a loan in an async repository
+
+    The same as CreateLoanService, for repositories read and written with
+    await (see repositories.AsyncLoanRepository). Validation and results are
+    CreateLoanService's; only the repository calls are made here.
+    """
+    @staticmethod
+    async def create_loan(
+            loan_repository,
+            user_repository,
+            user_id: int,
+            amount: Decimal,
+            term_months: int,
+            interest_rate: Decimal):
+        """Create a loan in the repository
+        @:param loan_repository: Async repository to create loan in
+        @:param user_repository: Async repository to check user from
+        @:param user_id: user ID loan belongs to
+        @:param amount: Amount of new loan
+        @:param term_months: Term in months of new loan
+        @:param interest_rate: Interest rate of new loan
+        @:returns: loan ID of newly-created loan
+        @:raises: RequestException if request is invalid
+        """
+        loan = CreateLoanService._build_loan(
+            await user_repository.exists(user_id), user_id, amount, term_months, interest_rate)
+        await loan_repository.create(loan)
+        return loan.loan_id
+
+    @staticmethod
+    async def create_loans(loan_repository, user_repository, rows):
+        """Create many loans in the repository
+
+        @:param loan_repository: Async repository to create loans in
+        @:param user_repository: Async repository to check users from
+        @:param rows: List of dictionaries with user_id, amount (string),
+        term_months and interest_rate (string)
+        @:returns: Tuple of list of new loan IDs (None for invalid rows) and
+        dictionary of invalid row index to error message
+        """
+        loans, errors = CreateLoanService._build_loans(rows)
+        CreateLoanService._remove_missing_users(
+            loans, errors, await user_repository.exists_many({loan.user_id for loan in loans.values()}))
+        await loan_repository.create_many(list(loans.values()))
+        return CreateLoanService._loan_ids(loans, len(rows)), errors
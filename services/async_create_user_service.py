@@ -0,0 +1,35 @@
+"""Service for creating a user in an async repository"""
+from .create_user_service import CreateUserService
+
+
+class AsyncCreateUserService:
+    """Service for creating a user in an async repository
+
+    The same as CreateUserService, for repositories read and written with
+    await (see repositories.AsyncUserRepository). Validation and results are
+    CreateUserService's; only the repository calls are made here.
+    """
+    @staticmethod
+    async def create_user(user_repository, username):
+        """Create a user in the repository
+        @:param user_repository: Async repository to create user in
+        @:param username: Username of new user
+        @:returns: user ID of newly-created user
+        @:raises: RequestException if request is invalid
+        """
+        user = CreateUserService._build_user(username)
+        await user_repository.create(user)
+        return user.user_id
+
+    @staticmethod
+    async def create_users(user_repository, rows):
+        """Create many users in the repository
+
+        @:param user_repository: Async repository to create users in
+        @:param rows: List of dictionaries with username
+        @:returns: Tuple of list of new user IDs (None for invalid rows) and
+        dictionary of invalid row index to error message
+        """
+        users, errors = CreateUserService._build_users(rows)
+        await user_repository.create_many(list(users.values()))
+        return CreateUserService._user_ids(users, len(rows)), errors
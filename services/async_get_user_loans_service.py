@@ -0,0 +1,88 @@
+"""Service for getting all loans from a user in async repositories"""
+from .get_user_loans_service import DEFAULT_PAGE_LIMIT, OWNED_SECTION, GetUserLoansService
+
+
+class AsyncGetUserLoansService:
+    """Service for getting all loans from a user in async repositories
+
+    The same as GetUserLoansService, for repositories read and written with
+    await (see repositories.AsyncLoanRepository), with the same page cursors.
+    Validation and page assembly are GetUserLoansService's; only the
+    repository calls are made here.
+    """
+    @staticmethod
+    async def get_user_loans(
+            loan_repository,
+            user_repository,
+            authorized_user_repository,
+            user_id: int,
+            user_loans_view=None):
+        """Get all loans from a user
+        @:param loan_repository: Async repository to read loans from
+        @:param user_repository: Async repository to read users from
+        @:param authorized_user_repository: Async repository to read authorized users from
+        @:param user_id: User ID to get loans from
+        @:param user_loans_view: UserLoansView maintained by the loan and
+        authorized user repositories (optional; the repositories are read
+        directly if not given)
+        @:returns: list of loans belonging to user
+        @:raises: RequestException if request is invalid
+        """
+        GetUserLoansService._check_user(await user_repository.exists(user_id), user_id)
+
+        if user_loans_view is not None:
+            loan_ids = user_loans_view.read_loan_ids(user_id)
+        else:
+            loan_ids = [loan.loan_id for loan in await loan_repository.read_loans_for_user_id(user_id)]
+            loan_ids += await authorized_user_repository.read_loan_ids_by_user_id(user_id)
+
+        return await AsyncGetUserLoansService._read_loans(loan_repository, authorized_user_repository, loan_ids)
+
+    @staticmethod
+    async def get_user_loans_page(
+            loan_repository,
+            user_repository,
+            authorized_user_repository,
+            user_id: int,
+            cursor: str = None,
+            limit: int = DEFAULT_PAGE_LIMIT):
+        """Get a page of loans from a user
+
+        @:param loan_repository: Async repository to read loans from
+        @:param user_repository: Async repository to read users from
+        @:param authorized_user_repository: Async repository to read authorized users from
+        @:param user_id: User ID to get loans from
+        @:param cursor: Cursor returned with the previous page (None for the
+        first page)
+        @:param limit: Maximum number of loans in the page
+        @:returns: Tuple of list of loans and cursor of the next page (None if
+        there are no more loans)
+        @:raises: RequestException if request is invalid
+        """
+        GetUserLoansService._check_user(await user_repository.exists(user_id), user_id)
+        section, after_loan_id = GetUserLoansService._parse_page_request(cursor, limit)
+
+        owned_loan_ids = []
+        if section == OWNED_SECTION:
+            owned_loan_ids, next_cursor = GetUserLoansService._owned_page(
+                await loan_repository.read_loan_ids_after(user_id, after_loan_id, limit + 1), limit)
+            if next_cursor is not None:
+                return (await AsyncGetUserLoansService._read_loans(
+                            loan_repository, authorized_user_repository, owned_loan_ids),
+                        next_cursor)
+            after_loan_id = 0
+
+        shared_limit = limit - len(owned_loan_ids)
+        loan_ids, next_cursor = GetUserLoansService._shared_page(
+            owned_loan_ids,
+            await authorized_user_repository.read_loan_ids_after(user_id, after_loan_id, shared_limit + 1),
+            shared_limit)
+        return (await AsyncGetUserLoansService._read_loans(loan_repository, authorized_user_repository, loan_ids),
+                next_cursor)
+
+    @staticmethod
+    async def _read_loans(loan_repository, authorized_user_repository, loan_ids):
+        """Read loans with their authorized user IDs"""
+        authorized_user_ids = await authorized_user_repository.read_authorized_user_ids_many(loan_ids)
+        return GetUserLoansService._with_authorized_user_ids(
+            await loan_repository.read_many(loan_ids), authorized_user_ids)
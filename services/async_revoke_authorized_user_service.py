@@ -0,0 +1,33 @@
+"""Service for revoking an authorized user from a loan in an async repository"""
+from .revoke_authorized_user_service import RevokeAuthorizedUserService
+
+
+class AsyncRevokeAuthorizedUserService:
+    """Service for revoking an authorized user from a loan in an async repository
+
+    The same as RevokeAuthorizedUserService, for repositories read and
+    written with await (see repositories.AsyncAuthorizedUserRepository).
+    Validation is RevokeAuthorizedUserService's; only the repository calls
+    are made here.
+    """
+    @staticmethod
+    async def revoke_authorized_user(
+            authorized_user_repository,
+            loan_repository,
+            authorized_user_id: int,
+            loan_id: int):
+        """Revoke a user's access to a shared loan
+
+        @:param authorized_user_repository: Async repository to delete authorized user from
+        @:param loan_repository: Async repository to check loan from
+        @:param authorized_user_id: User ID of authorized user to revoke
+        @:param loan_id: Loan ID to revoke authorized user from
+        @:raises: RequestException if the loan doesn't exist or the user
+        isn't authorized on it
+        """
+        RevokeAuthorizedUserService._check_loan(await loan_repository.read(loan_id), loan_id)
+        authorized_user = RevokeAuthorizedUserService._check_authorized_user(
+            await authorized_user_repository.read_by_loan_id_and_user_id(loan_id, authorized_user_id),
+            authorized_user_id,
+            loan_id)
+        await authorized_user_repository.delete(authorized_user.authorized_user_id)
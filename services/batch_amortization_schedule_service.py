@@ -0,0 +1,196 @@
+"""Service for generating amortization schedules for many loans at once"""
+import decimal
+from decimal import Decimal
+import numpy as np
+from models.amortization_schedule import SCHEDULE_FIELDS
+from .annuity_factor_table import SCHEDULE_CONTEXT
+from .create_amortization_schedule_service import CreateAmortizationScheduleService
+
+
+# Balances are tracked as integers of 1e-13 dollars. The only inexact step is
+# the monthly interest product which is done in floating point.
+FIXED_POINT_DIGITS = 13
+UNITS_PER_CENT = 10 ** (FIXED_POINT_DIGITS - 2)
+# Largest magnitude tracked before a loan is handed to the Decimal engine,
+# leaving headroom below the int64 limit.
+MAX_FIXED_POINT_MAGNITUDE = 2 ** 62
+FLOAT_EPSILON = 2.0 ** -53
+
+
+class BatchAmortizationScheduleService:
+    """Service for generating amortization schedules for many loans at once"""
+    @staticmethod
+    def generate_amortization_schedules(amounts, term_months, interest_rates):
+        """Generate amortization schedules for a batch of loans
+
+        Produces the same whole-cent values as
+        CreateAmortizationScheduleService.generate_amortization_schedule for
+        every loan, but computes all loans one month at a time using NumPy.
+
+        Each loan tracks a bound on how far its fixed-point values may be from
+        exact. If a value within that bound of a half-cent boundary is found
+        (so it could round either way), or a loan is too large for the
+        fixed-point range, that loan is generated by the Decimal engine.
+
+        @:param amounts: Amounts of loans (positive)
+        @:param term_months: Loan terms in months (positive)
+        @:param interest_rates: Interest rates (positive or zero)
+        @:returns: Dictionary of schedule field name to int64 array of cents
+        shaped (loans, longest term + 1). Months past the end of a loan's term
+        are zero. Month 0 balances are rounded to whole cents.
+        @:raises: Exception if any loan parameter is invalid
+        """
+        amounts = [Decimal(amount) for amount in amounts]
+        term_months = [int(term) for term in term_months]
+        interest_rates = [Decimal(interest_rate) for interest_rate in interest_rates]
+        if not (len(amounts) == len(term_months) == len(interest_rates)):
+            raise Exception('amounts, term_months, and interest_rates must be the same length')
+
+        loan_count = len(amounts)
+        max_term_months = max(term_months, default=0)
+        schedules = {
+            field: np.zeros((loan_count, max_term_months + 1), dtype=np.int64)
+            for field in SCHEDULE_FIELDS
+        }
+        if loan_count == 0:
+            return schedules
+
+        amount_units = np.empty(loan_count, dtype=np.int64)
+        payment_units = np.empty(loan_count, dtype=np.int64)
+        monthly_interest_rates = np.empty(loan_count, dtype=np.float64)
+        use_decimal_engine = np.zeros(loan_count, dtype=bool)
+        payments = {}
+
+        with decimal.localcontext(SCHEDULE_CONTEXT):
+            for index, (amount, term, interest_rate) in enumerate(zip(amounts, term_months, interest_rates)):
+                CreateAmortizationScheduleService._validate_loan_parameters(amount, term, interest_rate)
+                key = (amount, term, interest_rate)
+                if key not in payments:
+                    payments[key] = CreateAmortizationScheduleService._calculate_payment(
+                        amount, term, interest_rate)
+                monthly_interest_rate, payment = payments[key]
+
+                # Balances only grow if the payment doesn't cover the interest
+                # on the original amount; otherwise the amount is the largest
+                # balance. Totals are bounded by all payments made.
+                if payment >= amount * monthly_interest_rate:
+                    balance_bound = amount
+                else:
+                    balance_bound = amount * (1 + monthly_interest_rate) ** term
+                magnitude_bound = (balance_bound + payment * term).scaleb(FIXED_POINT_DIGITS)
+                if magnitude_bound >= MAX_FIXED_POINT_MAGNITUDE:
+                    use_decimal_engine[index] = True
+                    amount_units[index] = 0
+                    payment_units[index] = 0
+                    monthly_interest_rates[index] = 0.0
+                    continue
+                amount_units[index] = int(amount.scaleb(FIXED_POINT_DIGITS).to_integral_value())
+                payment_units[index] = int(payment.scaleb(FIXED_POINT_DIGITS))
+                monthly_interest_rates[index] = float(monthly_interest_rate)
+
+        terms = np.array(term_months, dtype=np.int64)
+
+        # Sort loans by descending term so the loans still amortizing in any
+        # month are a prefix of the arrays.
+        order = np.argsort(-terms, kind='stable')
+        sorted_terms = terms[order]
+        amount_units = amount_units[order]
+        payment_units = payment_units[order]
+        monthly_interest_rates = monthly_interest_rates[order]
+        ambiguous = use_decimal_engine[order]
+
+        balance = amount_units.copy()
+        total_interest_paid = np.zeros(loan_count, dtype=np.int64)
+        balance_errors = np.zeros(loan_count, dtype=np.float64)
+        total_interest_errors = np.zeros(loan_count, dtype=np.float64)
+        # Filled month by month, so kept month-major until the end
+        sorted_schedules = {
+            field: np.zeros((max_term_months + 1, loan_count), dtype=np.int64)
+            for field in SCHEDULE_FIELDS
+        }
+        sorted_schedules['balance'][0] = BatchAmortizationScheduleService._to_cents(amount_units)
+
+        for month in range(1, max_term_months + 1):
+            active_count = int(np.searchsorted(-sorted_terms, -month, side='right'))
+            active = slice(0, active_count)
+            rate = monthly_interest_rates[active]
+            payment = payment_units[active]
+
+            accrued_interest = balance[active].astype(np.float64) * rate
+            # Converting the balance and rate to floating point and the product
+            # each contribute a relative error, then rounding to units.
+            step_errors = 1 + 4 * FLOAT_EPSILON * np.abs(accrued_interest)
+            accrued_interest = np.rint(accrued_interest).astype(np.int64)
+            principal_paid = payment - accrued_interest
+            balance[active] -= principal_paid
+            total_interest_paid[active] += accrued_interest
+            total_paid = payment * month
+            total_principal_paid = amount_units[active] - balance[active]
+
+            # Worst case distance of each value from exact arithmetic (plus a
+            # unit for the drift of the Decimal engine itself)
+            interest_errors = step_errors + rate * balance_errors[active] + 1
+            balance_errors[active] = balance_errors[active] * (1 + rate) + step_errors + 1
+            total_interest_errors[active] += interest_errors
+
+            checked_values = [
+                (accrued_interest, interest_errors),
+                (principal_paid, interest_errors),
+                (total_interest_paid[active], total_interest_errors[active]),
+            ]
+
+            final = sorted_terms[active] == month
+            balance_discrepancy = np.where(final, balance[active], 0)
+            checked_values += [
+                (np.where(final, 0, balance[active]), balance_errors[active]),
+                (payment + balance_discrepancy, balance_errors[active]),
+                (total_paid + balance_discrepancy, balance_errors[active]),
+                (total_principal_paid + balance_discrepancy, balance_errors[active]),
+            ]
+            for values, errors in checked_values:
+                ambiguous[active] |= BatchAmortizationScheduleService._near_rounding_boundary(values, errors)
+
+            to_cents = BatchAmortizationScheduleService._to_cents
+            payment_cents = to_cents(payment + balance_discrepancy)
+            interest_cents = to_cents(accrued_interest)
+            month_cents = {
+                'balance': np.where(final, 0, to_cents(balance[active])),
+                'payment': payment_cents,
+                # Final principal is derived so the month's fields add up
+                'principal_paid': np.where(final, payment_cents - interest_cents, to_cents(principal_paid)),
+                'interest_paid': interest_cents,
+                'total_paid': to_cents(total_paid + balance_discrepancy),
+                'total_principal_paid': to_cents(total_principal_paid + balance_discrepancy),
+                'total_interest_paid': to_cents(total_interest_paid[active])
+            }
+            for field in SCHEDULE_FIELDS:
+                sorted_schedules[field][month, active] = month_cents[field]
+
+        for field in SCHEDULE_FIELDS:
+            schedules[field][order] = sorted_schedules[field].T
+
+        for index in order[ambiguous]:
+            schedule = CreateAmortizationScheduleService.generate_amortization_schedule(
+                amounts[index], term_months[index], interest_rates[index])
+            for field in SCHEDULE_FIELDS:
+                schedules[field][index, :len(schedule)] = [
+                    BatchAmortizationScheduleService._decimal_to_cents(month[field]) for month in schedule
+                ]
+
+        return schedules
+
+    @staticmethod
+    def _to_cents(values):
+        """Round fixed-point values half up (away from zero) to whole cents"""
+        cents = (np.abs(values) + UNITS_PER_CENT // 2) // UNITS_PER_CENT
+        return np.where(values < 0, -cents, cents)
+
+    @staticmethod
+    def _near_rounding_boundary(values, errors):
+        """Check if fixed-point values are within their error of a half cent"""
+        distance = np.abs(np.abs(values) % UNITS_PER_CENT - UNITS_PER_CENT // 2)
+        return distance <= errors
+
+    @staticmethod
+    def _decimal_to_cents(value: Decimal):
+        return int(value.scaleb(2).to_integral_value(rounding=decimal.ROUND_HALF_UP))
@@ -1,12 +1,34 @@
 """Service for generating amortization schedules"""
 import decimal
 from decimal import Decimal
+from models.amortization_schedule import NEGATIVE_ZERO, NEGATIVE_ZEROS, SCHEDULE_FIELDS
+from .annuity_factor_table import AnnuityFactorTable, SCHEDULE_CONTEXT
+from .fixed_point_amortization_engine import FixedPointAmortizationEngine
+
+
+# Arithmetic used to generate schedules. Both produce identical schedules.
+DECIMAL_ARITHMETIC = 'decimal'
+INTEGER_ARITHMETIC = 'integer'
+
+# Working precision used when evaluating the annuity closed form. This is
+# well beyond the default 28 digits used by the iterative schedule so that the
+# closed form lands on the same whole-cent values after rounding.
+CLOSED_FORM_PRECISION = 60
+HALF_CENT = Decimal('0.005')
 
 
 class CreateAmortizationScheduleService:
     """Service for generating amortization schedules"""
+    # Shared by all schedule generation; may be replaced with a precomputed
+    # or loaded table
+    annuity_factor_table = AnnuityFactorTable()
+
     @staticmethod
-    def generate_amortization_schedule(amount: Decimal, term_months: int, interest_rate: Decimal):
+    def generate_amortization_schedule(
+            amount: Decimal,
+            term_months: int,
+            interest_rate: Decimal,
+            arithmetic: str = DECIMAL_ARITHMETIC):
         """Generate an amortization schedule
 
         The payment is always a full-cent amount which will leave usually leave
@@ -16,9 +38,304 @@ class CreateAmortizationScheduleService:
         @:param amount: Amount of loan (positive)
         @:param term_months: Loan term in months (positive)
         @:param interest_rate: Interest rate (positive or zero)
+        @:param arithmetic: DECIMAL_ARITHMETIC or INTEGER_ARITHMETIC
         @:returns: Array of month schedules containing the remaining balance,
         monthly payment, principal and interest paid in the month, and running
         totals of the principal, interest, and total paid so far.
+        @:raises: Exception if any loan parameter is invalid
+        """
+        if arithmetic == DECIMAL_ARITHMETIC:
+            return list(CreateAmortizationScheduleService.iterate_amortization_schedule(
+                amount, term_months, interest_rate))
+
+        columns = CreateAmortizationScheduleService.generate_amortization_schedule_cents(
+            amount, term_months, interest_rate, arithmetic)
+        schedule = [
+            {field: Decimal(cents).scaleb(-2) for field, cents in zip(SCHEDULE_FIELDS, month_cents)}
+            for month_cents in zip(*(columns[field] for field in SCHEDULE_FIELDS))
+        ]
+        for field, month in columns[NEGATIVE_ZEROS]:
+            schedule[month][field] = NEGATIVE_ZERO
+        schedule[0]['balance'] = amount
+        return schedule
+
+    @staticmethod
+    def generate_amortization_schedule_cents(
+            amount: Decimal,
+            term_months: int,
+            interest_rate: Decimal,
+            arithmetic: str = INTEGER_ARITHMETIC):
+        """Generate an amortization schedule as columns of whole cents
+
+        The integer arithmetic engine falls back to Decimal arithmetic for the
+        rare loans where it can't guarantee an identical result.
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param arithmetic: DECIMAL_ARITHMETIC or INTEGER_ARITHMETIC
+        @:returns: Dictionary of schedule field name to list of cents (the
+        month 0 balance is rounded to whole cents), and NEGATIVE_ZEROS to the
+        list of (field, month) of cents which are negative zero
+        @:raises: Exception if any loan parameter is invalid
+        """
+        if arithmetic not in (DECIMAL_ARITHMETIC, INTEGER_ARITHMETIC):
+            raise Exception('unknown arithmetic {}'.format(arithmetic))
+        CreateAmortizationScheduleService._validate_loan_parameters(amount, term_months, interest_rate)
+
+        if arithmetic == INTEGER_ARITHMETIC:
+            with decimal.localcontext(SCHEDULE_CONTEXT):
+                monthly_interest_rate, payment = CreateAmortizationScheduleService._calculate_payment(
+                    amount, term_months, interest_rate)
+            columns = FixedPointAmortizationEngine.generate_schedule_cents(
+                amount, term_months, monthly_interest_rate, payment)
+            if columns is not None:
+                return columns
+
+        months = CreateAmortizationScheduleService.iterate_amortization_schedule(amount, term_months, interest_rate)
+        # Month 0 balance is the amount as given; everything else is already
+        # rounded to whole cents, so only needs moving the decimal point
+        columns = {
+            field: [int(value.scaleb(2).to_integral_value(rounding=decimal.ROUND_HALF_UP))]
+            for field, value in next(months).items()
+        }
+        negative_zeros = []
+        for index, month in enumerate(months, 1):
+            for field in SCHEDULE_FIELDS:
+                value = month[field]
+                cents = int(value.scaleb(2))
+                if not cents and value.is_signed():
+                    negative_zeros.append((field, index))
+                columns[field].append(cents)
+        columns[NEGATIVE_ZEROS] = negative_zeros
+        return columns
+
+    @staticmethod
+    def iterate_amortization_schedule(amount: Decimal, term_months: int, interest_rate: Decimal):
+        """Iterate over an amortization schedule one month at a time
+
+        Months are yielded already rounded to whole cents, with the final
+        month including the balance discrepancy adjustment, so only the
+        current month is ever held in memory. Loan parameters are validated
+        immediately rather than on first iteration.
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:returns: Iterator of month schedules (see generate_amortization_schedule)
+        @:raises: Exception if any loan parameter is invalid
+        """
+        CreateAmortizationScheduleService._validate_loan_parameters(amount, term_months, interest_rate)
+
+        context = SCHEDULE_CONTEXT.copy()
+        with decimal.localcontext(context):
+            monthly_interest_rate, payment = CreateAmortizationScheduleService._calculate_payment(
+                amount, term_months, interest_rate)
+
+        return CreateAmortizationScheduleService._iterate_months(
+            amount, term_months, monthly_interest_rate, payment, context)
+
+    @staticmethod
+    def _iterate_months(
+            amount: Decimal,
+            term_months: int,
+            monthly_interest_rate: Decimal,
+            payment: Decimal,
+            context: decimal.Context):
+        balance = amount
+        total_paid = Decimal('0.00')
+        total_principal_paid = Decimal('0.00')
+        total_interest_paid = Decimal('0.00')
+
+        yield {
+            'balance': amount,
+            'payment': Decimal('0.00'),
+            'principal_paid': Decimal('0.00'),
+            'interest_paid': Decimal('0.00'),
+            'total_paid': Decimal('0.00'),
+            'total_principal_paid': Decimal('0.00'),
+            'total_interest_paid': Decimal('0.00')
+        }
+
+        for month in range(1, term_months + 1):
+            # The context is entered for each month rather than around the
+            # whole loop since the consumer may resume this generator from
+            # another thread or task.
+            with decimal.localcontext(context):
+                accrued_interest = balance * monthly_interest_rate
+                principal_paid = payment - accrued_interest
+                balance = balance - principal_paid
+
+                total_paid = total_paid + payment
+                total_principal_paid = total_principal_paid + principal_paid
+                total_interest_paid = total_interest_paid + accrued_interest
+
+                if month < term_months:
+                    yield_balance = balance
+                    yield_payment = payment
+                else:
+                    # Payment is always in a whole-cent value, but that might
+                    # lead to a small discrepancy as the final balance. Adjust
+                    # final balances to result in the final amounts (this makes
+                    # a balloon payment in cases where the loan has negative
+                    # amortization).
+                    balance_discrepancy = balance
+                    yield_balance = Decimal('0.00')
+                    yield_payment = payment + balance_discrepancy
+                    total_principal_paid += balance_discrepancy
+                    total_paid += balance_discrepancy
+
+                # Final schedule only needs whole cents
+                schedule_month = {
+                    'balance': round(yield_balance, 2),
+                    'payment': round(yield_payment, 2),
+                    'principal_paid': round(principal_paid, 2),
+                    'interest_paid': round(accrued_interest, 2),
+                    'total_paid': round(total_paid, 2),
+                    'total_principal_paid': round(total_principal_paid, 2),
+                    'total_interest_paid': round(total_interest_paid, 2)
+                }
+
+                if month == term_months:
+                    # This field can be susceptible to rounding errors. Ensure
+                    # these three fields add up correctly.
+                    schedule_month['principal_paid'] = schedule_month['payment'] - schedule_month['interest_paid']
+
+            yield schedule_month
+
+    @staticmethod
+    def generate_amortization_month(amount: Decimal, term_months: int, interest_rate: Decimal, month: int):
+        """Generate a single month of an amortization schedule
+
+        Rather than iterating through every month, the balance is evaluated
+        directly from the annuity closed form. The result is identical to
+        generate_amortization_schedule(...)[month], including the final
+        month balloon adjustment.
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param month: Month to generate (0 is beginning of loan)
+        @:returns: Month schedule containing the remaining balance, monthly
+        payment, principal and interest paid in the month, and running totals
+        of the principal, interest, and total paid so far.
+        @:raises: Exception if any loan parameter or the month is invalid
+        """
+        if month < 0 or month > term_months:
+            raise Exception('month must be between 0 and term_months')
+        return CreateAmortizationScheduleService.generate_amortization_window(
+            amount, term_months, interest_rate, month, month)[0]
+
+    @staticmethod
+    def generate_amortization_window(
+            amount: Decimal,
+            term_months: int,
+            interest_rate: Decimal,
+            from_month: int,
+            to_month: int):
+        """Generate a range of months of an amortization schedule
+
+        The balance before the first month is evaluated directly from the
+        annuity closed form and only the requested months are iterated. The
+        result is identical to generate_amortization_schedule(...)[from_month:
+        to_month + 1], including the final month balloon adjustment.
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param from_month: First month to generate (0 is beginning of loan)
+        @:param to_month: Last month to generate (inclusive)
+        @:returns: List of month schedules (see generate_amortization_month)
+        @:raises: Exception if any loan parameter or month is invalid
+        """
+        CreateAmortizationScheduleService._validate_loan_parameters(amount, term_months, interest_rate)
+        if not 0 <= from_month <= to_month <= term_months:
+            raise Exception('months must be between 0 and term_months with from_month before to_month')
+
+        window = []
+        if from_month == 0:
+            window.append({
+                'balance': amount,
+                'payment': Decimal('0.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('0.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('0.00')
+            })
+            if to_month == 0:
+                return window
+
+        with decimal.localcontext(SCHEDULE_CONTEXT) as context:
+            # Payment and monthly rate are derived at the same precision as
+            # the iterative schedule so both start from identical values.
+            monthly_interest_rate, payment = CreateAmortizationScheduleService._calculate_payment(
+                amount, term_months, interest_rate)
+            iterative_precision = context.prec
+
+            context.prec = CLOSED_FORM_PRECISION
+            balance = CreateAmortizationScheduleService._closed_form_balance(
+                amount, payment, monthly_interest_rate, max(from_month - 1, 0))
+
+            first_month = max(from_month, 1)
+            drift_scale = Decimal(10) ** (8 - iterative_precision)
+            compounding_factor = (1 + monthly_interest_rate) ** first_month
+            for month in range(first_month, to_month + 1):
+                if month > first_month:
+                    compounding_factor *= 1 + monthly_interest_rate
+                accrued_interest = balance * monthly_interest_rate
+                principal_paid = payment - accrued_interest
+                balance = balance - principal_paid
+
+                month_balance = balance
+                month_payment = payment
+                total_paid = payment * month
+                total_principal_paid = amount - balance
+                total_interest_paid = total_paid - total_principal_paid
+
+                if month == term_months:
+                    # Same balloon adjustment as the full schedule
+                    month_balance = Decimal('0.00')
+                    month_payment += balance
+                    total_principal_paid += balance
+                    total_paid += balance
+
+                # The iterative schedule rounds every intermediate value to the
+                # context precision, so it drifts from the exact closed form by
+                # a tiny amount that grows with the compounding factor. Any
+                # value within that drift of a half-cent boundary could round
+                # either way; in that case defer to the iterative schedule.
+                drift = compounding_factor * (amount + payment * month) * drift_scale
+                unrounded_month = {
+                    'balance': month_balance,
+                    'payment': month_payment,
+                    'principal_paid': principal_paid,
+                    'interest_paid': accrued_interest,
+                    'total_paid': total_paid,
+                    'total_principal_paid': total_principal_paid,
+                    'total_interest_paid': total_interest_paid
+                }
+                schedule_month = {field: round(value, 2) for field, value in unrounded_month.items()}
+                # Rounding is ambiguous when the value is within the drift of
+                # a half cent, i.e. this far or further from its rounded value
+                ambiguous_rounding = HALF_CENT - drift
+                if any(abs(value - schedule_month[field]) >= ambiguous_rounding
+                       for field, value in unrounded_month.items()):
+                    context.prec = iterative_precision
+                    return CreateAmortizationScheduleService.generate_amortization_schedule(
+                        amount, term_months, interest_rate)[from_month:to_month + 1]
+
+                if month == term_months:
+                    schedule_month['principal_paid'] = schedule_month['payment'] - schedule_month['interest_paid']
+
+                window.append(schedule_month)
+
+        return window
+
+    @staticmethod
+    def _validate_loan_parameters(amount: Decimal, term_months: int, interest_rate: Decimal):
+        """Validate loan parameters for schedule generation
+
         @:raises: Exception if any loan parameter is invalid
         """
         if amount <= 0:
@@ -28,74 +345,35 @@ class CreateAmortizationScheduleService:
         if interest_rate < 0:
             raise Exception('interest_rate must be 0.0 or greater')
 
-        decimal.getcontext().rounding = decimal.ROUND_HALF_UP
+    @staticmethod
+    def _calculate_payment(amount: Decimal, term_months: int, interest_rate: Decimal):
+        """Calculate the monthly interest rate and whole-cent monthly payment
+
+        Uses the current decimal context, which must be SCHEDULE_CONTEXT.
+
+        @:returns: Tuple of monthly interest rate and monthly payment
+        """
+        # Same as amount * (r * (1 + r) ^ term) / ((1 + r) ^ term - 1) with the
+        # rate-only parts looked up from the annuity factor table
+        factors = CreateAmortizationScheduleService.annuity_factor_table.get_factors(interest_rate, term_months)
+        monthly_interest_rate = factors.monthly_interest_rate
         try:
-            monthly_interest_rate = interest_rate / Decimal('12')
-            payment = amount * \
-                (monthly_interest_rate * (1 + monthly_interest_rate) ** term_months) / \
-                ((1 + monthly_interest_rate) ** term_months - 1)
+            payment = amount * factors.numerator / factors.denominator
             # Actual payment can only be in whole cents. This will likely result
             # in a balance discrepancy which will be adjusted for at the end.
             payment = round(payment, 2)
         except decimal.InvalidOperation:
             # Handle 0% interest rate
             payment = round(amount / term_months, 2)
+        return monthly_interest_rate, payment
 
-        schedule = [{
-            'balance': amount,
-            'payment': Decimal('0.00'),
-            'principal_paid': Decimal('0.00'),
-            'interest_paid': Decimal('0.00'),
-            'total_paid': Decimal('0.00'),
-            'total_principal_paid': Decimal('0.00'),
-            'total_interest_paid': Decimal('0.00')
-        }]
-
-        for month in range(1, term_months + 1):
-            previous_month = schedule[month - 1]
-
-            accrued_interest = previous_month['balance'] * monthly_interest_rate
-            principal_paid = payment - accrued_interest
-            balance = previous_month['balance'] - principal_paid
-
-            total_paid = previous_month['total_paid'] + payment
-            total_principal_paid = previous_month['total_principal_paid'] + principal_paid
-            total_interest_paid = previous_month['total_interest_paid'] + accrued_interest
-
-            schedule.append({
-                'balance': balance,
-                'payment': payment,
-                'principal_paid': principal_paid,
-                'interest_paid': accrued_interest,
-                'total_paid': total_paid,
-                'total_principal_paid': total_principal_paid,
-                'total_interest_paid': total_interest_paid
-            })
-
-        # Payment is always in a whole-cent value, but that might lead to a
-        # small discrepancy as the final balance. Adjust final balances to
-        # result in the final amounts (this makes a balloon payment in cases
-        # where the loan has negative amortization).
-        last_month = schedule[-1]
-        balance_discrepancy = last_month['balance']
-        last_month['balance'] = Decimal('0.00')
-        last_month['payment'] += balance_discrepancy
-        last_month['total_principal_paid'] += balance_discrepancy
-        last_month['total_paid'] += balance_discrepancy
-
-        # Final schedule only needs whole cents
-        for month in range(1, term_months + 1):
-            schedule[month]['balance'] = round(schedule[month]['balance'], 2)
-            schedule[month]['payment'] = round(schedule[month]['payment'], 2)
-            schedule[month]['principal_paid'] = round(schedule[month]['principal_paid'], 2)
-            schedule[month]['interest_paid'] = round(schedule[month]['interest_paid'], 2)
-            schedule[month]['total_paid'] = round(schedule[month]['total_paid'], 2)
-            schedule[month]['total_principal_paid'] = round(schedule[month]['total_principal_paid'], 2)
-            schedule[month]['total_interest_paid'] = round(schedule[month]['total_interest_paid'], 2)
-
-        last_month = schedule[-1]
-        # This field can be susceptible to rounding errors. Ensure these three
-        # fields add up correctly.
-        last_month['principal_paid'] = last_month['payment'] - last_month['interest_paid']
+    @staticmethod
+    def _closed_form_balance(amount: Decimal, payment: Decimal, monthly_interest_rate: Decimal, month: int):
+        """Calculate the unrounded balance after a number of level payments
 
-        return schedule
+        @:returns: Balance remaining after the given month's payment
+        """
+        if monthly_interest_rate == 0:
+            return amount - payment * month
+        compounding_factor = (1 + monthly_interest_rate) ** month
+        return amount * compounding_factor - payment * (compounding_factor - 1) / monthly_interest_rate
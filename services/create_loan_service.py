@@ -1,5 +1,5 @@
 """Service for creating a loan"""
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from models import Loan
 from request_exception import RequestException
 
@@ -30,22 +30,131 @@ class CreateLoanService:
         @:returns: loan ID of newly-created loan
         @:raises: RequestException if request is invalid
         """
-        if not user_repository.exists(user_id):
+        loan = CreateLoanService._build_loan(
+            user_repository.exists(user_id), user_id, amount, term_months, interest_rate)
+        loan_repository.create(loan)
+        return loan.loan_id
+
+    @staticmethod
+    def create_loans(loan_repository, user_repository, rows):
+        """Create many loans in the repository
+
+        Every row is validated first, with the users of all rows checked in
+        one repository call, and then the valid rows are created together.
+
+        @:param loan_repository: Repository to create loans in
+        @:param user_repository: Repository to check users from
+        @:param rows: List of dictionaries with user_id, amount (string),
+        term_months and interest_rate (string)
+        @:returns: Tuple of list of new loan IDs (None for invalid rows) and
+        dictionary of invalid row index to error message
+        """
+        loans, errors = CreateLoanService._build_loans(rows)
+        CreateLoanService._remove_missing_users(
+            loans, errors, user_repository.exists_many({loan.user_id for loan in loans.values()}))
+        loan_repository.create_many(list(loans.values()))
+        return CreateLoanService._loan_ids(loans, len(rows)), errors
+
+    @staticmethod
+    def _build_loan(user_exists: bool, user_id: int, amount: Decimal, term_months: int, interest_rate: Decimal):
+        """Validate a loan request and build its loan
+
+        @:param user_exists: Whether the user exists
+        @:returns: Loan to create
+        @:raises: RequestException if request is invalid
+        """
+        if not user_exists:
             raise RequestException("user {} doesn't exist".format(user_id))
 
-        if not (0 <= amount <= MAX_LOAN_AMOUNT):
-            raise RequestException("Invalid amount {}".format(amount))
-        if not (0 <= term_months <= MAX_TERM_MONTHS):
-            raise RequestException("Invalid term months {}".format(term_months))
-        if not (MIN_INTEREST_RATE <= interest_rate <= MAX_INTEREST_RATE):
-            raise RequestException("Invalid interest rate {}".format(interest_rate))
+        CreateLoanService._validate_loan_terms(amount, term_months, interest_rate)
 
-        loan = Loan(
+        return Loan(
             loan_id=0,
             user_id=user_id,
             amount=amount,
             term_months=term_months,
             interest_rate=interest_rate,
             authorized_user_ids=[])
-        loan_repository.create(loan)
-        return loan.loan_id
+
+    @staticmethod
+    def _build_loans(rows):
+        """Validate the fields of the rows of a bulk request and build their loans
+
+        Users are checked separately.
+
+        @:returns: Tuple of dictionary of valid row index to loan and
+        dictionary of invalid row index to error message
+        """
+        errors = {}
+        loans = {}
+        for index, row in enumerate(rows):
+            try:
+                if not isinstance(row, dict):
+                    raise RequestException('row must be an object')
+                user_id = row.get('user_id')
+                term_months = row.get('term_months')
+                if type(user_id) is not int:
+                    raise RequestException('Invalid user ID {}'.format(user_id))
+                amount = CreateLoanService._parse_decimal(row.get('amount'), 'amount')
+                if type(term_months) is not int:
+                    raise RequestException('Invalid term months {}'.format(term_months))
+                interest_rate = CreateLoanService._parse_decimal(row.get('interest_rate'), 'interest rate')
+                CreateLoanService._validate_loan_terms(amount, term_months, interest_rate)
+            except RequestException as e:
+                errors[index] = str(e)
+                continue
+            loans[index] = Loan(
+                loan_id=0,
+                user_id=user_id,
+                amount=amount,
+                term_months=term_months,
+                interest_rate=interest_rate,
+                authorized_user_ids=[])
+        return loans, errors
+
+    @staticmethod
+    def _remove_missing_users(loans, errors, existing_user_ids):
+        """Move the loans of users that don't exist to the errors
+
+        @:param loans: Dictionary of valid row index to loan (updated)
+        @:param errors: Dictionary of invalid row index to error message
+        (updated)
+        @:param existing_user_ids: Set of the loans' user IDs that exist
+        """
+        for index, loan in list(loans.items()):
+            if loan.user_id not in existing_user_ids:
+                errors[index] = "user {} doesn't exist".format(loan.user_id)
+                del loans[index]
+
+    @staticmethod
+    def _loan_ids(loans, row_count: int):
+        """Get the IDs of created loans in row order (None for invalid rows)"""
+        return [loans[index].loan_id if index in loans else None for index in range(row_count)]
+
+    @staticmethod
+    def _validate_loan_terms(amount: Decimal, term_months: int, interest_rate: Decimal):
+        """Validate loan amount, term and interest rate
+
+        @:raises: RequestException if any is out of range
+        """
+        if not (0 <= amount <= MAX_LOAN_AMOUNT):
+            raise RequestException("Invalid amount {}".format(amount))
+        if not (0 <= term_months <= MAX_TERM_MONTHS):
+            raise RequestException("Invalid term months {}".format(term_months))
+        if not (MIN_INTEREST_RATE <= interest_rate <= MAX_INTEREST_RATE):
+            raise RequestException("Invalid interest rate {}".format(interest_rate))
+
+    @staticmethod
+    def _parse_decimal(value, name: str):
+        """Parse a decimal string from a bulk row
+
+        @:raises: RequestException if value isn't a finite decimal string
+        """
+        try:
+            if isinstance(value, str):
+                parsed = Decimal(value)
+                if parsed.is_finite():
+                    return parsed
+        except InvalidOperation:
+            pass
+        raise RequestException('Invalid {}'.format(name))
@@ -13,8 +13,55 @@ class CreateUserService:
         @:returns: user ID of newly-created user
         @:raises: RequestException if request is invalid
         """
-        if username is None or username == "":
-            raise RequestException('Missing username')
-        user = User(user_id=0, username=username)
+        user = CreateUserService._build_user(username)
         user_repository.create(user)
         return user.user_id
+
+    @staticmethod
+    def create_users(user_repository, rows):
+        """Create many users in the repository
+
+        Every row is validated first and then the valid rows are created
+        together.
+
+        @:param user_repository: Repository to create users in
+        @:param rows: List of dictionaries with username
+        @:returns: Tuple of list of new user IDs (None for invalid rows) and
+        dictionary of invalid row index to error message
+        """
+        users, errors = CreateUserService._build_users(rows)
+        user_repository.create_many(list(users.values()))
+        return CreateUserService._user_ids(users, len(rows)), errors
+
+    @staticmethod
+    def _build_user(username):
+        """Validate a username and build its user
+
+        @:returns: User to create
+        @:raises: RequestException if username is missing
+        """
+        if username is None or username == "":
+            raise RequestException('Missing username')
+        return User(user_id=0, username=username)
+
+    @staticmethod
+    def _build_users(rows):
+        """Validate the rows of a bulk request and build their users
+
+        @:returns: Tuple of dictionary of valid row index to user and
+        dictionary of invalid row index to error message
+        """
+        errors = {}
+        users = {}
+        for index, row in enumerate(rows):
+            username = row.get('username') if isinstance(row, dict) else None
+            if not isinstance(username, str) or username == "":
+                errors[index] = 'Missing username'
+                continue
+            users[index] = User(user_id=0, username=username)
+        return users, errors
+
+    @staticmethod
+    def _user_ids(users, row_count: int):
+        """Get the IDs of created users in row order (None for invalid rows)"""
+        return [users[index].user_id if index in users else None for index in range(row_count)]
@@ -0,0 +1,224 @@
+"""Service for generating amortization schedules with actual/365 interest"""
+import calendar
+import datetime
+import decimal
+from decimal import Decimal
+from request_exception import RequestException
+from .annuity_factor_table import SCHEDULE_CONTEXT
+from .create_amortization_schedule_service import CreateAmortizationScheduleService
+
+
+# Interest accrues daily on a 365-day year, also in leap years
+DAYS_IN_YEAR = 365
+# Newton iterations (final balance evaluations) before giving up on
+# improving the payment; in practice it takes 1 to 3 (3 for nearly every loan,
+# as measured by test_schedules in test_day_count_amortization_schedule_service)
+MAX_SOLVER_ITERATIONS = 8
+
+
+class DayCountAmortizationScheduleService:
+    """Service for generating amortization schedules with actual/365 interest
+
+    Unlike CreateAmortizationScheduleService, where every month accrues a
+    twelfth of a year's interest, each month accrues interest for the actual
+    days since the previous payment (interest rate * days / 365), rounded to
+    whole cents. Payments are due on the same day of each month as the start
+    date (or the last day of shorter months).
+
+    The level whole-cent payment is found with Newton's method on the
+    balance left after the last payment, so the final payment differs from
+    the others only by what a whole-cent payment can't absorb.
+    """
+    @staticmethod
+    def generate_amortization_schedule(
+            amount: Decimal,
+            term_months: int,
+            interest_rate: Decimal,
+            start_date: datetime.date):
+        """Generate an amortization schedule with actual/365 interest
+
+        @:param amount: Amount of loan (positive; rounded to whole cents)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param start_date: Date the loan starts (the first payment is due a
+        month later)
+        @:returns: Array of month schedules as from
+        CreateAmortizationScheduleService.generate_amortization_schedule, with
+        the date of each month's payment (the start date for month 0)
+        @:raises: Exception if any loan parameter is invalid
+        @:raises: RequestException if the last payment would be after year 9999
+        """
+        CreateAmortizationScheduleService._validate_loan_parameters(amount, term_months, interest_rate)
+        payment_dates = DayCountAmortizationScheduleService._payment_dates(start_date, term_months)
+        period_days = [(date - previous).days for previous, date in zip(payment_dates, payment_dates[1:])]
+        amount_cents = DayCountAmortizationScheduleService._to_cents(amount)
+        rate_numerator, rate_denominator = interest_rate.as_integer_ratio()
+        rate_denominator *= DAYS_IN_YEAR
+        payment_cents, _ = DayCountAmortizationScheduleService._solve_payment_cents(
+            amount, amount_cents, term_months, interest_rate, period_days, rate_numerator, rate_denominator)
+
+        schedule = [{
+            'balance': amount,
+            'payment': Decimal('0.00'),
+            'principal_paid': Decimal('0.00'),
+            'interest_paid': Decimal('0.00'),
+            'total_paid': Decimal('0.00'),
+            'total_principal_paid': Decimal('0.00'),
+            'total_interest_paid': Decimal('0.00'),
+            'date': start_date
+        }]
+        balance = amount_cents
+        total_paid = 0
+        total_interest_paid = 0
+        for month, days in enumerate(period_days, 1):
+            interest_paid = DayCountAmortizationScheduleService._divide_round_half_up(
+                balance * rate_numerator * days, rate_denominator)
+            month_payment = payment_cents
+            if month == term_months:
+                # Final payment pays off whatever is left
+                month_payment = balance + interest_paid
+            principal_paid = month_payment - interest_paid
+            balance -= principal_paid
+            total_paid += month_payment
+            total_interest_paid += interest_paid
+            schedule.append({
+                'balance': Decimal(balance).scaleb(-2),
+                'payment': Decimal(month_payment).scaleb(-2),
+                'principal_paid': Decimal(principal_paid).scaleb(-2),
+                'interest_paid': Decimal(interest_paid).scaleb(-2),
+                'total_paid': Decimal(total_paid).scaleb(-2),
+                'total_principal_paid': Decimal(total_paid - total_interest_paid).scaleb(-2),
+                'total_interest_paid': Decimal(total_interest_paid).scaleb(-2),
+                'date': payment_dates[month]
+            })
+        return schedule
+
+    @staticmethod
+    def solve_level_payment(
+            amount: Decimal,
+            term_months: int,
+            interest_rate: Decimal,
+            start_date: datetime.date):
+        """Solve for the level whole-cent payment with actual/365 interest
+
+        @:param amount: Amount of loan (positive; rounded to whole cents)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param start_date: Date the loan starts
+        @:returns: Tuple of payment and number of Newton iterations (at most
+        MAX_SOLVER_ITERATIONS)
+        @:raises: Exception if any loan parameter is invalid
+        @:raises: RequestException if the last payment would be after year 9999
+        """
+        CreateAmortizationScheduleService._validate_loan_parameters(amount, term_months, interest_rate)
+        payment_dates = DayCountAmortizationScheduleService._payment_dates(start_date, term_months)
+        period_days = [(date - previous).days for previous, date in zip(payment_dates, payment_dates[1:])]
+        rate_numerator, rate_denominator = interest_rate.as_integer_ratio()
+        payment_cents, iterations = DayCountAmortizationScheduleService._solve_payment_cents(
+            amount,
+            DayCountAmortizationScheduleService._to_cents(amount),
+            term_months,
+            interest_rate,
+            period_days,
+            rate_numerator,
+            rate_denominator * DAYS_IN_YEAR)
+        return Decimal(payment_cents).scaleb(-2), iterations
+
+    @staticmethod
+    def _solve_payment_cents(
+            amount: Decimal,
+            amount_cents: int,
+            term_months: int,
+            interest_rate: Decimal,
+            period_days,
+            rate_numerator: int,
+            rate_denominator: int):
+        """Solve for the whole-cent payment leaving the smallest final balance
+
+        Starts from the payment of the monthly schedule. The final balance is
+        linear in the payment apart from rounding interest to cents, so a
+        Newton step (rounded to a cent) lands on or next to the best payment,
+        and the next cent towards a zero balance is tried before stopping.
+
+        @:returns: Tuple of payment in cents and number of iterations
+        """
+        with decimal.localcontext(SCHEDULE_CONTEXT):
+            _, payment = CreateAmortizationScheduleService._calculate_payment(amount, term_months, interest_rate)
+        payment_cents = int(payment.scaleb(2))
+
+        # Change of the final balance per cent of payment (ignoring rounding)
+        slope = 0.0
+        rate = float(interest_rate) / DAYS_IN_YEAR
+        for days in period_days:
+            slope = slope * (1 + rate * days) - 1
+
+        best_payment_cents, best_balance = None, None
+        tried = set()
+        iterations = 0
+        while iterations < MAX_SOLVER_ITERATIONS:
+            balance = DayCountAmortizationScheduleService._final_balance_cents(
+                amount_cents, payment_cents, period_days, rate_numerator, rate_denominator)
+            iterations += 1
+            tried.add(payment_cents)
+            if best_balance is None or abs(balance) < abs(best_balance):
+                best_payment_cents, best_balance = payment_cents, balance
+            if balance == 0:
+                break
+            step = round(balance / slope)
+            if step == 0:
+                # Within half a cent of the best payment going by the slope,
+                # but interest rounding can make the next cent closer
+                step = -1 if balance > 0 else 1
+            payment_cents -= step
+            if payment_cents in tried:
+                break
+        return best_payment_cents, iterations
+
+    @staticmethod
+    def _final_balance_cents(
+            amount_cents: int,
+            payment_cents: int,
+            period_days,
+            rate_numerator: int,
+            rate_denominator: int):
+        """Calculate the balance left after paying the payment every month
+
+        @:returns: Balance in cents (negative if overpaid)
+        """
+        balance = amount_cents
+        for days in period_days:
+            balance += DayCountAmortizationScheduleService._divide_round_half_up(
+                balance * rate_numerator * days, rate_denominator) - payment_cents
+        return balance
+
+    @staticmethod
+    def _payment_dates(start_date: datetime.date, term_months: int):
+        """Get the start date and the due date of each payment
+
+        @:returns: List of term_months + 1 dates
+        @:raises: RequestException if the last payment would be after year 9999
+        """
+        if start_date.year + (start_date.month - 1 + term_months) // 12 > datetime.MAXYEAR:
+            raise RequestException('start_date must leave the last payment before year {}'.format(
+                datetime.MAXYEAR + 1))
+        dates = [start_date]
+        for month in range(1, term_months + 1):
+            year, month_index = divmod(start_date.month - 1 + month, 12)
+            year += start_date.year
+            day = min(start_date.day, calendar.monthrange(year, month_index + 1)[1])
+            dates.append(datetime.date(year, month_index + 1, day))
+        return dates
+
+    @staticmethod
+    def _to_cents(amount: Decimal):
+        """Round an amount half up to whole cents"""
+        return int(amount.scaleb(2).to_integral_value(rounding=decimal.ROUND_HALF_UP))
+
+    @staticmethod
+    def _divide_round_half_up(numerator: int, denominator: int):
+        """Divide integers rounding half away from zero like ROUND_HALF_UP
+
+        @:param denominator: Positive denominator
+        """
+        quotient = (abs(numerator) * 2 + denominator) // (denominator * 2)
+        return quotient if numerator >= 0 else -quotient
@@ -0,0 +1,164 @@
+"""Integer fixed-point amortization engine"""
+import decimal
+from decimal import Decimal
+from models.amortization_schedule import NEGATIVE_ZEROS
+
+
+# Values are tracked as integers of 1e-10 cents (1e-12 dollars)
+FIXED_POINT_DIGITS = 12
+UNITS_PER_CENT = 10 ** (FIXED_POINT_DIGITS - 2)
+HALF_CENT = UNITS_PER_CENT // 2
+# Monthly interest rates are scaled far enough that the Decimal engine's
+# monthly rate is represented exactly for any rate with up to 30 decimals.
+RATE_DIGITS = 30
+RATE_SCALE = 10 ** RATE_DIGITS
+HALF_RATE_SCALE = RATE_SCALE // 2
+# Relative error the Decimal engine can pick up in a month at its default
+# 28 digits of precision (a few operations each rounding by up to 5e-28)
+DECIMAL_RELATIVE_ERROR = 1e-26
+
+
+class AmbiguousRoundingError(Exception):
+    """Value is too close to a half cent to know which way it rounds, or
+    could be a negative zero"""
+    pass
+
+
+class FixedPointAmortizationEngine:
+    """Integer fixed-point amortization engine
+
+    Runs the monthly schedule recurrence with Python integers instead of
+    Decimals. Balances are kept in 1e-10 cent units and the interest product
+    is computed exactly before being rounded half up to those units.
+    """
+    @staticmethod
+    def generate_schedule_cents(amount: Decimal, term_months: int, monthly_interest_rate: Decimal, payment: Decimal):
+        """Generate schedule columns of whole cents
+
+        The Decimal engine rounds every step to its context precision, so the
+        two engines differ very slightly before rounding to cents. The worst
+        case difference is tracked while generating; if any value is within
+        that distance of a half cent (and so could round either way) no
+        schedule is returned and the Decimal engine must be used instead. The
+        same goes for any value rounding to zero from below (or too close to
+        zero to tell), which the Decimal engine gives as negative zero; these
+        only come up for loans of a few cents.
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param monthly_interest_rate: Monthly interest rate used by the
+        Decimal engine
+        @:param payment: Whole-cent monthly payment used by the Decimal engine
+        @:returns: Dictionary of schedule field name to list of cents (with
+        no NEGATIVE_ZEROS), or None if the result can't be guaranteed to match
+        the Decimal engine
+        """
+        rate = FixedPointAmortizationEngine._to_fixed_point(monthly_interest_rate, RATE_DIGITS)
+        rate_exact = monthly_interest_rate == Decimal(rate).scaleb(-RATE_DIGITS)
+        float_rate = float(monthly_interest_rate)
+        amount_units = FixedPointAmortizationEngine._to_fixed_point(amount, FIXED_POINT_DIGITS)
+        if amount != Decimal(amount_units).scaleb(-FIXED_POINT_DIGITS):
+            # Amounts past 1e-12 dollars would be rounded before starting
+            return None
+        payment_units = FixedPointAmortizationEngine._to_fixed_point(payment, FIXED_POINT_DIGITS)
+
+        payment_cents = FixedPointAmortizationEngine._to_fixed_point(payment, 2)
+        round_to_cents = FixedPointAmortizationEngine._round_to_cents
+
+        balance = amount_units
+        total_interest_paid = 0
+        balance_error = 0.0
+        total_interest_error = 0.0
+
+        balances = [round_to_cents(amount_units, 0)]
+        payments = [0]
+        principal_payments = [0]
+        interest_payments = [0]
+        total_payments = [0]
+        total_principal_payments = [0]
+        total_interest_payments = [0]
+
+        try:
+            for month in range(1, term_months + 1):
+                accrued_interest, remainder = divmod(balance * rate, RATE_SCALE)
+                accrued_interest += remainder >= HALF_RATE_SCALE
+                principal_paid = payment_units - accrued_interest
+                balance -= principal_paid
+                total_interest_paid += accrued_interest
+
+                # Worst case distance from the Decimal engine: half a unit from
+                # rounding the interest here, the Decimal engine's own rounding,
+                # and earlier balance error carried forward. If the interest
+                # was exact then so was the Decimal engine (anything exact to
+                # 1e-12 dollars fits in its 28 digits), so the step adds no
+                # error.
+                if remainder or not rate_exact:
+                    step_error = 1 + DECIMAL_RELATIVE_ERROR * (abs(balance) + abs(total_interest_paid))
+                else:
+                    step_error = 0
+                interest_error = float_rate * balance_error + step_error
+                balance_error = balance_error * (1 + float_rate) + step_error
+                total_interest_error += interest_error
+
+                interest_cents = round_to_cents(accrued_interest, interest_error)
+                interest_payments.append(interest_cents)
+                total_interest_payments.append(round_to_cents(total_interest_paid, total_interest_error))
+                if month < term_months:
+                    balances.append(round_to_cents(balance, balance_error))
+                    payments.append(payment_cents)
+                    principal_payments.append(round_to_cents(principal_paid, interest_error))
+                    total_payments.append(payment_cents * month)
+                    total_principal_payments.append(round_to_cents(amount_units - balance, balance_error))
+                else:
+                    # Final balance discrepancy is added to the payment, and
+                    # the principal derived so the month's fields add up
+                    final_payment_cents = round_to_cents(payment_units + balance, balance_error)
+                    balances.append(0)
+                    payments.append(final_payment_cents)
+                    principal_payments.append(final_payment_cents - interest_cents)
+                    total_payments.append(round_to_cents(payment_units * month + balance, balance_error))
+                    # The Decimal engine sums the principal paid each month
+                    # and the discrepancy rather than using the amount, so
+                    # this is only the amount up to the balance error
+                    total_principal_payments.append(round_to_cents(amount_units, balance_error))
+        except AmbiguousRoundingError:
+            return None
+
+        return {
+            'balance': balances,
+            'payment': payments,
+            'principal_paid': principal_payments,
+            'interest_paid': interest_payments,
+            'total_paid': total_payments,
+            'total_principal_paid': total_principal_payments,
+            'total_interest_paid': total_interest_payments,
+            NEGATIVE_ZEROS: []
+        }
+
+    @staticmethod
+    def _round_to_cents(value: int, error: float):
+        """Round a fixed-point value half up (away from zero) to whole cents
+
+        @:param value: Fixed-point value
+        @:param error: Maximum distance of the value from the exact result
+        @:returns: Value in cents
+        @:raises: AmbiguousRoundingError if the value is within its error of
+        a half cent, or rounds to zero and could be negative
+        """
+        value_cents, remainder = divmod(value, UNITS_PER_CENT)
+        if remainder == HALF_CENT:
+            if error:
+                raise AmbiguousRoundingError()
+            # Python's divmod floors, so only positive values round up
+            return value_cents + (value > 0)
+        if abs(remainder - HALF_CENT) <= error:
+            raise AmbiguousRoundingError()
+        value_cents += remainder > HALF_CENT
+        if not value_cents and (value < 0 or error and value <= error):
+            raise AmbiguousRoundingError()
+        return value_cents
+
+    @staticmethod
+    def _to_fixed_point(value: Decimal, digits: int):
+        """Convert a Decimal to an integer of 10^-digits units (half up)"""
+        return int(value.scaleb(digits).to_integral_value(rounding=decimal.ROUND_HALF_UP))
@@ -1,28 +1,174 @@
 """Service for getting all loans from a user"""
+import dataclasses
 from request_exception import RequestException
 
 
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+# Cursors are '<section>:<last loan ID>'; owned loans are listed before loans
+# shared with the user
+OWNED_SECTION = 'owned'
+SHARED_SECTION = 'shared'
+
+
 class GetUserLoansService:
     """Service for getting all loans from a user"""
     @staticmethod
-    def get_user_loans(loan_repository, user_repository, authorized_user_repository, user_id: int):
+    def get_user_loans(
+            loan_repository,
+            user_repository,
+            authorized_user_repository,
+            user_id: int,
+            user_loans_view=None):
         """Get all loans from a user
         @:param loan_repository: Repository to read loans from
         @:param user_repository: Repository to read users from
         @:param authorized_user_repository: Repository to read authorized users from
         @:param user_id: User ID to get loans from
+        @:param user_loans_view: UserLoansView maintained by the loan and
+        authorized user repositories (optional; the repositories are read
+        directly if not given)
         @:returns: list of loans belonging to user
         @:raises: RequestException if request is invalid
         """
-        if not user_repository.exists(user_id):
+        GetUserLoansService._check_user(user_repository.exists(user_id), user_id)
+
+        if user_loans_view is not None:
+            loan_ids = user_loans_view.read_loan_ids(user_id)
+        else:
+            loan_ids = [loan.loan_id for loan in loan_repository.read_loans_for_user_id(user_id)]
+            loan_ids += authorized_user_repository.read_loan_ids_by_user_id(user_id)
+
+        return GetUserLoansService._read_loans(loan_repository, authorized_user_repository, loan_ids)
+
+    @staticmethod
+    def get_user_loans_page(
+            loan_repository,
+            user_repository,
+            authorized_user_repository,
+            user_id: int,
+            cursor: str = None,
+            limit: int = DEFAULT_PAGE_LIMIT):
+        """Get a page of loans from a user
+
+        Loans owned by the user come first, then loans shared with the user,
+        each in ascending loan ID order. Pages are read from the repositories'
+        ordered loan ID indexes so only the loans on the page are read.
+
+        @:param loan_repository: Repository to read loans from
+        @:param user_repository: Repository to read users from
+        @:param authorized_user_repository: Repository to read authorized users from
+        @:param user_id: User ID to get loans from
+        @:param cursor: Cursor returned with the previous page (None for the
+        first page)
+        @:param limit: Maximum number of loans in the page
+        @:returns: Tuple of list of loans and cursor of the next page (None if
+        there are no more loans)
+        @:raises: RequestException if request is invalid
+        """
+        GetUserLoansService._check_user(user_repository.exists(user_id), user_id)
+        section, after_loan_id = GetUserLoansService._parse_page_request(cursor, limit)
+
+        # One more ID than needed is read to know if there is another page
+        owned_loan_ids = []
+        if section == OWNED_SECTION:
+            owned_loan_ids, next_cursor = GetUserLoansService._owned_page(
+                loan_repository.read_loan_ids_after(user_id, after_loan_id, limit + 1), limit)
+            if next_cursor is not None:
+                return (GetUserLoansService._read_loans(loan_repository, authorized_user_repository, owned_loan_ids),
+                        next_cursor)
+            after_loan_id = 0
+
+        shared_limit = limit - len(owned_loan_ids)
+        loan_ids, next_cursor = GetUserLoansService._shared_page(
+            owned_loan_ids,
+            authorized_user_repository.read_loan_ids_after(user_id, after_loan_id, shared_limit + 1),
+            shared_limit)
+        return GetUserLoansService._read_loans(loan_repository, authorized_user_repository, loan_ids), next_cursor
+
+    @staticmethod
+    def _read_loans(loan_repository, authorized_user_repository, loan_ids):
+        """Read loans with their authorized user IDs"""
+        authorized_user_ids = authorized_user_repository.read_authorized_user_ids_many(loan_ids)
+        return GetUserLoansService._with_authorized_user_ids(loan_repository.read_many(loan_ids), authorized_user_ids)
+
+    @staticmethod
+    def _check_user(user_exists: bool, user_id: int):
+        """Check the user to get loans from exists
+
+        @:param user_exists: Whether the user exists
+        @:raises: RequestException if the user doesn't exist
+        """
+        if not user_exists:
             raise RequestException('missing user {}'.format(user_id))
-        loans = loan_repository.read_loans_for_user_id(user_id)
 
-        authorized_loan_ids = authorized_user_repository.read_loan_ids_by_user_id(user_id)
-        for authorized_loan_id in authorized_loan_ids:
-            loans.append(loan_repository.read(authorized_loan_id))
+    @staticmethod
+    def _parse_page_request(cursor: str, limit: int):
+        """Validate the cursor and limit of a page request
+
+        @:returns: Tuple of section and last loan ID read
+        @:raises: RequestException if the cursor or limit is invalid
+        """
+        if not 1 <= limit <= MAX_PAGE_LIMIT:
+            raise RequestException('limit must be between 1 and {}'.format(MAX_PAGE_LIMIT))
+        return GetUserLoansService._parse_cursor(cursor)
+
+    @staticmethod
+    def _owned_page(owned_loan_ids, limit: int):
+        """Take the owned loans of a page
+
+        @:param owned_loan_ids: Up to limit + 1 owned loan IDs after the cursor
+        @:param limit: Maximum number of loans in the page
+        @:returns: Tuple of owned loan IDs in the page and cursor of the next
+        page if the page is full of owned loans (None if shared loans follow)
+        """
+        if len(owned_loan_ids) > limit:
+            owned_loan_ids = owned_loan_ids[:limit]
+            return owned_loan_ids, '{}:{}'.format(OWNED_SECTION, owned_loan_ids[-1])
+        return owned_loan_ids, None
+
+    @staticmethod
+    def _shared_page(owned_loan_ids, shared_loan_ids, shared_limit: int):
+        """Fill the rest of a page with shared loans
+
+        @:param owned_loan_ids: Owned loan IDs in the page
+        @:param shared_loan_ids: Up to shared_limit + 1 shared loan IDs after
+        the cursor
+        @:param shared_limit: Maximum number of shared loans in the page
+        @:returns: Tuple of loan IDs in the page and cursor of the next page
+        (None if there are no more loans)
+        """
+        next_cursor = None
+        if len(shared_loan_ids) > shared_limit:
+            shared_loan_ids = shared_loan_ids[:shared_limit]
+            next_cursor = '{}:{}'.format(SHARED_SECTION, shared_loan_ids[-1] if shared_loan_ids else 0)
+        return owned_loan_ids + shared_loan_ids, next_cursor
+
+    @staticmethod
+    def _with_authorized_user_ids(loans, authorized_user_ids):
+        """Copy loans with their authorized user IDs
 
-        for loan in loans:
-            loan.authorized_user_ids = authorized_user_repository.read_authorized_user_ids(loan.loan_id)
+        Copies are returned so the repository's loans are never modified.
 
-        return loans
+        @:param loans: Loans read
+        @:param authorized_user_ids: Dictionary of loan ID to authorized user IDs
+        @:returns: List of loans
+        """
+        return [
+            dataclasses.replace(loan, authorized_user_ids=authorized_user_ids[loan.loan_id])
+            for loan in loans
+        ]
+
+    @staticmethod
+    def _parse_cursor(cursor: str):
+        """Parse a page cursor
+
+        @:returns: Tuple of section and last loan ID read
+        @:raises: RequestException if cursor is invalid
+        """
+        if cursor is None:
+            return OWNED_SECTION, 0
+        section, _, after_loan_id = cursor.partition(':')
+        if section not in (OWNED_SECTION, SHARED_SECTION) or not after_loan_id.isdigit():
+            raise RequestException('invalid cursor {}'.format(cursor))
+        return section, int(after_loan_id)
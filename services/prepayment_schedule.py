@@ -0,0 +1,195 @@
+"""Amortization schedule with extra payments"""
+import bisect
+import copy
+import decimal
+from decimal import Decimal
+from request_exception import RequestException
+from .annuity_factor_table import SCHEDULE_CONTEXT
+from .create_amortization_schedule_service import CreateAmortizationScheduleService
+from .create_loan_service import MAX_LOAN_AMOUNT
+
+
+DEFAULT_CHECKPOINT_INTERVAL = 12
+ZERO = Decimal('0.00')
+
+
+class PrepaymentSchedule:
+    """Amortization schedule with extra payments
+
+    Extra payments go entirely to principal, keeping the regular payment the
+    same, so the loan is paid off early once they have covered the balance;
+    the month paying it off pays only what is left. Without extra payments
+    the schedule is identical to generate_amortization_schedule, apart from
+    each month also having an extra_payment of 0.00.
+
+    The unrounded balance and running totals are kept as checkpoints every
+    checkpoint_interval months. with_extra_payments (for example as a user
+    drags a slider) reuses the months before the first changed extra
+    payment and recomputes only from the last checkpoint before it. Since
+    recomputation continues from exactly the state a full recomputation
+    would have reached, the result is identical to building the schedule from
+    scratch.
+    """
+    def __init__(
+            self,
+            amount: Decimal,
+            term_months: int,
+            interest_rate: Decimal,
+            extra_payments: dict | None = None,
+            checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        """Generate a schedule with extra payments
+
+        @:param amount: Amount of loan (positive)
+        @:param term_months: Loan term in months (positive)
+        @:param interest_rate: Interest rate (positive or zero)
+        @:param extra_payments: Dictionary of month (1 to term_months) to
+        extra payment in whole cents (optional)
+        @:param checkpoint_interval: Months between checkpoints
+        @:raises: Exception if any loan parameter is invalid; RequestException
+        if any extra payment is invalid
+        """
+        CreateAmortizationScheduleService._validate_loan_parameters(amount, term_months, interest_rate)
+        if checkpoint_interval <= 0:
+            raise Exception('checkpoint_interval must be 1 or longer')
+        self.amount = amount
+        self.term_months = term_months
+        self.interest_rate = interest_rate
+        self.checkpoint_interval = checkpoint_interval
+        self.context = SCHEDULE_CONTEXT.copy()
+        with decimal.localcontext(self.context):
+            self.monthly_interest_rate, self.payment = CreateAmortizationScheduleService._calculate_payment(
+                amount, term_months, interest_rate)
+
+        self.extra_payments = PrepaymentSchedule._validate_extra_payments(extra_payments or {}, term_months)
+        self.months = []
+        # Months generated rather than reused when the schedule was made
+        self.recomputed_months = 0
+        # Checkpoint months (ascending) and the state after each
+        self.checkpoint_months = []
+        self.checkpoint_states = []
+        self._generate_from(0, None)
+
+    def with_extra_payments(self, extra_payments: dict):
+        """Get the schedule with different extra payments
+
+        @:param extra_payments: Dictionary of month to extra payment in whole
+        cents, replacing this schedule's extra payments
+        @:returns: New PrepaymentSchedule (this one is unchanged)
+        @:raises: RequestException if any extra payment is invalid
+        """
+        extra_payments = PrepaymentSchedule._validate_extra_payments(extra_payments, self.term_months)
+        changed_months = [
+            month for month in set(self.extra_payments) | set(extra_payments)
+            if self.extra_payments.get(month, ZERO) != extra_payments.get(month, ZERO)
+        ]
+
+        schedule = copy.copy(self)
+        schedule.extra_payments = extra_payments
+        schedule.recomputed_months = 0
+        if not changed_months:
+            return schedule
+
+        # Months before the first change are unchanged, so continue from the
+        # last checkpoint before it
+        index = bisect.bisect_left(self.checkpoint_months, min(changed_months)) - 1
+        checkpoint_month = self.checkpoint_months[index]
+        schedule.months = self.months[:checkpoint_month + 1]
+        schedule.checkpoint_months = self.checkpoint_months[:index + 1]
+        schedule.checkpoint_states = self.checkpoint_states[:index + 1]
+        schedule._generate_from(checkpoint_month, self.checkpoint_states[index])
+        return schedule
+
+    def _generate_from(self, month: int, state):
+        """Generate months after a checkpoint
+
+        @:param month: Month of the checkpoint (0 to start from the beginning)
+        @:param state: State after that month, or None at the beginning
+        """
+        if state is None:
+            state = (self.amount, ZERO, ZERO, ZERO, False)
+            self.months.append({
+                'balance': self.amount,
+                'payment': ZERO,
+                'extra_payment': ZERO,
+                'principal_paid': ZERO,
+                'interest_paid': ZERO,
+                'total_paid': ZERO,
+                'total_principal_paid': ZERO,
+                'total_interest_paid': ZERO
+            })
+            self.checkpoint_months.append(0)
+            self.checkpoint_states.append(state)
+        balance, total_paid, total_principal_paid, total_interest_paid, prepaid = state
+        payment = self.payment
+        monthly_interest_rate = self.monthly_interest_rate
+        self.recomputed_months = 0
+
+        with decimal.localcontext(self.context):
+            for month in range(month + 1, self.term_months + 1):
+                extra_payment = self.extra_payments.get(month, ZERO)
+                prepaid = prepaid or extra_payment > 0
+                accrued_interest = balance * monthly_interest_rate
+                principal_paid = payment + extra_payment - accrued_interest
+                balance = balance - principal_paid
+
+                total_paid = total_paid + payment + extra_payment
+                total_principal_paid = total_principal_paid + principal_paid
+                total_interest_paid = total_interest_paid + accrued_interest
+
+                # Same as the schedule without extra payments, where the final
+                # month absorbs the balance discrepancy. With extra payments
+                # the loan also ends as soon as the balance is paid off, with
+                # the month's payments reduced by the overpayment.
+                final_month = month == self.term_months or (prepaid and balance <= 0)
+                month_payment = payment + extra_payment
+                if final_month:
+                    month_payment += balance
+                    principal_paid += balance
+                    total_principal_paid += balance
+                    total_paid += balance
+                    if extra_payment > 0:
+                        # Overpayment comes off the extra payment first
+                        extra_payment = max(extra_payment + min(balance, ZERO), ZERO)
+                    balance = ZERO
+
+                schedule_month = {
+                    'balance': round(balance, 2),
+                    'payment': round(month_payment, 2),
+                    'extra_payment': round(extra_payment, 2),
+                    'principal_paid': round(principal_paid, 2),
+                    'interest_paid': round(accrued_interest, 2),
+                    'total_paid': round(total_paid, 2),
+                    'total_principal_paid': round(total_principal_paid, 2),
+                    'total_interest_paid': round(total_interest_paid, 2)
+                }
+                if final_month:
+                    # Same correction as the schedule without extra payments
+                    schedule_month['principal_paid'] = schedule_month['payment'] - schedule_month['interest_paid']
+                self.months.append(schedule_month)
+                self.recomputed_months += 1
+                if final_month:
+                    break
+
+                if month % self.checkpoint_interval == 0:
+                    self.checkpoint_months.append(month)
+                    self.checkpoint_states.append(
+                        (balance, total_paid, total_principal_paid, total_interest_paid, prepaid))
+
+    @staticmethod
+    def _validate_extra_payments(extra_payments: dict, term_months: int):
+        """Validate extra payments
+
+        @:returns: Dictionary of month to extra payment without zero payments
+        @:raises: RequestException if any month or payment is invalid
+        """
+        validated = {}
+        for month, extra_payment in extra_payments.items():
+            if type(month) is not int or not 1 <= month <= term_months:
+                raise RequestException('invalid extra payment month {}'.format(month))
+            # No loan needs more than its maximum amount to pay it off
+            if not isinstance(extra_payment, Decimal) or not extra_payment.is_finite() \
+                    or not 0 <= extra_payment <= MAX_LOAN_AMOUNT or extra_payment.as_tuple().exponent < -2:
+                raise RequestException('invalid extra payment {} in month {}'.format(extra_payment, month))
+            if extra_payment > 0:
+                validated[month] = extra_payment
+        return validated
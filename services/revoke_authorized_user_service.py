@@ -0,0 +1,50 @@
+"""Service for revoking an authorized user from a loan"""
+from request_exception import RequestException
+
+
+class RevokeAuthorizedUserService:
+    """Service for revoking an authorized user from a loan"""
+    @staticmethod
+    def revoke_authorized_user(
+            authorized_user_repository,
+            loan_repository,
+            authorized_user_id: int,
+            loan_id: int):
+        """Revoke a user's access to a shared loan
+
+        @:param authorized_user_repository: Repository to delete authorized user from
+        @:param loan_repository: Repository to check loan from
+        @:param authorized_user_id: User ID of authorized user to revoke
+        @:param loan_id: Loan ID to revoke authorized user from
+        @:raises: RequestException if the loan doesn't exist or the user
+        isn't authorized on it
+        """
+        RevokeAuthorizedUserService._check_loan(loan_repository.read(loan_id), loan_id)
+        authorized_user = RevokeAuthorizedUserService._check_authorized_user(
+            authorized_user_repository.read_by_loan_id_and_user_id(loan_id, authorized_user_id),
+            authorized_user_id,
+            loan_id)
+        authorized_user_repository.delete(authorized_user.authorized_user_id)
+
+    @staticmethod
+    def _check_loan(loan, loan_id: int):
+        """Check the loan to revoke an authorized user from exists
+
+        @:param loan: Loan read (None if it doesn't exist)
+        @:raises: RequestException if the loan doesn't exist
+        """
+        if loan is None:
+            raise RequestException("loan {} does not exist".format(loan_id))
+
+    @staticmethod
+    def _check_authorized_user(authorized_user, authorized_user_id: int, loan_id: int):
+        """Check the user to revoke is authorized on the loan
+
+        @:param authorized_user: Authorized user read (None if the user isn't
+        authorized)
+        @:returns: Authorized user to delete
+        @:raises: RequestException if the user isn't authorized on the loan
+        """
+        if authorized_user is None:
+            raise RequestException("user {} is not authorized on loan {}".format(authorized_user_id, loan_id))
+        return authorized_user
@@ -0,0 +1,65 @@
+"""Strong entity tags of schedule responses"""
+import hashlib
+from decimal import Decimal
+
+
+# Changed whenever schedule responses would change for the same loan terms
+# (such as a change to the calculation or the response fields), so clients
+# don't keep schedules from before
+SCHEDULE_ETAG_VERSION = 1
+
+
+class ScheduleETag:
+    """Strong entity tags of schedule responses
+
+    A loan's terms never change once it exists and its schedule only depends
+    on them, so a response's entity tag is a hash of the terms (as given,
+    since 1000 and 1000.00 are formatted differently) and of what the
+    response contains and how it is encoded. It can be compared with
+    If-None-Match before the schedule is generated.
+
+    The tag identifies the content rather than the loan: a different loan
+    later given the same ID (such as memory repositories after a restart)
+    gets a different tag unless its schedule is the same. Clients only see
+    that when they revalidate, so how long they may skip revalidating is up
+    to the Cache-Control sent with it.
+    """
+    @staticmethod
+    def for_loan(amount: Decimal, term_months: int, interest_rate: Decimal, representation: str):
+        """Get the entity tag of a response from a loan's schedule
+
+        @:param amount: Amount of loan
+        @:param term_months: Loan term in months
+        @:param interest_rate: Interest rate
+        @:param representation: What the response contains and its media
+        type, distinct for every response about the same loan with different
+        content (such as 'months 0-12 application/json')
+        @:returns: Quoted strong entity tag
+        """
+        digest = hashlib.blake2b(
+            '{}|{}|{}|{}|{}'.format(SCHEDULE_ETAG_VERSION, amount, term_months, interest_rate, representation).encode(),
+            digest_size=16)
+        return '"{}"'.format(digest.hexdigest())
+
+    @staticmethod
+    def matches(if_none_match: str | None, etag: str):
+        """Check if an If-None-Match header matches an entity tag
+
+        Uses the weak comparison If-None-Match calls for, so W/ tags of the
+        same value match too.
+
+        @:param if_none_match: Value of If-None-Match header (None if missing)
+        @:param etag: Quoted entity tag of current response
+        @:returns: True if the client's copy is current (a 304 can be sent)
+        """
+        if if_none_match is None:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == etag:
+                return True
+        return False
@@ -0,0 +1,43 @@
+"""Encoder of amortization schedule responses"""
+import orjson
+from models import AmortizationSchedule
+
+
+class ScheduleJsonEncoder:
+    """Encoder of amortization schedule responses
+
+    Renders the schedule endpoint's JSON straight from the schedule's integer
+    cents columns, skipping the Decimal month mappings and FastAPI's
+    jsonable_encoder.
+    """
+    @staticmethod
+    def encode_schedule(schedule: AmortizationSchedule):
+        """Encode the month, remaining balance and monthly payment of each month
+
+        @:param schedule: Amortization schedule
+        @:returns: UTF-8 JSON array of month objects
+        """
+        format_cents = ScheduleJsonEncoder._format_cents
+        months = [
+            {
+                'month': month,
+                'remaining_balance': format_cents(balance),
+                'monthly_payment': format_cents(payment)
+            }
+            for month, (balance, payment) in enumerate(zip(schedule.column('balance'), schedule.column('payment')))
+        ]
+        for field, month in schedule.negative_zeros:
+            if field == 'balance':
+                months[month]['remaining_balance'] = '-0.00'
+            elif field == 'payment':
+                months[month]['monthly_payment'] = '-0.00'
+        # Month 0 balance keeps the amount's original representation
+        months[0]['remaining_balance'] = str(schedule.amount)
+        return orjson.dumps(months)
+
+    @staticmethod
+    def _format_cents(cents: int):
+        """Format cents the same as str() of the Decimal dollar amount"""
+        if cents < 0:
+            return '-%d.%02d' % divmod(-cents, 100)
+        return '%d.%02d' % divmod(cents, 100)
@@ -0,0 +1,34 @@
+"""Tests for AddAuthorizedUserService"""
+import unittest
+from decimal import Decimal
+from repositories import AuthorizedUserRepository, LoanRepository, UserRepository
+from services import AddAuthorizedUserService, CreateLoanService, CreateUserService
+
+
+class TestAddAuthorizedUserService(unittest.TestCase):
+    def test_add_authorized_users(self):
+        user_repository = UserRepository()
+        loan_repository = LoanRepository()
+        authorized_user_repository = AuthorizedUserRepository()
+        owner_id = CreateUserService.create_user(user_repository, 'alice')
+        user_id = CreateUserService.create_user(user_repository, 'bob')
+        loan_id = CreateLoanService.create_loan(
+            loan_repository, user_repository, owner_id, Decimal('1000.00'), 12, Decimal('0.1'))
+
+        authorized_user_ids, errors = AddAuthorizedUserService.add_authorized_users(
+            authorized_user_repository,
+            user_repository,
+            loan_repository,
+            [{'loan_id': loan_id, 'user_id': user_id},
+             {'loan_id': 100, 'user_id': user_id},
+             {'loan_id': loan_id, 'user_id': 100},
+             {'loan_id': str(loan_id), 'user_id': user_id},
+             [],
+             {'loan_id': loan_id, 'user_id': owner_id}])
+
+        self.assertEqual([1, None, None, None, None, 2], authorized_user_ids)
+        self.assertEqual(
+            {1: 'loan 100 does not exist', 2: 'user 100 does not exist'},
+            {index: errors[index] for index in [1, 2]})
+        self.assertEqual({1, 2, 3, 4}, set(errors))
+        self.assertEqual([user_id, owner_id], authorized_user_repository.read_authorized_user_ids(loan_id))
@@ -0,0 +1,86 @@
+"""Tests for AmortizationScheduleCache"""
+import unittest
+from decimal import Decimal
+from services import AmortizationScheduleCache, CreateAmortizationScheduleService, ScheduleJsonEncoder
+
+
+class TestAmortizationScheduleCache(unittest.TestCase):
+    def test_get_schedule(self):
+        cache = AmortizationScheduleCache()
+        schedule = cache.get_schedule(Decimal('10000.00'), 60, Decimal('0.12'))
+        self.assertEqual(
+            CreateAmortizationScheduleService.generate_amortization_schedule(Decimal('10000.00'), 60, Decimal('0.12')),
+            [dict(month) for month in schedule])
+        self.assertIs(schedule, cache.get_schedule(Decimal('10000.00'), 60, Decimal('0.12')))
+        self.assertEqual(
+            {'entries': 1, 'hits': 1, 'misses': 1, 'peeks_missed': 0, 'evictions': 0},
+            {key: value for key, value in cache.statistics().items() if key != 'size_bytes'})
+
+    def test_get_schedule_read_only(self):
+        cache = AmortizationScheduleCache()
+        schedule = cache.get_schedule(Decimal('1000.00'), 12, Decimal('0.1'))
+        with self.assertRaises(TypeError):
+            schedule[1]['balance'] = Decimal('0.00')
+        with self.assertRaises(TypeError):
+            schedule[1] = {}
+
+    def test_get_schedule_keeps_amount_representation(self):
+        cache = AmortizationScheduleCache()
+        self.assertEqual('1000', str(cache.get_schedule(Decimal('1000'), 12, Decimal('0.1'))[0]['balance']))
+        self.assertEqual('1000.00', str(cache.get_schedule(Decimal('1000.00'), 12, Decimal('0.1'))[0]['balance']))
+
+    def test_peek_schedule(self):
+        cache = AmortizationScheduleCache()
+        self.assertIsNone(cache.peek_schedule(Decimal('1000.00'), 12, Decimal('0.1')))
+        schedule = cache.get_schedule(Decimal('1000.00'), 12, Decimal('0.1'))
+        self.assertIs(schedule, cache.peek_schedule(Decimal('1000.00'), 12, Decimal('0.1')))
+        # Only the schedule generated counts as a miss
+        statistics = cache.statistics()
+        self.assertEqual((1, 1, 1), (statistics['hits'], statistics['misses'], statistics['peeks_missed']))
+
+    def test_evict_least_recently_used_entries(self):
+        cache = AmortizationScheduleCache(max_entries=2)
+        cache.get_schedule(Decimal('1000.00'), 12, Decimal('0.1'))
+        cache.get_schedule(Decimal('2000.00'), 12, Decimal('0.1'))
+        cache.get_schedule(Decimal('1000.00'), 12, Decimal('0.1'))
+        cache.get_schedule(Decimal('3000.00'), 12, Decimal('0.1'))
+
+        self.assertIsNotNone(cache.peek_schedule(Decimal('1000.00'), 12, Decimal('0.1')))
+        self.assertIsNone(cache.peek_schedule(Decimal('2000.00'), 12, Decimal('0.1')))
+        self.assertIsNotNone(cache.peek_schedule(Decimal('3000.00'), 12, Decimal('0.1')))
+        self.assertEqual(1, cache.statistics()['evictions'])
+
+    def test_evict_to_byte_limit(self):
+        cache = AmortizationScheduleCache()
+        cache.get_schedule(Decimal('1000.00'), 12, Decimal('0.1'))
+        schedule_size_bytes = cache.statistics()['size_bytes']
+
+        cache = AmortizationScheduleCache(max_bytes=schedule_size_bytes * 2)
+        for amount in ['1000.00', '2000.00', '3000.00']:
+            cache.get_schedule(Decimal(amount), 12, Decimal('0.1'))
+        statistics = cache.statistics()
+        self.assertEqual(2, statistics['entries'])
+        self.assertEqual(1, statistics['evictions'])
+        self.assertLessEqual(statistics['size_bytes'], schedule_size_bytes * 2)
+
+    def test_schedule_larger_than_byte_limit_not_cached(self):
+        cache = AmortizationScheduleCache(max_bytes=1)
+        cache.get_schedule(Decimal('1000.00'), 12, Decimal('0.1'))
+        self.assertEqual(0, cache.statistics()['entries'])
+
+    def test_get_schedule_arithmetic(self):
+        expected = CreateAmortizationScheduleService.generate_amortization_schedule(
+            Decimal('10000.00'), 60, Decimal('0.12'))
+        for arithmetic in ['decimal', 'integer']:
+            with self.subTest(arithmetic=arithmetic):
+                cache = AmortizationScheduleCache(arithmetic=arithmetic)
+                schedule = cache.get_schedule(Decimal('10000.00'), 60, Decimal('0.12'))
+                self.assertEqual(expected, schedule.to_dicts())
+
+    def test_get_schedule_json(self):
+        cache = AmortizationScheduleCache()
+        encoded = cache.get_schedule_json(Decimal('10000.00'), 60, Decimal('0.12'))
+        schedule = cache.peek_schedule(Decimal('10000.00'), 60, Decimal('0.12'))
+        self.assertEqual(ScheduleJsonEncoder.encode_schedule(schedule), encoded)
+        self.assertIs(encoded, cache.get_schedule_json(Decimal('10000.00'), 60, Decimal('0.12')))
+        self.assertGreater(cache.statistics()['size_bytes'], len(encoded))
@@ -0,0 +1,68 @@
+"""Tests for AnnuityFactorTable"""
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from services import AnnuityFactorTable, CreateAmortizationScheduleService
+
+
+FACTOR_FIELDS = ('monthly_interest_rate', 'compounding_factor', 'numerator', 'denominator', 'annuity_factor')
+
+
+class TestAnnuityFactorTable(unittest.TestCase):
+    def test_get_factors(self):
+        table = AnnuityFactorTable()
+        factors = table.get_factors(Decimal('0.12'), 60)
+        self.assertEqual(Decimal('0.01'), factors.monthly_interest_rate)
+        self.assertEqual(Decimal('1.01') ** 60, factors.compounding_factor)
+        self.assertEqual(factors.numerator / factors.denominator, factors.annuity_factor)
+        self.assertIs(factors, table.get_factors(Decimal('0.12'), 60))
+        self.assertEqual(1, len(table))
+
+    def test_get_factors_zero_interest_rate(self):
+        factors = AnnuityFactorTable().get_factors(Decimal('0'), 12)
+        self.assertEqual(Decimal('0'), factors.denominator)
+        self.assertIsNone(factors.annuity_factor)
+
+    def test_get_factors_max_entries(self):
+        table = AnnuityFactorTable(max_entries=1)
+        table.get_factors(Decimal('0.12'), 60)
+        table.get_factors(Decimal('0.12'), 12)
+        self.assertEqual(1, len(table))
+
+    def test_precompute(self):
+        table = AnnuityFactorTable()
+        table.precompute([Decimal('0.06'), Decimal('0.12')], range(1, 13))
+        self.assertEqual(24, len(table))
+
+    def test_save_and_load(self):
+        table = AnnuityFactorTable()
+        table.precompute([Decimal('0'), Decimal('0.06'), Decimal('0.3599')], range(1, 121))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'annuity_factors.json')
+            table.save(path)
+            loaded = AnnuityFactorTable.load(path)
+
+        self.assertEqual(len(table), len(loaded))
+        for key, factors in table.factors.items():
+            with self.subTest(key=key):
+                loaded_factors = loaded.factors[key]
+                for field in FACTOR_FIELDS:
+                    self.assertEqual(getattr(factors, field), getattr(loaded_factors, field))
+
+    def test_schedule_unchanged_with_loaded_table(self):
+        arguments = (Decimal('10000.00'), 60, Decimal('0.12'))
+        expected = CreateAmortizationScheduleService.generate_amortization_schedule(*arguments)
+
+        table = AnnuityFactorTable()
+        table.precompute([arguments[2]], [arguments[1]])
+        original_table = CreateAmortizationScheduleService.annuity_factor_table
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'annuity_factors.json')
+            table.save(path)
+            CreateAmortizationScheduleService.annuity_factor_table = AnnuityFactorTable.load(path)
+        try:
+            self.assertEqual(expected, CreateAmortizationScheduleService.generate_amortization_schedule(*arguments))
+        finally:
+            CreateAmortizationScheduleService.annuity_factor_table = original_table
+
@@ -0,0 +1,105 @@
+"""Tests for the async services"""
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from repositories import AiosqliteAuthorizedUserRepository,\
+    AiosqliteConnectionPool,\
+    AiosqliteLoanRepository,\
+    AiosqliteUserRepository,\
+    AsyncRepositoryAdapter,\
+    AuthorizedUserRepository,\
+    LoanRepository,\
+    UserLoansView,\
+    UserRepository
+from request_exception import RequestException
+from services import AsyncAddAuthorizedUserService,\
+    AsyncCreateLoanService,\
+    AsyncCreateUserService,\
+    AsyncGetUserLoansService,\
+    AsyncRevokeAuthorizedUserService
+
+
+class TestAsyncServices(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    async def new_repositories(self, backend: str):
+        """Get async user, loan and authorized user repositories and the user loans view"""
+        if backend == 'aiosqlite':
+            pool = AiosqliteConnectionPool(os.path.join(self.directory.name, 'loans.db'))
+            await pool.open()
+            self.addAsyncCleanup(pool.close)
+            return (AiosqliteUserRepository(pool),
+                    AiosqliteLoanRepository(pool),
+                    AiosqliteAuthorizedUserRepository(pool),
+                    None)
+        user_loans_view = UserLoansView()
+        return (AsyncRepositoryAdapter(UserRepository()),
+                AsyncRepositoryAdapter(LoanRepository(user_loans_view)),
+                AsyncRepositoryAdapter(AuthorizedUserRepository(user_loans_view)),
+                user_loans_view)
+
+    async def test_services(self):
+        for backend in ['memory', 'aiosqlite']:
+            with self.subTest(backend=backend):
+                user_repository, loan_repository, authorized_user_repository, user_loans_view = \
+                    await self.new_repositories(backend)
+                owner_id = await AsyncCreateUserService.create_user(user_repository, 'alice')
+                user_ids, errors = await AsyncCreateUserService.create_users(
+                    user_repository, [{'username': 'bob'}, {}, {'username': 'carol'}])
+                self.assertEqual([2, None, 3], user_ids)
+                self.assertEqual({1: 'Missing username'}, errors)
+                with self.assertRaises(RequestException):
+                    await AsyncCreateUserService.create_user(user_repository, '')
+
+                loan_id = await AsyncCreateLoanService.create_loan(
+                    loan_repository, user_repository, owner_id, Decimal('1000.00'), 12, Decimal('0.1'))
+                loan_ids, errors = await AsyncCreateLoanService.create_loans(loan_repository, user_repository, [
+                    {'user_id': 2, 'amount': '500', 'term_months': 6, 'interest_rate': '0.2'},
+                    {'user_id': 100, 'amount': '500', 'term_months': 6, 'interest_rate': '0.2'},
+                    {'user_id': 2, 'amount': 'x', 'term_months': 6, 'interest_rate': '0.2'}])
+                self.assertEqual([2, None, None], loan_ids)
+                self.assertEqual({1: "user 100 doesn't exist", 2: 'Invalid amount'}, errors)
+                with self.assertRaises(RequestException):
+                    await AsyncCreateLoanService.create_loan(
+                        loan_repository, user_repository, 100, Decimal('1000.00'), 12, Decimal('0.1'))
+
+                await AsyncAddAuthorizedUserService.add_authorized_user(
+                    authorized_user_repository, user_repository, loan_repository, 2, loan_id)
+                authorized_user_ids, errors = await AsyncAddAuthorizedUserService.add_authorized_users(
+                    authorized_user_repository, user_repository, loan_repository,
+                    [{'loan_id': loan_id, 'user_id': 3},
+                     {'loan_id': loan_id, 'user_id': 2},
+                     {'loan_id': 100, 'user_id': 3},
+                     {'loan_id': 2, 'user_id': owner_id}])
+                self.assertEqual([2, 1, None, 3], authorized_user_ids)
+                self.assertEqual({2: 'loan 100 does not exist'}, errors)
+                with self.assertRaises(RequestException):
+                    await AsyncAddAuthorizedUserService.add_authorized_user(
+                        authorized_user_repository, user_repository, loan_repository, 100, loan_id)
+
+                loans = await AsyncGetUserLoansService.get_user_loans(
+                    loan_repository, user_repository, authorized_user_repository, owner_id, user_loans_view)
+                self.assertEqual([(1, [2, 3]), (2, [owner_id])],
+                                 [(loan.loan_id, loan.authorized_user_ids) for loan in loans])
+                loans, cursor = await AsyncGetUserLoansService.get_user_loans_page(
+                    loan_repository, user_repository, authorized_user_repository, owner_id, limit=1)
+                self.assertEqual(([1], 'shared:0'), ([loan.loan_id for loan in loans], cursor))
+                loans, cursor = await AsyncGetUserLoansService.get_user_loans_page(
+                    loan_repository, user_repository, authorized_user_repository, owner_id, cursor, limit=1)
+                self.assertEqual(([2], None), ([loan.loan_id for loan in loans], cursor))
+                with self.assertRaises(RequestException):
+                    await AsyncGetUserLoansService.get_user_loans(
+                        loan_repository, user_repository, authorized_user_repository, 100, user_loans_view)
+
+                await AsyncRevokeAuthorizedUserService.revoke_authorized_user(
+                    authorized_user_repository, loan_repository, 2, loan_id)
+                self.assertEqual([3], await authorized_user_repository.read_authorized_user_ids(loan_id))
+                with self.assertRaises(RequestException):
+                    await AsyncRevokeAuthorizedUserService.revoke_authorized_user(
+                        authorized_user_repository, loan_repository, 2, loan_id)
+                loans = await AsyncGetUserLoansService.get_user_loans(
+                    loan_repository, user_repository, authorized_user_repository, 2, user_loans_view)
+                self.assertEqual([2], [loan.loan_id for loan in loans])
@@ -0,0 +1,67 @@
+"""Tests for BatchAmortizationScheduleService"""
+import random
+import unittest
+from decimal import Decimal
+from services import BatchAmortizationScheduleService, CreateAmortizationScheduleService
+from services.batch_amortization_schedule_service import SCHEDULE_FIELDS
+from .test_create_amortization_schedule_service import EXAMPLES
+
+
+def to_cents(value: Decimal):
+    return int(value.scaleb(2))
+
+
+class TestBatchAmortizationScheduleService(unittest.TestCase):
+    def test_generate_amortization_schedules(self):
+        schedules = BatchAmortizationScheduleService.generate_amortization_schedules(
+            [example.amount for example in EXAMPLES],
+            [example.term_months for example in EXAMPLES],
+            [example.interest_rate for example in EXAMPLES])
+
+        for index, example in enumerate(EXAMPLES):
+            with self.subTest(example=example.name):
+                for month in example.expected:
+                    with self.subTest(month=month):
+                        month_example = example.expected[month]
+                        for parameter in month_example:
+                            with self.subTest(parameter=parameter):
+                                self.assertEqual(
+                                    to_cents(month_example[parameter]),
+                                    schedules[parameter][index, month])
+                for parameter in SCHEDULE_FIELDS:
+                    self.assertTrue((schedules[parameter][index, example.term_months + 1:] == 0).all())
+
+    def test_generate_amortization_schedules_matches_service(self):
+        # Random sample of the range accepted by CreateLoanService
+        generator = random.Random(3)
+        loans = [
+            (Decimal(generator.randint(1, 10000000)).scaleb(-2),
+             generator.randint(1, 120),
+             Decimal(generator.randint(600, 3600)).scaleb(-4))
+            for _ in range(200)
+        ]
+        amounts, term_months, interest_rates = zip(*loans)
+        schedules = BatchAmortizationScheduleService.generate_amortization_schedules(
+            amounts, term_months, interest_rates)
+
+        for index, (amount, term, interest_rate) in enumerate(loans):
+            schedule = CreateAmortizationScheduleService.generate_amortization_schedule(amount, term, interest_rate)
+            for parameter in SCHEDULE_FIELDS:
+                with self.subTest(amount=amount, term_months=term, interest_rate=interest_rate, parameter=parameter):
+                    self.assertEqual(
+                        [to_cents(month[parameter]) for month in schedule],
+                        schedules[parameter][index, :term + 1].tolist())
+
+    def test_generate_amortization_schedules_empty(self):
+        schedules = BatchAmortizationScheduleService.generate_amortization_schedules([], [], [])
+        self.assertEqual((0, 1), schedules['balance'].shape)
+
+    def test_generate_amortization_schedules_invalid_loan(self):
+        with self.assertRaises(Exception):
+            BatchAmortizationScheduleService.generate_amortization_schedules(
+                [Decimal('1000.00'), Decimal('-1.00')], [12, 12], [Decimal('0.1'), Decimal('0.1')])
+
+    def test_generate_amortization_schedules_mismatched_lengths(self):
+        with self.assertRaises(Exception):
+            BatchAmortizationScheduleService.generate_amortization_schedules(
+                [Decimal('1000.00')], [12, 12], [Decimal('0.1')])
@@ -1,232 +1,235 @@
 """Tests for CreateAmortizationScheduleService"""
+import inspect
 import unittest
 from dataclasses import dataclass
 from decimal import Decimal
 from services import CreateAmortizationScheduleService
 
 
-class TestCreateAmortizationScheduleService(unittest.TestCase):
-    def test_generate_amortization_schedule(self):
-        @dataclass
-        class Example:
-            """Example class for test cases for amortization"""
-            name: str
+@dataclass
+class Example:
+    """Example class for test cases for amortization"""
+    name: str
 
-            amount: Decimal
-            term_months: int
-            interest_rate: Decimal
+    amount: Decimal
+    term_months: int
+    interest_rate: Decimal
 
-            expected: dict[int, dict[str, Decimal]]
+    expected: dict[int, dict[str, Decimal]]
 
-        # Examples checked against https://www.calculator.net/amortization-calculator.html
-        examples = [
-            Example(
-                name='$1000.00 12 months @ 10.00%',
-                amount=Decimal('1000.00'),
-                term_months=12,
-                interest_rate=Decimal('0.1'),
-                expected={
-                    0: {
-                        'balance': Decimal('1000.00'),
-                        'payment': Decimal('0.00'),
-                        'principal_paid': Decimal('0.00'),
-                        'interest_paid': Decimal('0.00'),
-                        'total_paid': Decimal('0.00'),
-                        'total_principal_paid': Decimal('0.00'),
-                        'total_interest_paid': Decimal('0.00')
-                    },
-                    6: {
-                        'balance': Decimal('512.42'),
-                        'payment': Decimal('87.92'),
-                        'principal_paid': Decimal('82.96'),
-                        'interest_paid': Decimal('4.96'),
-                        'total_paid': Decimal('527.52'),
-                        'total_principal_paid': Decimal('487.58'),
-                        'total_interest_paid': Decimal('39.94')
-                    },
-                    12: {
-                        'balance': Decimal('0.00'),
-                        'payment': Decimal('87.87'),
-                        'principal_paid': Decimal('87.14'),
-                        'interest_paid': Decimal('0.73'),
-                        'total_paid': Decimal('1054.99'),
-                        'total_principal_paid': Decimal('1000.00'),
-                        'total_interest_paid': Decimal('54.99')
-                    }
-                }),
-            Example(
-                name='$1000.10 12 months @ 10.00%',
-                amount=Decimal('1000.10'),
-                term_months=12,
-                interest_rate=Decimal('0.1'),
-                expected={
-                    0: {
-                        'balance': Decimal('1000.10'),
-                        'payment': Decimal('0.00'),
-                        'principal_paid': Decimal('0.00'),
-                        'interest_paid': Decimal('0.00'),
-                        'total_paid': Decimal('0.00'),
-                        'total_principal_paid': Decimal('0.00'),
-                        'total_interest_paid': Decimal('0.00')
-                    },
-                    6: {
-                        'balance': Decimal('512.53'),
-                        'payment': Decimal('87.92'),
-                        'principal_paid': Decimal('82.96'),
-                        'interest_paid': Decimal('4.96'),
-                        'total_paid': Decimal('527.52'),
-                        'total_principal_paid': Decimal('487.57'),
-                        'total_interest_paid': Decimal('39.95')
-                    },
-                    12: {
-                        'balance': Decimal('0.00'),
-                        'payment': Decimal('87.98'),
-                        'principal_paid': Decimal('87.25'),
-                        'interest_paid': Decimal('0.73'),
-                        'total_paid': Decimal('1055.10'),
-                        'total_principal_paid': Decimal('1000.10'),
-                        'total_interest_paid': Decimal('55.00')
-                    }
-                }),
-            Example(
-                name='$1000.20 12 months @ 10.00%',
-                amount=Decimal('1000.20'),
-                term_months=12,
-                interest_rate=Decimal('0.1'),
-                expected={
-                    0: {
-                        'balance': Decimal('1000.20'),
-                        'payment': Decimal('0.00'),
-                        'principal_paid': Decimal('0.00'),
-                        'interest_paid': Decimal('0.00'),
-                        'total_paid': Decimal('0.00'),
-                        'total_principal_paid': Decimal('0.00'),
-                        'total_interest_paid': Decimal('0.00')
-                    },
-                    6: {
-                        'balance': Decimal('512.57'),
-                        'payment': Decimal('87.93'),
-                        'principal_paid': Decimal('82.97'),
-                        'interest_paid': Decimal('4.96'),
-                        'total_paid': Decimal('527.58'),
-                        'total_principal_paid': Decimal('487.63'),
-                        'total_interest_paid': Decimal('39.95')
-                    },
-                    12: {
-                        'balance': Decimal('0.00'),
-                        'payment': Decimal('87.97'),
-                        'principal_paid': Decimal('87.24'),
-                        'interest_paid': Decimal('0.73'),
-                        'total_paid': Decimal('1055.20'),
-                        'total_principal_paid': Decimal('1000.20'),
-                        'total_interest_paid': Decimal('55.00')
-                    }
-                }),
-            Example(
-                name='$1000.00 12 months @ 0.00%',
-                amount=Decimal('1000.00'),
-                term_months=12,
-                interest_rate=Decimal('0.0'),
-                expected={
-                    0: {
-                        'balance': Decimal('1000.00'),
-                        'payment': Decimal('0.00'),
-                        'principal_paid': Decimal('0.00'),
-                        'interest_paid': Decimal('0.00'),
-                        'total_paid': Decimal('0.00'),
-                        'total_principal_paid': Decimal('0.00'),
-                        'total_interest_paid': Decimal('0.00')
-                    },
-                    6: {
-                        'balance': Decimal('500.02'),
-                        'payment': Decimal('83.33'),
-                        'principal_paid': Decimal('83.33'),
-                        'interest_paid': Decimal('0.00'),
-                        'total_paid': Decimal('499.98'),
-                        'total_principal_paid': Decimal('499.98'),
-                        'total_interest_paid': Decimal('0.00')
-                    },
-                    12: {
-                        'balance': Decimal('0.00'),
-                        'payment': Decimal('83.37'),
-                        'principal_paid': Decimal('83.37'),
-                        'interest_paid': Decimal('0.00'),
-                        'total_paid': Decimal('1000.00'),
-                        'total_principal_paid': Decimal('1000.00'),
-                        'total_interest_paid': Decimal('0.00')
-                    }
-                }),
-            Example(
-                name='$1000.00 1 months @ 10.00%',
-                amount=Decimal('1000.00'),
-                term_months=1,
-                interest_rate=Decimal('0.1'),
-                expected={
-                    0: {
-                        'balance': Decimal('1000.00'),
-                        'payment': Decimal('0.00'),
-                        'principal_paid': Decimal('0.00'),
-                        'interest_paid': Decimal('0.00'),
-                        'total_paid': Decimal('0.00'),
-                        'total_principal_paid': Decimal('0.00'),
-                        'total_interest_paid': Decimal('0.00')
-                    },
-                    1: {
-                        'balance': Decimal('0.00'),
-                        'payment': Decimal('1008.33'),
-                        'principal_paid': Decimal('1000.00'),
-                        'interest_paid': Decimal('8.33'),
-                        'total_paid': Decimal('1008.33'),
-                        'total_principal_paid': Decimal('1000.00'),
-                        'total_interest_paid': Decimal('8.33')
-                    }
-                }),
-            Example(
-                name='$1000.00 12 months @ 3000.00% negative amortization/balloon payment',
-                amount=Decimal('1000.00'),
-                term_months=12,
-                interest_rate=Decimal('30.00'),
-                expected={
-                    0: {
-                        'balance': Decimal('1000.00'),
-                        'payment': Decimal('0.00'),
-                        'principal_paid': Decimal('0.00'),
-                        'interest_paid': Decimal('0.00'),
-                        'total_paid': Decimal('0.00'),
-                        'total_principal_paid': Decimal('0.00'),
-                        'total_interest_paid': Decimal('0.00')
-                    },
-                    6: {
-                        'balance': Decimal('1000.00'),
-                        'payment': Decimal('2500.00'),
-                        'principal_paid': Decimal('0.00'),
-                        'interest_paid': Decimal('2500.00'),
-                        'total_paid': Decimal('15000.00'),
-                        'total_principal_paid': Decimal('0.00'),
-                        'total_interest_paid': Decimal('15000.00')
-                    },
-                    11: {
-                        'balance': Decimal('1000.00'),
-                        'payment': Decimal('2500.00'),
-                        'principal_paid': Decimal('0.00'),
-                        'interest_paid': Decimal('2500.00'),
-                        'total_paid': Decimal('27500.00'),
-                        'total_principal_paid': Decimal('0.00'),
-                        'total_interest_paid': Decimal('27500.00')
-                    },
-                    12: {
-                        'balance': Decimal('0.00'),
-                        'payment': Decimal('3500.00'),
-                        'principal_paid': Decimal('1000.00'),
-                        'interest_paid': Decimal('2500.00'),
-                        'total_paid': Decimal('31000.00'),
-                        'total_principal_paid': Decimal('1000.00'),
-                        'total_interest_paid': Decimal('30000.00')
-                    }
-                }),
-        ]
 
-        for example in examples:
+# Examples checked against https://www.calculator.net/amortization-calculator.html
+EXAMPLES = [
+    Example(
+        name='$1000.00 12 months @ 10.00%',
+        amount=Decimal('1000.00'),
+        term_months=12,
+        interest_rate=Decimal('0.1'),
+        expected={
+            0: {
+                'balance': Decimal('1000.00'),
+                'payment': Decimal('0.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('0.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('0.00')
+            },
+            6: {
+                'balance': Decimal('512.42'),
+                'payment': Decimal('87.92'),
+                'principal_paid': Decimal('82.96'),
+                'interest_paid': Decimal('4.96'),
+                'total_paid': Decimal('527.52'),
+                'total_principal_paid': Decimal('487.58'),
+                'total_interest_paid': Decimal('39.94')
+            },
+            12: {
+                'balance': Decimal('0.00'),
+                'payment': Decimal('87.87'),
+                'principal_paid': Decimal('87.14'),
+                'interest_paid': Decimal('0.73'),
+                'total_paid': Decimal('1054.99'),
+                'total_principal_paid': Decimal('1000.00'),
+                'total_interest_paid': Decimal('54.99')
+            }
+        }),
+    Example(
+        name='$1000.10 12 months @ 10.00%',
+        amount=Decimal('1000.10'),
+        term_months=12,
+        interest_rate=Decimal('0.1'),
+        expected={
+            0: {
+                'balance': Decimal('1000.10'),
+                'payment': Decimal('0.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('0.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('0.00')
+            },
+            6: {
+                'balance': Decimal('512.53'),
+                'payment': Decimal('87.92'),
+                'principal_paid': Decimal('82.96'),
+                'interest_paid': Decimal('4.96'),
+                'total_paid': Decimal('527.52'),
+                'total_principal_paid': Decimal('487.57'),
+                'total_interest_paid': Decimal('39.95')
+            },
+            12: {
+                'balance': Decimal('0.00'),
+                'payment': Decimal('87.98'),
+                'principal_paid': Decimal('87.25'),
+                'interest_paid': Decimal('0.73'),
+                'total_paid': Decimal('1055.10'),
+                'total_principal_paid': Decimal('1000.10'),
+                'total_interest_paid': Decimal('55.00')
+            }
+        }),
+    Example(
+        name='$1000.20 12 months @ 10.00%',
+        amount=Decimal('1000.20'),
+        term_months=12,
+        interest_rate=Decimal('0.1'),
+        expected={
+            0: {
+                'balance': Decimal('1000.20'),
+                'payment': Decimal('0.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('0.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('0.00')
+            },
+            6: {
+                'balance': Decimal('512.57'),
+                'payment': Decimal('87.93'),
+                'principal_paid': Decimal('82.97'),
+                'interest_paid': Decimal('4.96'),
+                'total_paid': Decimal('527.58'),
+                'total_principal_paid': Decimal('487.63'),
+                'total_interest_paid': Decimal('39.95')
+            },
+            12: {
+                'balance': Decimal('0.00'),
+                'payment': Decimal('87.97'),
+                'principal_paid': Decimal('87.24'),
+                'interest_paid': Decimal('0.73'),
+                'total_paid': Decimal('1055.20'),
+                'total_principal_paid': Decimal('1000.20'),
+                'total_interest_paid': Decimal('55.00')
+            }
+        }),
+    Example(
+        name='$1000.00 12 months @ 0.00%',
+        amount=Decimal('1000.00'),
+        term_months=12,
+        interest_rate=Decimal('0.0'),
+        expected={
+            0: {
+                'balance': Decimal('1000.00'),
+                'payment': Decimal('0.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('0.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('0.00')
+            },
+            6: {
+                'balance': Decimal('500.02'),
+                'payment': Decimal('83.33'),
+                'principal_paid': Decimal('83.33'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('499.98'),
+                'total_principal_paid': Decimal('499.98'),
+                'total_interest_paid': Decimal('0.00')
+            },
+            12: {
+                'balance': Decimal('0.00'),
+                'payment': Decimal('83.37'),
+                'principal_paid': Decimal('83.37'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('1000.00'),
+                'total_principal_paid': Decimal('1000.00'),
+                'total_interest_paid': Decimal('0.00')
+            }
+        }),
+    Example(
+        name='$1000.00 1 months @ 10.00%',
+        amount=Decimal('1000.00'),
+        term_months=1,
+        interest_rate=Decimal('0.1'),
+        expected={
+            0: {
+                'balance': Decimal('1000.00'),
+                'payment': Decimal('0.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('0.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('0.00')
+            },
+            1: {
+                'balance': Decimal('0.00'),
+                'payment': Decimal('1008.33'),
+                'principal_paid': Decimal('1000.00'),
+                'interest_paid': Decimal('8.33'),
+                'total_paid': Decimal('1008.33'),
+                'total_principal_paid': Decimal('1000.00'),
+                'total_interest_paid': Decimal('8.33')
+            }
+        }),
+    Example(
+        name='$1000.00 12 months @ 3000.00% negative amortization/balloon payment',
+        amount=Decimal('1000.00'),
+        term_months=12,
+        interest_rate=Decimal('30.00'),
+        expected={
+            0: {
+                'balance': Decimal('1000.00'),
+                'payment': Decimal('0.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('0.00'),
+                'total_paid': Decimal('0.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('0.00')
+            },
+            6: {
+                'balance': Decimal('1000.00'),
+                'payment': Decimal('2500.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('2500.00'),
+                'total_paid': Decimal('15000.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('15000.00')
+            },
+            11: {
+                'balance': Decimal('1000.00'),
+                'payment': Decimal('2500.00'),
+                'principal_paid': Decimal('0.00'),
+                'interest_paid': Decimal('2500.00'),
+                'total_paid': Decimal('27500.00'),
+                'total_principal_paid': Decimal('0.00'),
+                'total_interest_paid': Decimal('27500.00')
+            },
+            12: {
+                'balance': Decimal('0.00'),
+                'payment': Decimal('3500.00'),
+                'principal_paid': Decimal('1000.00'),
+                'interest_paid': Decimal('2500.00'),
+                'total_paid': Decimal('31000.00'),
+                'total_principal_paid': Decimal('1000.00'),
+                'total_interest_paid': Decimal('30000.00')
+            }
+        }),
+]
+
+
+class TestCreateAmortizationScheduleService(unittest.TestCase):
+    def test_generate_amortization_schedule(self):
+        for example in EXAMPLES:
             with self.subTest(example=example.name):
                 schedule = CreateAmortizationScheduleService.generate_amortization_schedule(
                     example.amount,
@@ -270,3 +273,89 @@ class TestCreateAmortizationScheduleService(unittest.TestCase):
         with self.assertRaises(Exception):
             CreateAmortizationScheduleService.generate_amortization_schedule(
                 amount=Decimal('1000.00'), term_months=12, interest_rate=Decimal('-0.1'))
+
+    def test_generate_amortization_month(self):
+        loans = [
+            (Decimal(amount), term_months, Decimal(interest_rate))
+            for amount in ['1000.00', '1000.10', '1000.20']
+            for term_months in [1, 12]
+            for interest_rate in ['0.1', '0.0', '30.00']
+        ]
+        # Sample of the range accepted by CreateLoanService
+        loans += [
+            (Decimal(amount), term_months, Decimal(interest_rate))
+            for amount in ['0.01', '1.99', '2500.55', '100000.00']
+            for term_months in [2, 37, 120]
+            for interest_rate in ['0.06', '0.1234', '0.36']
+        ]
+
+        for amount, term_months, interest_rate in loans:
+            schedule = CreateAmortizationScheduleService.generate_amortization_schedule(
+                amount, term_months, interest_rate)
+            for month in range(term_months + 1):
+                with self.subTest(amount=amount, term_months=term_months, interest_rate=interest_rate, month=month):
+                    self.assertEqual(
+                        schedule[month],
+                        CreateAmortizationScheduleService.generate_amortization_month(
+                            amount, term_months, interest_rate, month))
+
+    def test_generate_amortization_month_invalid_month(self):
+        for month in [-1, 13]:
+            with self.subTest(month=month):
+                with self.assertRaises(Exception):
+                    CreateAmortizationScheduleService.generate_amortization_month(
+                        amount=Decimal('1000.00'), term_months=12, interest_rate=Decimal('0.1'), month=month)
+
+    def test_generate_amortization_window(self):
+        loans = [
+            (Decimal(amount), term_months, Decimal(interest_rate))
+            for amount in ['1000.00', '1000.20', '100000.00']
+            for term_months in [1, 12, 120]
+            for interest_rate in ['0.0', '0.1', '0.36']
+        ]
+
+        for amount, term_months, interest_rate in loans:
+            schedule = CreateAmortizationScheduleService.generate_amortization_schedule(
+                amount, term_months, interest_rate)
+            for from_month, to_month in [(0, 0), (0, 1), (1, term_months), (term_months // 2, term_months),
+                                         (term_months, term_months), (0, term_months)]:
+                with self.subTest(amount=amount, term_months=term_months, interest_rate=interest_rate,
+                                  from_month=from_month, to_month=to_month):
+                    self.assertEqual(
+                        schedule[from_month:to_month + 1],
+                        CreateAmortizationScheduleService.generate_amortization_window(
+                            amount, term_months, interest_rate, from_month, to_month))
+
+    def test_generate_amortization_window_invalid_months(self):
+        for from_month, to_month in [(-1, 5), (5, 13), (6, 5)]:
+            with self.subTest(from_month=from_month, to_month=to_month):
+                with self.assertRaises(Exception):
+                    CreateAmortizationScheduleService.generate_amortization_window(
+                        Decimal('1000.00'), 12, Decimal('0.1'), from_month, to_month)
+
+    def test_iterate_amortization_schedule(self):
+        for example in EXAMPLES:
+            with self.subTest(example=example.name):
+                schedule = CreateAmortizationScheduleService.iterate_amortization_schedule(
+                    example.amount,
+                    example.term_months,
+                    example.interest_rate)
+                self.assertNotIsInstance(schedule, list)
+                months = list(schedule)
+                self.assertEqual(example.term_months + 1, len(months))
+                for month in example.expected:
+                    with self.subTest(month=month):
+                        self.assertEqual(example.expected[month], months[month])
+
+    def test_iterate_amortization_schedule_is_lazy(self):
+        schedule = CreateAmortizationScheduleService.iterate_amortization_schedule(
+            Decimal('10000.00'), 120, Decimal('0.1'))
+        self.assertEqual(Decimal('10000.00'), next(schedule)['balance'])
+        self.assertEqual(Decimal('9951.18'), next(schedule)['balance'])
+        # Only the months taken so far have been generated
+        self.assertEqual(1, inspect.getgeneratorlocals(schedule)['month'])
+
+    def test_iterate_amortization_schedule_validates_immediately(self):
+        with self.assertRaises(Exception):
+            CreateAmortizationScheduleService.iterate_amortization_schedule(
+                amount=Decimal('1000.00'), term_months=0, interest_rate=Decimal('0.1'))
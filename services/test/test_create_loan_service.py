@@ -0,0 +1,41 @@
+"""Tests for CreateLoanService"""
+import unittest
+from decimal import Decimal
+from repositories import LoanRepository, UserRepository
+from services import CreateLoanService, CreateUserService
+
+
+class TestCreateLoanService(unittest.TestCase):
+    def test_create_loans(self):
+        user_repository = UserRepository()
+        loan_repository = LoanRepository()
+        user_id = CreateUserService.create_user(user_repository, 'alice')
+
+        def row(**fields):
+            return dict({'user_id': user_id, 'amount': '1000.00', 'term_months': 12, 'interest_rate': '0.1'}, **fields)
+
+        rows = [
+            row(),
+            row(user_id=100),
+            row(user_id='1'),
+            row(amount='abc'),
+            row(amount='NaN'),
+            row(amount=1000),
+            row(amount='100000.01'),
+            row(term_months=121),
+            row(term_months='12'),
+            row(interest_rate='0.05'),
+            'not a row',
+            row(amount='2500.50', term_months=60, interest_rate='0.36'),
+        ]
+        loan_ids, errors = CreateLoanService.create_loans(loan_repository, user_repository, rows)
+
+        self.assertEqual([1] + [None] * 10 + [2], loan_ids)
+        self.assertEqual(set(range(1, 11)), set(errors))
+        self.assertEqual("user 100 doesn't exist", errors[1])
+        self.assertEqual('Invalid amount 100000.01', errors[6])
+
+        loan = loan_repository.read(2)
+        self.assertEqual((user_id, Decimal('2500.50'), 60, Decimal('0.36')),
+                         (loan.user_id, loan.amount, loan.term_months, loan.interest_rate))
+        self.assertEqual([1, 2], loan_repository.read_loan_ids_after(user_id, 0, 10))
@@ -0,0 +1,17 @@
+"""Tests for CreateUserService"""
+import unittest
+from repositories import UserRepository
+from services import CreateUserService
+
+
+class TestCreateUserService(unittest.TestCase):
+    def test_create_users(self):
+        user_repository = UserRepository()
+        CreateUserService.create_user(user_repository, 'first')
+
+        user_ids, errors = CreateUserService.create_users(
+            user_repository,
+            [{'username': 'alice'}, {'username': ''}, {}, None, {'username': 7}, {'username': 'bob'}])
+        self.assertEqual([2, None, None, None, None, 3], user_ids)
+        self.assertEqual({1, 2, 3, 4}, set(errors))
+        self.assertEqual('bob', user_repository.read(3).username)
@@ -0,0 +1,118 @@
+"""Tests for DayCountAmortizationScheduleService"""
+import datetime
+import decimal
+import random
+import unittest
+from decimal import Decimal
+from request_exception import RequestException
+from services import DayCountAmortizationScheduleService
+
+
+def final_balance_cents(amount: Decimal, term_months: int, interest_rate: Decimal, start_date: datetime.date,
+                        payment_cents: int):
+    """Balance left paying a payment every month, calculated with Decimal"""
+    balance = amount
+    date = start_date
+    for month in range(1, term_months + 1):
+        next_date = DayCountAmortizationScheduleService._payment_dates(start_date, month)[-1]
+        interest = (balance * interest_rate * (next_date - date).days / 365).quantize(
+            Decimal('0.01'), rounding=decimal.ROUND_HALF_UP)
+        balance = balance + interest - Decimal(payment_cents).scaleb(-2)
+        date = next_date
+    return int(balance.scaleb(2))
+
+
+class TestDayCountAmortizationScheduleService(unittest.TestCase):
+    def test_single_month(self):
+        # February 2023 has 28 days: 1000.00 * 0.1 * 28 / 365 = 7.67
+        schedule = DayCountAmortizationScheduleService.generate_amortization_schedule(
+            Decimal('1000.00'), 1, Decimal('0.1'), datetime.date(2023, 2, 1))
+        self.assertEqual(2, len(schedule))
+        self.assertEqual({
+            'balance': Decimal('0.00'),
+            'payment': Decimal('1007.67'),
+            'principal_paid': Decimal('1000.00'),
+            'interest_paid': Decimal('7.67'),
+            'total_paid': Decimal('1007.67'),
+            'total_principal_paid': Decimal('1000.00'),
+            'total_interest_paid': Decimal('7.67'),
+            'date': datetime.date(2023, 3, 1)
+        }, schedule[1])
+
+    def test_actual_days(self):
+        schedule = DayCountAmortizationScheduleService.generate_amortization_schedule(
+            Decimal('1000.00'), 12, Decimal('0.1'), datetime.date(2024, 1, 31))
+        # Payments fall on the last day of shorter months
+        self.assertEqual(
+            [datetime.date(2024, 1, 31), datetime.date(2024, 2, 29), datetime.date(2024, 3, 31),
+             datetime.date(2024, 4, 30)],
+            [month['date'] for month in schedule[:4]])
+        # 29 days of interest in February, then 31 days in March
+        self.assertEqual(Decimal('7.95'), schedule[1]['interest_paid'])
+        self.assertEqual(round(schedule[1]['balance'] * Decimal('0.1') * 31 / 365, 2), schedule[2]['interest_paid'])
+
+    def test_zero_interest_rate(self):
+        schedule = DayCountAmortizationScheduleService.generate_amortization_schedule(
+            Decimal('1000.00'), 3, Decimal('0'), datetime.date(2023, 1, 1))
+        self.assertEqual([Decimal('333.33'), Decimal('333.33'), Decimal('333.34')],
+                         [month['payment'] for month in schedule[1:]])
+
+    def test_schedules(self):
+        generator = random.Random(1)
+        for _ in range(200):
+            amount = Decimal(generator.randint(100000, 10000000)).scaleb(-2)
+            term_months = generator.randint(1, 120)
+            interest_rate = Decimal(generator.randint(0, 3600)).scaleb(-4)
+            start_date = datetime.date(2020, 1, 1) + datetime.timedelta(days=generator.randint(0, 3650))
+            with self.subTest(amount=amount, term_months=term_months, interest_rate=interest_rate,
+                              start_date=start_date):
+                payment, iterations = DayCountAmortizationScheduleService.solve_level_payment(
+                    amount, term_months, interest_rate, start_date)
+                # Well within MAX_SOLVER_ITERATIONS: the Newton step and the
+                # neighbouring cent
+                self.assertLessEqual(iterations, 3)
+
+                # No whole-cent payment leaves a smaller final balance
+                payment_cents = int(payment.scaleb(2))
+                final_balances = [
+                    abs(final_balance_cents(amount, term_months, interest_rate, start_date, cents))
+                    for cents in [payment_cents - 1, payment_cents, payment_cents + 1]
+                ]
+                self.assertEqual(min(final_balances), final_balances[1])
+
+                schedule = DayCountAmortizationScheduleService.generate_amortization_schedule(
+                    amount, term_months, interest_rate, start_date)
+                self.assertEqual(term_months + 1, len(schedule))
+                self.assertTrue(all(month['payment'] == payment for month in schedule[1:-1]))
+                final_month = schedule[-1]
+                # The final payment also pays what the level payment leaves
+                self.assertEqual(
+                    payment + Decimal(final_balance_cents(
+                        amount, term_months, interest_rate, start_date, payment_cents)).scaleb(-2),
+                    final_month['payment'])
+                self.assertEqual(Decimal('0.00'), final_month['balance'])
+                self.assertEqual(amount, final_month['total_principal_paid'])
+                for month in schedule:
+                    self.assertEqual(month['total_paid'], month['total_principal_paid'] + month['total_interest_paid'])
+                    self.assertEqual(month['payment'], month['principal_paid'] + month['interest_paid'])
+
+    def test_invalid_loan_parameters(self):
+        for amount, term_months, interest_rate in [
+                (Decimal('0'), 12, Decimal('0.1')),
+                (Decimal('1000.00'), 0, Decimal('0.1')),
+                (Decimal('1000.00'), 12, Decimal('-0.1'))]:
+            with self.assertRaises(Exception):
+                DayCountAmortizationScheduleService.generate_amortization_schedule(
+                    amount, term_months, interest_rate, datetime.date(2023, 1, 1))
+
+    def test_start_date_too_late(self):
+        # Ten months fit in year 9999; the eleventh would be in year 10000
+        start_date = datetime.date(9999, 2, 1)
+        schedule = DayCountAmortizationScheduleService.generate_amortization_schedule(
+            Decimal('1000.00'), 10, Decimal('0.1'), start_date)
+        self.assertEqual(datetime.date(9999, 12, 1), schedule[-1]['date'])
+        with self.assertRaises(RequestException):
+            DayCountAmortizationScheduleService.generate_amortization_schedule(
+                Decimal('1000.00'), 11, Decimal('0.1'), start_date)
+        with self.assertRaises(RequestException):
+            DayCountAmortizationScheduleService.solve_level_payment(Decimal('1000.00'), 11, Decimal('0.1'), start_date)
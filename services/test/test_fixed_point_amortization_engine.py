@@ -0,0 +1,72 @@
+"""Tests for FixedPointAmortizationEngine"""
+import os
+import unittest
+from decimal import Decimal
+from services import CreateAmortizationScheduleService
+from services.create_amortization_schedule_service import DECIMAL_ARITHMETIC, INTEGER_ARITHMETIC
+from services.create_loan_service import MAX_LOAN_AMOUNT, MAX_TERM_MONTHS, MIN_INTEREST_RATE, MAX_INTEREST_RATE
+from .test_create_amortization_schedule_service import EXAMPLES
+
+
+class TestFixedPointAmortizationEngine(unittest.TestCase):
+    def test_generate_amortization_schedule(self):
+        for example in EXAMPLES:
+            with self.subTest(example=example.name):
+                self.assertEqual(
+                    CreateAmortizationScheduleService.generate_amortization_schedule(
+                        example.amount, example.term_months, example.interest_rate, DECIMAL_ARITHMETIC),
+                    CreateAmortizationScheduleService.generate_amortization_schedule(
+                        example.amount, example.term_months, example.interest_rate, INTEGER_ARITHMETIC))
+
+    def test_generate_amortization_schedule_cents(self):
+        # Differential test against the Decimal engine over the range accepted
+        # by CreateLoanService. Set FULL_ARITHMETIC_GRID=1 to check every term
+        # at every basis point (this takes a long time).
+        full_grid = os.environ.get('FULL_ARITHMETIC_GRID') == '1'
+        rate_step = Decimal('0.0001') if full_grid else Decimal('0.005')
+        interest_rates = []
+        interest_rate = MIN_INTEREST_RATE
+        while interest_rate <= MAX_INTEREST_RATE:
+            interest_rates.append(interest_rate)
+            interest_rate += rate_step
+        term_months = range(1, MAX_TERM_MONTHS + 1) if full_grid else [1, 2, 12, 59, 60, 120]
+        amounts = [Decimal('0.01'), Decimal('999.99'), Decimal('1000.20'), Decimal('33333.33'), MAX_LOAN_AMOUNT]
+
+        for amount in amounts:
+            for term in term_months:
+                for interest_rate in interest_rates:
+                    with self.subTest(amount=amount, term_months=term, interest_rate=interest_rate):
+                        self.assertEqual(
+                            CreateAmortizationScheduleService.generate_amortization_schedule_cents(
+                                amount, term, interest_rate, DECIMAL_ARITHMETIC),
+                            CreateAmortizationScheduleService.generate_amortization_schedule_cents(
+                                amount, term, interest_rate, INTEGER_ARITHMETIC))
+
+    def test_sub_cent_amounts(self):
+        # CreateLoanService accepts amounts with more than two decimals; half
+        # cents round differently depending on how the Decimal engine summed
+        cases = [
+            (Decimal('23975.445'), 96, Decimal('0.06')),
+            (Decimal('25020.955'), 99, Decimal('0.1')),
+            (Decimal('12706.375'), 32, Decimal('0.12345')),
+            (Decimal('0.005'), 3, Decimal('0.06')),
+            (Decimal('0.0049999999999999'), 12, Decimal('0.1')),
+            (Decimal('1000.0000000000005'), 12, Decimal('0')),
+        ]
+        for amount in [Decimal('0.015'), Decimal('999.995'), Decimal('1000.125'), Decimal('33333.3333')]:
+            for term in [1, 2, 12, 59, 60, 120]:
+                for interest_rate in [Decimal('0'), Decimal('0.06'), Decimal('0.1'), Decimal('0.12345')]:
+                    cases.append((amount, term, interest_rate))
+
+        for amount, term, interest_rate in cases:
+            with self.subTest(amount=amount, term_months=term, interest_rate=interest_rate):
+                self.assertEqual(
+                    CreateAmortizationScheduleService.generate_amortization_schedule_cents(
+                        amount, term, interest_rate, DECIMAL_ARITHMETIC),
+                    CreateAmortizationScheduleService.generate_amortization_schedule_cents(
+                        amount, term, interest_rate, INTEGER_ARITHMETIC))
+
+    def test_unknown_arithmetic(self):
+        with self.assertRaises(Exception):
+            CreateAmortizationScheduleService.generate_amortization_schedule_cents(
+                Decimal('1000.00'), 12, Decimal('0.1'), 'float')
@@ -0,0 +1,108 @@
+"""Tests for GetUserLoansService"""
+import unittest
+from decimal import Decimal
+from repositories import AuthorizedUserRepository, LoanRepository, UserLoansView, UserRepository
+from request_exception import RequestException
+from services import AddAuthorizedUserService, CreateLoanService, CreateUserService, GetUserLoansService
+
+
+class TestGetUserLoansService(unittest.TestCase):
+    def setUp(self):
+        self.user_loans_view = UserLoansView()
+        self.user_repository = UserRepository()
+        self.loan_repository = LoanRepository(self.user_loans_view)
+        self.authorized_user_repository = AuthorizedUserRepository(self.user_loans_view)
+
+        self.owner_id = CreateUserService.create_user(self.user_repository, 'owner')
+        self.other_id = CreateUserService.create_user(self.user_repository, 'other')
+        self.owned_loan_id = self.create_loan(self.owner_id)
+        self.shared_loan_id = self.create_loan(self.other_id)
+        AddAuthorizedUserService.add_authorized_user(
+            self.authorized_user_repository,
+            self.user_repository,
+            self.loan_repository,
+            self.owner_id,
+            self.shared_loan_id)
+
+    def create_loan(self, user_id: int):
+        return CreateLoanService.create_loan(
+            self.loan_repository,
+            self.user_repository,
+            user_id=user_id,
+            amount=Decimal('1000.00'),
+            term_months=12,
+            interest_rate=Decimal('0.1'))
+
+    def get_user_loans(self, user_id: int, user_loans_view=None):
+        return GetUserLoansService.get_user_loans(
+            self.loan_repository,
+            self.user_repository,
+            self.authorized_user_repository,
+            user_id,
+            user_loans_view)
+
+    def test_get_user_loans(self):
+        for user_loans_view in [None, self.user_loans_view]:
+            with self.subTest(user_loans_view=user_loans_view):
+                loans = self.get_user_loans(self.owner_id, user_loans_view)
+                self.assertEqual([self.owned_loan_id, self.shared_loan_id], [loan.loan_id for loan in loans])
+                self.assertEqual([[], [self.owner_id]], [loan.authorized_user_ids for loan in loans])
+
+    def test_get_user_loans_repeated(self):
+        for user_loans_view in [None, self.user_loans_view]:
+            with self.subTest(user_loans_view=user_loans_view):
+                for _ in range(3):
+                    self.assertEqual(2, len(self.get_user_loans(self.owner_id, user_loans_view)))
+                self.assertEqual(1, len(self.loan_repository.read_loans_for_user_id(self.owner_id)))
+                self.assertEqual([], self.loan_repository.read(self.shared_loan_id).authorized_user_ids)
+
+    def test_get_user_loans_missing_user(self):
+        with self.assertRaises(RequestException):
+            self.get_user_loans(100)
+
+    def test_read_authorized_user_ids_many(self):
+        self.assertEqual(
+            {self.owned_loan_id: [], self.shared_loan_id: [self.owner_id], 100: []},
+            self.authorized_user_repository.read_authorized_user_ids_many(
+                [self.owned_loan_id, self.shared_loan_id, 100]))
+
+    def test_get_user_loans_page(self):
+        owned_loan_ids = [self.owned_loan_id] + [self.create_loan(self.owner_id) for _ in range(3)]
+        shared_loan_ids = [self.shared_loan_id] + [self.create_loan(self.other_id) for _ in range(2)]
+        for loan_id in reversed(shared_loan_ids[1:]):
+            AddAuthorizedUserService.add_authorized_user(
+                self.authorized_user_repository,
+                self.user_repository,
+                self.loan_repository,
+                self.owner_id,
+                loan_id)
+
+        for limit in range(1, 9):
+            with self.subTest(limit=limit):
+                loan_ids = []
+                cursor = None
+                while True:
+                    loans, cursor = GetUserLoansService.get_user_loans_page(
+                        self.loan_repository,
+                        self.user_repository,
+                        self.authorized_user_repository,
+                        self.owner_id,
+                        cursor,
+                        limit)
+                    self.assertLessEqual(len(loans), limit)
+                    loan_ids += [loan.loan_id for loan in loans]
+                    if cursor is None:
+                        break
+                self.assertEqual(owned_loan_ids + shared_loan_ids, loan_ids)
+
+    def test_get_user_loans_page_invalid(self):
+        for cursor, limit in [('owned:x', 10), ('other:1', 10), ('1', 10), (None, 0), (None, 1001)]:
+            with self.subTest(cursor=cursor, limit=limit):
+                with self.assertRaises(RequestException):
+                    GetUserLoansService.get_user_loans_page(
+                        self.loan_repository,
+                        self.user_repository,
+                        self.authorized_user_repository,
+                        self.owner_id,
+                        cursor,
+                        limit)
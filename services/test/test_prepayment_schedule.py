@@ -0,0 +1,90 @@
+"""Tests for PrepaymentSchedule"""
+import random
+import unittest
+from decimal import Decimal
+from request_exception import RequestException
+from services import CreateAmortizationScheduleService, PrepaymentSchedule
+
+
+def without_extra_payments(months):
+    return [{name: value for name, value in month.items() if name != 'extra_payment'} for month in months]
+
+
+class TestPrepaymentSchedule(unittest.TestCase):
+    def test_same_as_schedule_without_extra_payments(self):
+        generator = random.Random(1)
+        for _ in range(100):
+            amount = Decimal(generator.randint(1, 10000000)).scaleb(-2)
+            term_months = generator.randint(1, 360)
+            interest_rate = Decimal(generator.randint(0, 3600)).scaleb(-4)
+            schedule = PrepaymentSchedule(amount, term_months, interest_rate,
+                                          checkpoint_interval=generator.randint(1, 24))
+            self.assertEqual(
+                CreateAmortizationScheduleService.generate_amortization_schedule(amount, term_months, interest_rate),
+                without_extra_payments(schedule.months))
+            self.assertTrue(all(month['extra_payment'] == 0 for month in schedule.months))
+
+    def test_incremental_same_as_full(self):
+        generator = random.Random(2)
+        for _ in range(100):
+            amount = Decimal(generator.randint(100000, 10000000)).scaleb(-2)
+            term_months = generator.randint(1, 120)
+            interest_rate = Decimal(generator.randint(0, 3600)).scaleb(-4)
+            checkpoint_interval = generator.randint(1, 24)
+            schedule = PrepaymentSchedule(amount, term_months, interest_rate, checkpoint_interval=checkpoint_interval)
+            # A sequence of changes, as when dragging a slider
+            for _ in range(3):
+                extra_payments = {
+                    generator.randint(1, term_months): Decimal(generator.randint(0, int(amount) * 50)).scaleb(-2)
+                    for _ in range(generator.randint(0, 3))
+                }
+                schedule = schedule.with_extra_payments(extra_payments)
+                full_schedule = PrepaymentSchedule(
+                    amount, term_months, interest_rate, extra_payments, checkpoint_interval)
+                self.assertEqual(full_schedule.months, schedule.months)
+                self.assertEqual(full_schedule.checkpoint_months, schedule.checkpoint_months)
+                self.assertEqual(full_schedule.checkpoint_states, schedule.checkpoint_states)
+
+    def test_recomputes_from_checkpoint(self):
+        schedule = PrepaymentSchedule(Decimal('20000.00'), 120, Decimal('0.06'), checkpoint_interval=12)
+        self.assertEqual(120, schedule.recomputed_months)
+        what_if = schedule.with_extra_payments({100: Decimal('500.00')})
+        # Months from 97 (paid off early at 118) from the checkpoint at month 96
+        self.assertEqual(118, len(what_if.months) - 1)
+        self.assertEqual(22, what_if.recomputed_months)
+        self.assertEqual(schedule.months[:100], what_if.months[:100])
+        self.assertEqual(Decimal('500.00'), what_if.months[100]['extra_payment'])
+        self.assertEqual(0, what_if.with_extra_payments({100: Decimal('500.00')}).recomputed_months)
+        # The original schedule is unchanged
+        self.assertEqual({}, schedule.extra_payments)
+        self.assertEqual(121, len(schedule.months))
+
+    def test_early_payoff(self):
+        amount = Decimal('10000.00')
+        schedule = PrepaymentSchedule(amount, 36, Decimal('0.12')).with_extra_payments({14: Decimal('20000.00')})
+        self.assertEqual(15, len(schedule.months))
+        last_month = schedule.months[-1]
+        self.assertEqual(Decimal('0.00'), last_month['balance'])
+        self.assertEqual(amount, last_month['total_principal_paid'])
+        self.assertEqual(last_month['total_paid'], last_month['total_principal_paid'] + last_month['total_interest_paid'])
+        # Only what was left is paid as extra payment
+        self.assertEqual(last_month['payment'] - schedule.payment.quantize(Decimal('0.01')),
+                         last_month['extra_payment'])
+
+    def test_invalid_extra_payments(self):
+        schedule = PrepaymentSchedule(Decimal('10000.00'), 36, Decimal('0.12'))
+        for extra_payments in [
+                {0: Decimal('1.00')},
+                {37: Decimal('1.00')},
+                {'1': Decimal('1.00')},
+                {1: Decimal('-1.00')},
+                {1: Decimal('1.001')},
+                {1: Decimal('NaN')},
+                {1: Decimal('Infinity')},
+                {1: Decimal('100000.01')},
+                {3: Decimal('1E+30')},
+                {3: Decimal('1e999999')},
+                {1: 1}]:
+            with self.subTest(extra_payments=extra_payments):
+                with self.assertRaises(RequestException):
+                    schedule.with_extra_payments(extra_payments)
@@ -0,0 +1,90 @@
+"""Tests for RevokeAuthorizedUserService"""
+import unittest
+from decimal import Decimal
+from models import AuthorizedUser
+from repositories import AuthorizedUserRepository, LoanRepository, UserLoansView, UserRepository
+from request_exception import RequestException
+from services import AddAuthorizedUserService, CreateLoanService, CreateUserService, RevokeAuthorizedUserService
+
+
+class TestRevokeAuthorizedUserService(unittest.TestCase):
+    def setUp(self):
+        self.user_loans_view = UserLoansView()
+        self.user_repository = UserRepository()
+        self.loan_repository = LoanRepository(self.user_loans_view)
+        self.authorized_user_repository = AuthorizedUserRepository(self.user_loans_view)
+        self.owner_id = CreateUserService.create_user(self.user_repository, 'alice')
+        self.user_id = CreateUserService.create_user(self.user_repository, 'bob')
+        self.loan_ids = [
+            CreateLoanService.create_loan(
+                self.loan_repository, self.user_repository, self.owner_id, Decimal('1000.00'), 12, Decimal('0.1'))
+            for _ in range(3)
+        ]
+
+    def add_authorized_user(self, loan_id: int):
+        AddAuthorizedUserService.add_authorized_user(
+            self.authorized_user_repository, self.user_repository, self.loan_repository, self.user_id, loan_id)
+
+    def test_revoke_authorized_user(self):
+        for loan_id in self.loan_ids:
+            self.add_authorized_user(loan_id)
+
+        RevokeAuthorizedUserService.revoke_authorized_user(
+            self.authorized_user_repository, self.loan_repository, self.user_id, self.loan_ids[1])
+
+        self.assertEqual([], self.authorized_user_repository.read_authorized_user_ids(self.loan_ids[1]))
+        self.assertEqual([self.user_id], self.authorized_user_repository.read_authorized_user_ids(self.loan_ids[0]))
+        expected_loan_ids = [self.loan_ids[0], self.loan_ids[2]]
+        self.assertEqual(expected_loan_ids, self.authorized_user_repository.read_loan_ids_by_user_id(self.user_id))
+        self.assertEqual(expected_loan_ids, self.authorized_user_repository.read_loan_ids_after(self.user_id, 0, 10))
+        self.assertEqual(expected_loan_ids, self.user_loans_view.read_loan_ids(self.user_id))
+        self.assertIsNone(self.authorized_user_repository.read(2))
+        self.assertEqual(2, self.authorized_user_repository.count())
+
+        # Authorizing again assigns a new ID
+        self.add_authorized_user(self.loan_ids[1])
+        self.assertEqual(4, self.authorized_user_repository.read_by_loan_id_and_user_id(
+            self.loan_ids[1], self.user_id).authorized_user_id)
+        self.assertEqual(self.loan_ids, self.authorized_user_repository.read_loan_ids_after(self.user_id, 0, 10))
+
+    def test_revoke_invalid(self):
+        self.add_authorized_user(self.loan_ids[0])
+        with self.assertRaises(RequestException):
+            RevokeAuthorizedUserService.revoke_authorized_user(
+                self.authorized_user_repository, self.loan_repository, self.user_id, 100)
+        with self.assertRaises(RequestException):
+            RevokeAuthorizedUserService.revoke_authorized_user(
+                self.authorized_user_repository, self.loan_repository, self.user_id, self.loan_ids[1])
+        RevokeAuthorizedUserService.revoke_authorized_user(
+            self.authorized_user_repository, self.loan_repository, self.user_id, self.loan_ids[0])
+        with self.assertRaises(RequestException):
+            RevokeAuthorizedUserService.revoke_authorized_user(
+                self.authorized_user_repository, self.loan_repository, self.user_id, self.loan_ids[0])
+        self.assertEqual({}, self.authorized_user_repository.authorized_users_by_user_id)
+        self.assertEqual({}, self.user_loans_view.shared_loan_ids_by_user_id)
+
+    def test_duplicates_merged(self):
+        self.add_authorized_user(self.loan_ids[0])
+        authorized_users = [
+            AuthorizedUser(authorized_user_id=0, loan_id=loan_id, user_id=self.user_id)
+            for loan_id in [self.loan_ids[0], self.loan_ids[1], self.loan_ids[1]]
+        ]
+        self.authorized_user_repository.create_many(authorized_users)
+
+        self.assertEqual([1, 2, 2], [authorized_user.authorized_user_id for authorized_user in authorized_users])
+        self.assertEqual(2, self.authorized_user_repository.count())
+        self.assertEqual([self.user_id], self.authorized_user_repository.read_authorized_user_ids(self.loan_ids[1]))
+        self.assertEqual(self.loan_ids[:2], self.user_loans_view.read_loan_ids(self.user_id))
+
+    def test_reads_do_not_allocate(self):
+        repository = self.authorized_user_repository
+        self.assertEqual([], repository.read_authorized_user_ids(100))
+        self.assertEqual({100: []}, repository.read_authorized_user_ids_many([100]))
+        self.assertEqual([], repository.read_loan_ids_by_user_id(100))
+        self.assertEqual([], repository.read_loan_ids_after(100, 0, 10))
+        self.assertIsNone(repository.read_by_loan_id_and_user_id(100, 100))
+        self.assertEqual([], self.user_loans_view.read_loan_ids(100))
+        self.assertEqual({}, repository.authorized_users_by_loan_id)
+        self.assertEqual({}, repository.authorized_users_by_user_id)
+        self.assertEqual({}, repository.sorted_loan_ids_by_user_id)
+        self.assertEqual({}, self.user_loans_view.shared_loan_ids_by_user_id)
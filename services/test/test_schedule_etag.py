@@ -0,0 +1,29 @@
+"""Tests for ScheduleETag"""
+import unittest
+from decimal import Decimal
+from services import ScheduleETag
+
+
+class TestScheduleETag(unittest.TestCase):
+    def test_for_loan(self):
+        etag = ScheduleETag.for_loan(Decimal('1000'), 12, Decimal('0.1'), 'schedule application/json')
+        self.assertRegex(etag, r'^"[0-9a-f]{32}"$')
+        self.assertEqual(etag, ScheduleETag.for_loan(Decimal('1000'), 12, Decimal('0.1'), 'schedule application/json'))
+        # Every term, its representation and the response contents count
+        for amount, term_months, interest_rate, representation in [
+                ('1000.00', 12, '0.1', 'schedule application/json'),
+                ('1000', 13, '0.1', 'schedule application/json'),
+                ('1000', 12, '0.10', 'schedule application/json'),
+                ('1000', 12, '0.1', 'schedule application/x-ndjson'),
+                ('1000', 12, '0.1', 'month 3')]:
+            self.assertNotEqual(
+                etag, ScheduleETag.for_loan(Decimal(amount), term_months, Decimal(interest_rate), representation))
+
+    def test_matches(self):
+        etag = '"abc"'
+        self.assertFalse(ScheduleETag.matches(None, etag))
+        self.assertTrue(ScheduleETag.matches('"abc"', etag))
+        self.assertTrue(ScheduleETag.matches(' * ', etag))
+        self.assertTrue(ScheduleETag.matches('"x", W/"abc"', etag))
+        self.assertFalse(ScheduleETag.matches('"abcd", "ab"', etag))
+        self.assertFalse(ScheduleETag.matches('abc', etag))
@@ -0,0 +1,78 @@
+"""Tests for ScheduleExecutor"""
+import asyncio
+import decimal
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from services import AmortizationScheduleCache, CreateAmortizationScheduleService, ScheduleExecutor
+from services.schedule_executor import INLINE_EXECUTOR, PROCESS_EXECUTOR, THREAD_EXECUTOR
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+class TestScheduleExecutor(unittest.TestCase):
+    def test_run(self):
+        for kind in [INLINE_EXECUTOR, THREAD_EXECUTOR, PROCESS_EXECUTOR]:
+            with self.subTest(kind=kind):
+                executor = ScheduleExecutor(kind, max_workers=1, inline_max_months=12)
+                try:
+                    for term_months in [12, 60]:
+                        self.assertEqual(
+                            CreateAmortizationScheduleService.generate_amortization_window(
+                                Decimal('5000.00'), term_months, Decimal('0.07'), 0, term_months),
+                            asyncio.run(executor.run(
+                                term_months,
+                                CreateAmortizationScheduleService.generate_amortization_window,
+                                Decimal('5000.00'),
+                                term_months,
+                                Decimal('0.07'),
+                                0,
+                                term_months)))
+                finally:
+                    executor.shutdown()
+
+    def test_run_inline_below_threshold(self):
+        executor = ScheduleExecutor(THREAD_EXECUTOR, max_workers=1, inline_max_months=24)
+        try:
+            self.assertEqual(threading.current_thread().name, asyncio.run(executor.run(24, current_thread_name)))
+            self.assertNotEqual(threading.current_thread().name, asyncio.run(executor.run(25, current_thread_name)))
+        finally:
+            executor.shutdown()
+
+    def test_unknown_executor(self):
+        with self.assertRaises(Exception):
+            ScheduleExecutor('fiber')
+
+    def test_cache_get_schedule_json_async(self):
+        executor = ScheduleExecutor(THREAD_EXECUTOR, max_workers=1, inline_max_months=0)
+        try:
+            cache = AmortizationScheduleCache()
+            encoded = asyncio.run(cache.get_schedule_json_async(
+                Decimal('5000.00'), 60, Decimal('0.07'), executor))
+            self.assertEqual(AmortizationScheduleCache().get_schedule_json(
+                Decimal('5000.00'), 60, Decimal('0.07')), encoded)
+            self.assertIs(encoded, asyncio.run(cache.get_schedule_json_async(
+                Decimal('5000.00'), 60, Decimal('0.07'), executor)))
+        finally:
+            executor.shutdown()
+
+    def test_caller_decimal_context(self):
+        """Schedules don't depend on or change the caller's decimal context"""
+        loans = [(Decimal('12345.67'), term_months, Decimal(rate).scaleb(-4))
+                 for term_months in [12, 60, 120] for rate in [600, 1999, 3600]]
+        expected = [CreateAmortizationScheduleService.generate_amortization_schedule(*loan) for loan in loans]
+
+        def generate(loan):
+            with decimal.localcontext() as context:
+                context.prec = 12
+                context.rounding = decimal.ROUND_DOWN
+                schedule = CreateAmortizationScheduleService.generate_amortization_schedule(*loan)
+                self.assertEqual(12, decimal.getcontext().prec)
+                self.assertEqual(decimal.ROUND_DOWN, decimal.getcontext().rounding)
+                return schedule
+
+        with ThreadPoolExecutor(4) as pool:
+            self.assertEqual(expected * 4, list(pool.map(generate, loans * 4)))
@@ -0,0 +1,36 @@
+"""Tests for ScheduleJsonEncoder"""
+import json
+import unittest
+from decimal import Decimal
+from models import AmortizationSchedule
+from services import CreateAmortizationScheduleService, ScheduleJsonEncoder
+from .test_create_amortization_schedule_service import EXAMPLES
+
+
+class TestScheduleJsonEncoder(unittest.TestCase):
+    def test_encode_schedule(self):
+        for example in EXAMPLES:
+            with self.subTest(example=example.name):
+                schedule = AmortizationSchedule.from_months(
+                    CreateAmortizationScheduleService.iterate_amortization_schedule(
+                        example.amount, example.term_months, example.interest_rate))
+                self.assertEqual(
+                    [
+                        {
+                            'month': month,
+                            'remaining_balance': str(month_balances['balance']),
+                            'monthly_payment': str(month_balances['payment'])
+                        }
+                        for month, month_balances in enumerate(schedule)
+                    ],
+                    json.loads(ScheduleJsonEncoder.encode_schedule(schedule)))
+
+    def test_encode_schedule_formats_cents(self):
+        schedule = AmortizationSchedule(Decimal('1000'), {
+            field: [0, 5, -5, -105, 123456] for field in
+            ['balance', 'payment', 'principal_paid', 'interest_paid', 'total_paid', 'total_principal_paid',
+             'total_interest_paid']
+        })
+        self.assertEqual(
+            ['1000', '0.05', '-0.05', '-1.05', '1234.56'],
+            [month['remaining_balance'] for month in json.loads(ScheduleJsonEncoder.encode_schedule(schedule))])
@@ -0,0 +1,90 @@
+"""Tests for metrics"""
+import unittest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from metrics import MetricsMiddleware, MetricsRegistry, instrument
+from repositories import UserRepository
+
+
+class Calculator:
+    @staticmethod
+    def add(a, b):
+        return a + b
+
+    @staticmethod
+    def _private():
+        return 1
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter('requests_total', 'Requests', ['path'])
+        counter.inc('/a')
+        counter.inc('/a')
+        counter.inc('/"b"', amount=3)
+        self.assertEqual(
+            '# HELP requests_total Requests\n'
+            '# TYPE requests_total counter\n'
+            'requests_total{path="/a"} 2\n'
+            'requests_total{path="/\\"b\\""} 3\n',
+            self.registry.render())
+
+    def test_histogram(self):
+        histogram = self.registry.histogram('duration_seconds', 'Duration', ['path'], buckets=[0.1, 1.0])
+        for value in [0.05, 0.1, 0.5, 2.0]:
+            histogram.observe(value, '/a')
+        self.assertEqual(
+            '# HELP duration_seconds Duration\n'
+            '# TYPE duration_seconds histogram\n'
+            'duration_seconds_bucket{path="/a",le="0.1"} 2\n'
+            'duration_seconds_bucket{path="/a",le="1.0"} 3\n'
+            'duration_seconds_bucket{path="/a",le="+Inf"} 4\n'
+            'duration_seconds_sum{path="/a"} 2.65\n'
+            'duration_seconds_count{path="/a"} 4\n',
+            self.registry.render())
+
+    def test_gauge_function(self):
+        records = {'users': 1}
+        self.registry.gauge_function('records', 'Records', lambda: {(name,): n for name, n in records.items()},
+                                     ['repository'])
+        records['users'] = 5
+        self.assertIn('records{repository="users"} 5\n', self.registry.render())
+
+    def test_instrument(self):
+        histogram = self.registry.histogram('call_duration_seconds', 'Calls', ['component', 'method'])
+        calculator = instrument(Calculator, 'Calculator', histogram)
+        user_repository = instrument(UserRepository(), 'UserRepository', histogram)
+
+        self.assertEqual(3, calculator.add(1, 2))
+        self.assertEqual(1, calculator._private())
+        self.assertFalse(user_repository.exists(1))
+        # The class itself isn't timed
+        self.assertEqual(3, Calculator.add(1, 2))
+        self.assertEqual(
+            {('Calculator', 'add'), ('UserRepository', 'exists')},
+            set(histogram.series))
+
+    def test_middleware(self):
+        app = FastAPI()
+        request_duration = self.registry.histogram('duration_seconds', 'Duration', ['method', 'path'])
+        requests = self.registry.counter('requests_total', 'Requests', ['method', 'path', 'status'])
+        app.add_middleware(MetricsMiddleware, request_duration=request_duration, requests=requests)
+
+        @app.get('/item/{item_id}')
+        async def get_item(item_id: int):
+            return {}
+
+        client = TestClient(app)
+        client.get('/item/1')
+        client.get('/item/2')
+        client.get('/item/x')
+        client.get('/missing')
+        self.assertEqual({
+            ('GET', '/item/{item_id}', '200'): 2,
+            ('GET', '/item/{item_id}', '422'): 1,
+            ('GET', 'unmatched', '404'): 1
+        }, requests.values)
+        self.assertEqual({('GET', '/item/{item_id}'), ('GET', 'unmatched')}, set(request_duration.series))
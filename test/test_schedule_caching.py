@@ -0,0 +1,57 @@
+"""Tests for conditional requests of schedules"""
+import unittest
+from fastapi.testclient import TestClient
+import main
+
+
+class TestScheduleCaching(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(main.app)
+        user_id = self.client.post('/users', json={'username': 'alice'}).json()['user_id']
+        self.loan_ids = [
+            self.client.post('/user/{}/loans'.format(user_id), json={
+                'amount': amount, 'term_months': 12, 'interest_rate': '0.1'
+            }).json()['loan_id']
+            for amount in ['1000', '1000.00']
+        ]
+        main.schedule_cache.clear()
+
+    def test_not_modified(self):
+        for path, headers in [
+                ('schedule', {}),
+                ('schedule', {'Accept': 'application/x-ndjson'}),
+                ('schedule?from_month=2&to_month=4', {}),
+                ('month/3', {})]:
+            with self.subTest(path=path, headers=headers):
+                url = '/user/1/loan/{}/{}'.format(self.loan_ids[0], path)
+                response = self.client.get(url, headers=headers)
+                self.assertEqual(200, response.status_code)
+                etag = response.headers['ETag']
+                # Memory repositories without persistence reuse loan IDs
+                # after a restart, so clients always revalidate
+                self.assertEqual('private, no-cache', response.headers['Cache-Control'])
+
+                main.schedule_cache.clear()
+                statistics = main.schedule_cache.statistics()
+                response = self.client.get(url, headers={**headers, 'If-None-Match': 'W/{}'.format(etag)})
+                self.assertEqual(304, response.status_code)
+                self.assertEqual(b'', response.content)
+                self.assertEqual(etag, response.headers['ETag'])
+                # Nothing was generated or even looked up
+                self.assertEqual(statistics, main.schedule_cache.statistics())
+
+                response = self.client.get(url, headers={**headers, 'If-None-Match': '"other"'})
+                self.assertEqual(200, response.status_code)
+
+    def test_etags_differ(self):
+        etags = {
+            self.client.get('/user/1/loan/{}/schedule'.format(loan_id), headers=headers).headers['ETag']
+            for loan_id in self.loan_ids
+            for headers in [{}, {'Accept': 'application/x-ndjson'}]
+        }
+        self.assertEqual(4, len(etags))
+
+    def test_errors_not_cached(self):
+        response = self.client.get('/user/1/loan/{}/month/13'.format(self.loan_ids[0]), headers={'If-None-Match': '*'})
+        self.assertEqual(422, response.status_code)
+        self.assertNotIn('ETag', response.headers)
@@ -0,0 +1,24 @@
+"""Tests for getting user loans"""
+import unittest
+from fastapi.testclient import TestClient
+import main
+
+
+class TestUserLoans(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(main.app)
+        self.user_id = self.client.post('/users', json={'username': 'alice'}).json()['user_id']
+        for _ in range(3):
+            self.client.post('/user/{}/loans'.format(self.user_id), json={
+                'amount': '1000', 'term_months': 12, 'interest_rate': '0.1'
+            })
+
+    def test_limit(self):
+        response = self.client.get('/user/{}/loans?limit=2'.format(self.user_id))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(response.json()))
+        self.assertIn('X-Next-Cursor', response.headers)
+
+        # Zero isn't taken as the default page size
+        response = self.client.get('/user/{}/loans?limit=0'.format(self.user_id))
+        self.assertEqual(422, response.status_code)
@@ -0,0 +1,40 @@
+"""Tests for getting what-if schedules with extra payments"""
+import unittest
+from fastapi.testclient import TestClient
+import main
+
+
+class TestWhatIf(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(main.app)
+        user_id = self.client.post('/users', json={'username': 'alice'}).json()['user_id']
+        self.loan_id = self.client.post('/user/{}/loans'.format(user_id), json={
+            'amount': '10000.00', 'term_months': 36, 'interest_rate': '0.12'
+        }).json()['loan_id']
+        self.url = '/user/1/loan/{}/schedule/what_if'.format(self.loan_id)
+
+    def test_extra_payments(self):
+        response = self.client.post(self.url, json={'extra_payments': {'14': '20000.00'}})
+        self.assertEqual(200, response.status_code)
+        months = response.json()
+        self.assertEqual(15, len(months))
+        self.assertEqual('0.00', months[-1]['remaining_balance'])
+
+        # Unchanged without extra payments
+        response = self.client.post(self.url, json={'extra_payments': {}})
+        self.assertEqual(
+            self.client.get('/user/1/loan/{}/schedule'.format(self.loan_id)).json(),
+            [
+                {
+                    'month': month['month'],
+                    'remaining_balance': month['remaining_balance'],
+                    'monthly_payment': month['monthly_payment']
+                }
+                for month in response.json()
+            ])
+
+    def test_extra_payment_too_large(self):
+        for extra_payment in ['100000.01', '1E+30', '1e999999']:
+            with self.subTest(extra_payment=extra_payment):
+                response = self.client.post(self.url, json={'extra_payments': {'3': extra_payment}})
+                self.assertEqual(422, response.status_code)